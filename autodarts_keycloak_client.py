@@ -1,14 +1,22 @@
 """Utilities for authenticating against the AutoDarts Keycloak server.
 
 This module provides :class:`AutodartsKeycloakClient`, a small wrapper around
-``python-keycloak`` that periodically refreshes the access token in a
-background thread.  Only the minimal feature set required by this repository is
-implemented.  All networking is handled by ``python-keycloak``.
+``python-keycloak`` that refreshes the access token in a background thread.
+Only the minimal feature set required by this repository is implemented.  All
+networking is handled by ``python-keycloak``.
+
+Tokens and the user id can be kept in a local cache file (mode ``0600``), so a
+restart reuses them instead of logging in again.  Refreshes are scheduled for
+the expiry time and every new access token is published to subscribers.
+Refreshes run on an own thread or, if given, as a job of a shared
+:class:`timer_scheduler.TimerScheduler`.
 """
 
 from datetime import datetime, timedelta
-from time import sleep
+import json
+import os
 import threading
+from typing import Callable, List
 
 from keycloak import KeycloakOpenID
 
@@ -17,13 +25,14 @@ class AutodartsKeycloakClient:
     """Maintain an access token for the AutoDarts API.
 
     Parameters are passed via keyword-only arguments to make call sites
-    self-documenting.  After construction the client immediately requests an
-    access token and starts tracking its expiry time.  :meth:`start` can be used
-    to spawn a thread that keeps the token fresh.
+    self-documenting.  After construction the client holds a valid access
+    token, taken from ``cache_file`` if possible and requested otherwise.
+    :meth:`start` can be used to spawn a thread that keeps the token fresh and
+    :meth:`subscribe` to get notified about new tokens.
     """
 
     token_lifetime_fraction = 0.9
-    tick: int = 3
+    tick: int = 3  # Wartezeit nach fehlgeschlagenem Refresh
     run: bool = True
     username: str = None
     password: str = None
@@ -34,7 +43,9 @@ class AutodartsKeycloakClient:
     user_id: str = None
     expires_at: datetime = None
     refresh_expires_at: datetime = None
+    cache_file: str = None
     t: threading.Thread = None
+    job = None
 
     def __init__(
         self,
@@ -43,9 +54,10 @@ class AutodartsKeycloakClient:
         password: str,
         client_id: str,
         client_secret: str = None,
+        cache_file: str = None,
         debug: bool = False,
     ) -> None:
-        """Create a new client and retrieve an initial access token."""
+        """Create a new client and make sure a valid access token is available."""
 
         self.kc = KeycloakOpenID(
             server_url="https://login.autodarts.io",
@@ -56,10 +68,24 @@ class AutodartsKeycloakClient:
         )
         self.username = username
         self.password = password
+        self.cache_file = cache_file
         self.debug = debug
+        self._subscribers: List[Callable[[str], None]] = []
+        self._wake = threading.Event()
 
+        if self.__load_cache():
+            return
         self.__get_token()
         self.user_id = self.kc.userinfo(self.access_token)["sub"]
+        self.__save_cache()
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Call ``callback(access_token)`` whenever the token changes."""
+
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.remove(callback)
 
     def __set_token(self, token: dict) -> None:
         """Persist token information and calculate expiry timestamps."""
@@ -73,6 +99,66 @@ class AutodartsKeycloakClient:
             seconds=int(self.token_lifetime_fraction * token["refresh_expires_in"])
         )
 
+    def __publish(self) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(self.access_token)
+            except Exception:
+                print("Token subscriber failed")
+
+    def __load_cache(self) -> bool:
+        """Restore tokens from ``cache_file``; refresh them if only the access token expired."""
+
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, "r") as fh:
+                data = json.load(fh)
+            if data.get("username") != self.username:
+                return False
+            now = datetime.now()
+            refresh_expires_at = datetime.fromtimestamp(data["refresh_expires_at"])
+            if refresh_expires_at <= now:
+                return False
+            self.access_token = data["access_token"]
+            self.refresh_token = data["refresh_token"]
+            self.user_id = data["user_id"]
+            self.expires_at = datetime.fromtimestamp(data["expires_at"])
+            self.refresh_expires_at = refresh_expires_at
+            if self.expires_at <= now:
+                self.__refresh_token()
+                self.__save_cache()
+        except Exception:
+            # Defekter oder abgelaufener Cache: normal anmelden
+            self.access_token = None
+            return False
+        if self.debug:
+            print("Using cached token", self.expires_at, self.refresh_expires_at)
+        return True
+
+    def __save_cache(self) -> None:
+        """Write tokens to ``cache_file`` readable only by the current user."""
+
+        if not self.cache_file:
+            return
+        data = {
+            "username": self.username,
+            "user_id": self.user_id,
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expires_at": self.expires_at.timestamp(),
+            "refresh_expires_at": self.refresh_expires_at.timestamp(),
+        }
+        tmp = self.cache_file + ".tmp"
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as fh:
+                json.dump(data, fh)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            print("Writing token cache failed")
+
     def __get_token(self) -> None:
         """Retrieve a new access/refresh token pair."""
 
@@ -87,39 +173,60 @@ class AutodartsKeycloakClient:
         if self.debug:
             print("Refreshing token", self.expires_at, self.refresh_expires_at)
 
+    def _seconds_until_refresh(self) -> float:
+        if not self.access_token:
+            return 0.0
+        return max(0.0, (self.expires_at - datetime.now()).total_seconds())
+
+    def _refresh_due(self) -> float:
+        """Refresh the token if it is due; return the seconds until the next check."""
+
+        if self._seconds_until_refresh() > 0:
+            return self._seconds_until_refresh()
+        try:
+            if self.access_token and datetime.now() < self.refresh_expires_at:
+                self.__refresh_token()
+            else:
+                self.__get_token()
+            self.__save_cache()
+            self.__publish()
+        except Exception:
+            self.access_token = None
+            print("Receive Token failed")
+            return self.tick
+        return self._seconds_until_refresh()
+
     def _refresh_loop(self) -> None:
-        """Background worker keeping the token valid."""
+        """Background worker sleeping until the token is due for refresh."""
 
+        delay = self._seconds_until_refresh()
         while self.run:
-            try:
-                if not self.access_token:
-                    self.__get_token()
-
-                now = datetime.now()
-                if self.expires_at < now:
-                    if now < self.refresh_expires_at:
-                        self.__refresh_token()
-                    else:
-                        self.__get_token()
-            except Exception:
-                self.access_token = None
-                print("Receive Token failed")
+            self._wake.wait(delay)
+            self._wake.clear()
+            if not self.run:
+                break
+            delay = self._refresh_due()
 
-            sleep(self.tick)
+    def start(self, scheduler=None):
+        """Start refreshing: on ``scheduler`` if given, else on an own thread.
 
-    def start(self) -> threading.Thread:
-        """Start the background refresh thread."""
+        Returns the scheduler job or the thread.
+        """
 
+        if scheduler is not None:
+            self.job = scheduler.call_later(self._seconds_until_refresh(), self._refresh_due, name="token-refresh")
+            return self.job
         self.t = threading.Thread(target=self._refresh_loop, name="autodarts-tokenizer")
         self.t.start()
         return self.t
 
     def stop(self) -> None:
-        """Stop the background refresh thread."""
+        """Stop the background refresh."""
 
         self.run = False
+        if self.job is not None:
+            self.job.cancel()
+            return
+        self._wake.set()
         self.t.join()
         print(self.t.name + " EXIT")
-
-
-
@@ -0,0 +1,271 @@
+"""Performance benchmarks for rendering, GIF playback and dart updates.
+
+The suite imports ``webserver`` with the virtual display backend, so it runs
+on any Linux box without a panel.  It measures
+
+* ``draw_dart_screen`` frame time for 1-8 players (one score changes per frame),
+* sustained GIF playback FPS and frame-time jitter for a small and a
+  panel-sized GIF, and the jitter while the web app serves requests,
+* ``/dart/update`` request-to-frame latency through the Flask test client.
+
+With ``--render-process`` the matrix runs in the dedicated render process
+(:mod:`render_process`); only the GIF metrics apply then and are read from
+the child's playback stats.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --baseline results.json --threshold 0.2
+
+With ``--baseline`` the run fails (exit code 1) if any metric is worse than
+the baseline by more than ``--threshold`` (relative).
+"""
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+LOWER = "lower"
+HIGHER = "higher"
+
+
+def write_fixed_bdf(path: pathlib.Path, width: int, height: int, descent: int) -> None:
+    """Write a fixed-width BDF font with filled glyph boxes (ASCII only)."""
+
+    row = format(((1 << width) - 1) << ((8 - width % 8) % 8), "0{}X".format((width + 7) // 8 * 2))
+    lines = ["STARTFONT 2.1", f"FONTBOUNDINGBOX {width} {height} 0 {-descent}", "CHARS 95"]
+    for code in range(32, 127):
+        lines += [
+            f"STARTCHAR U+{code:04X}",
+            f"ENCODING {code}",
+            f"DWIDTH {width} 0",
+            f"BBX {width} {height} 0 {-descent}",
+            "BITMAP",
+        ]
+        lines += [row] * height + ["ENDCHAR"]
+    lines.append("ENDFONT")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def write_gif(path: pathlib.Path, size, frames: int, duration: int) -> str:
+    images = [Image.new("RGB", size, ((i * 37) % 256, (i * 91) % 256, 128)) for i in range(frames)]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=duration, loop=0)
+    return str(path)
+
+
+def prepare_environment(workdir: pathlib.Path, font_dir: str = None) -> None:
+    """Create settings, GIF folder and (if needed) fonts; export the env vars."""
+
+    gifs = workdir / "gifs"
+    gifs.mkdir()
+    (workdir / "settings.json").write_text(json.dumps({"rows": 64, "cols": 64, "chain_length": 3}))
+    if not font_dir or not os.path.exists(os.path.join(font_dir, "9x18B.bdf")):
+        font_dir = str(workdir / "fonts")
+        os.mkdir(font_dir)
+        write_fixed_bdf(pathlib.Path(font_dir) / "5x8.bdf", 5, 8, 2)
+        write_fixed_bdf(pathlib.Path(font_dir) / "9x18B.bdf", 9, 18, 4)
+    os.environ.update(
+        {
+            "MATRIX_BACKEND": "virtual",
+            "SETTINGS_FILE": str(workdir / "settings.json"),
+            "PLAYLIST_FILE": str(workdir / "playlist.json"),
+            "GIF_FOLDER": str(gifs),
+            "FONT_DIR": font_dir,
+        }
+    )
+
+
+def summarize(samples, unit: str, better: str = LOWER) -> dict:
+    samples = sorted(samples)
+    return {
+        "value": round(statistics.median(samples), 4),
+        "p95": round(samples[int(0.95 * (len(samples) - 1))], 4),
+        "unit": unit,
+        "better": better,
+    }
+
+
+def bench_draw(ws, iterations: int) -> dict:
+    """Frame time of ``draw_dart_screen`` + swap, one score change per frame."""
+
+    results = {}
+    for count in range(1, 9):
+        players = [{"name": f"Spieler {i + 1}", "score": 501, "sets": 0, "legs": 0} for i in range(count)]
+        with ws.state_lock:
+            ws.dart_state.update(players=players, current=0, checkout="T20 T19 D12")
+        samples = []
+        for i in range(iterations):
+            with ws.state_lock:
+                ws.dart_state["players"][i % count]["score"] = 501 - (i % 450)
+                ws.dart_state["current"] = i % count
+            started = time.perf_counter()
+            ws.draw_dart_screen()
+            ws.renderer.swap()
+            samples.append((time.perf_counter() - started) * 1000)
+        results[f"draw_dart_screen_{count}p_ms"] = summarize(samples, "ms")
+    return results
+
+
+def web_load(ws, stop: threading.Event) -> None:
+    """Keep the Flask app busy like a browser polling the status pages."""
+
+    client = ws.app.test_client()
+    while not stop.is_set():
+        client.get("/gif")
+        client.get("/dart/status")
+
+
+def play_for(ws, name: str, path: str, seconds: float, load: bool = False) -> dict:
+    """Play ``path`` for ``seconds``; return its playback stats."""
+
+    stop = threading.Event()
+    loaders = [threading.Thread(target=web_load, args=(ws, stop)) for _ in range(2 if load else 0)]
+    ws.gif_player.play([path], source="gif")
+    while not ws.gif_player.is_playing():
+        time.sleep(0.001)
+    for thread in loaders:
+        thread.start()
+    start_count = ws.display.frame_count if ws.display else 0
+    started = time.perf_counter()
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in loaders:
+        thread.join()
+    ws.gif_player.stop()
+    while ws.gif_player.is_playing():
+        time.sleep(0.001)
+    stats = ws.playback_stats()["playback"][name]
+    if ws.display:
+        stats["actual_fps"] = (ws.display.frame_count - start_count) / elapsed
+    return stats
+
+
+def bench_gif(ws, seconds: float) -> dict:
+    """Sustained playback FPS and jitter of the GIF player, idle and under web load."""
+
+    results = {}
+    cases = {
+        "small": ((32, 32), 20, 20, False),
+        "large": ((ws.panel_width, ws.panel_height), 60, 20, False),
+        "large_loaded": ((ws.panel_width, ws.panel_height), 60, 20, True),
+    }
+    for name, (size, frames, duration, load) in cases.items():
+        path = write_gif(pathlib.Path(ws.GIF_FOLDER) / f"bench_{name}.gif", size, frames, duration)
+        if ws.gif_cache is not None:
+            ws.gif_cache.clear()
+        stats = play_for(ws, f"bench_{name}.gif", path, seconds, load)
+        if not load:
+            fps = round(stats["actual_fps"], 2)
+            results[f"gif_{name}_fps"] = {"value": fps, "target": 1000 / duration, "unit": "fps", "better": HIGHER}
+        results[f"gif_{name}_jitter_ms"] = {"value": stats["jitter_ms"], "unit": "ms", "better": LOWER}
+    return results
+
+
+def bench_update_latency(ws, iterations: int) -> dict:
+    """Time from ``POST /dart/update`` until the next frame is shown."""
+
+    client = ws.app.test_client()
+    client.post("/dart/start", json={"players": [{"name": "A", "score": 501}, {"name": "B", "score": 501}]})
+    threading.Thread(target=ws.display_loop, daemon=True).start()
+    time.sleep(0.05)
+
+    samples = []
+    for i in range(iterations):
+        before = ws.display.frame_count
+        started = time.perf_counter()
+        client.post("/dart/update", json={"players": [{"name": "A", "score": 501 - i}, {"name": "B", "score": 501}]})
+        while ws.display.frame_count == before:
+            if time.perf_counter() - started > 2:
+                break
+            time.sleep(0.0001)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"dart_update_latency_ms": summarize(samples, "ms")}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return descriptions of metrics that regressed beyond ``threshold``."""
+
+    regressions = []
+    for name, metric in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("value"):
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        if metric.get("better", LOWER) == HIGHER:
+            change = -change
+        if change > threshold:
+            regressions.append(f"{name}: {old['value']} -> {metric['value']} {metric['unit']} ({change:+.0%})")
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run matrix performance benchmarks.")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--font-dir", default=os.getenv("FONT_DIR"), help="directory with 5x8.bdf and 9x18B.bdf")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--gif-seconds", type=float, default=2.0)
+    parser.add_argument("--render-process", action="store_true", help="render in a separate process (GIF metrics only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_environment(pathlib.Path(tmp), args.font_dir)
+        os.environ["RENDER_PROCESS"] = "1" if args.render_process else "0"
+        import webserver
+
+        results = {}
+        if webserver.render_client is not None:
+            webserver.render_client.start()
+            try:
+                results.update(bench_gif(webserver, args.gif_seconds))
+            finally:
+                webserver.render_client.stop()
+        else:
+            results.update(bench_draw(webserver, args.iterations))
+            results.update(bench_gif(webserver, args.gif_seconds))
+            results.update(bench_update_latency(webserver, min(args.iterations, 100)))
+
+    for name, metric in results.items():
+        print(f"{name:32s} {metric['value']:>10} {metric['unit']}")
+
+    report = {"revision": git_revision(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh).get("results", {})
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Routing of AutoDarts match state from several boards to their displays.
+
+One relay process serves every board of a venue over a single authenticated
+websocket.  Each board is configured with the matrix webserver (and
+optionally the IPC socket) it drives; :class:`BoardRouter` keeps one
+:class:`RoundForwarder` per board, remembers which match currently runs on
+which board and hands match-state updates to the right forwarder.
+
+Boards are configured as a list in the ``autodarts_boards`` setting (or the
+``AUTODARTS_BOARDS`` environment variable as JSON)::
+
+    [{"board_id": "...", "webserver_url": "http://10.0.0.21:5000"},
+     {"board_id": "...", "webserver_url": "http://localhost:5000",
+      "ipc_socket": "/tmp/autodarts_matrix_dart.sock"}]
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Deque, Dict, List, Optional
+
+from dart_ipc import DartStateSender
+from relay_pipeline import BOARDS_CHANNEL, MATCHES_CHANNEL
+from round_forwarder import RoundForwarder
+
+RATE_WINDOW = 60.0
+
+
+@dataclass
+class BoardRoute:
+    """One board and the display its match state is forwarded to."""
+
+    board_id: str
+    forwarder: RoundForwarder
+    name: str = ""
+    match_id: Optional[str] = None
+    updates: int = 0
+    latest_round: dict = field(default_factory=dict)
+    latest_state: Optional[dict] = None
+    _times: Deque[float] = field(default_factory=deque)
+
+    def record(self, now: float) -> None:
+        self.updates += 1
+        self._times.append(now)
+        while self._times and now - self._times[0] > RATE_WINDOW:
+            self._times.popleft()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "match_id": self.match_id,
+            "updates": self.updates,
+            "updates_per_min": len(self._times) * 60.0 / RATE_WINDOW,
+            "forwarder": self.forwarder.stats(),
+        }
+
+
+class BoardRouter:
+    """Map boards and their running matches to forwarders."""
+
+    def __init__(self, clock=time.monotonic) -> None:
+        self.routes: Dict[str, BoardRoute] = {}
+        self.unrouted = 0
+        self._matches: Dict[str, str] = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, boards: List[dict]) -> "BoardRouter":
+        """Build a router from ``autodarts_boards`` entries."""
+
+        router = cls()
+        for board in boards:
+            ipc_socket = board.get("ipc_socket")
+            forwarder = RoundForwarder(
+                f"{board['webserver_url'].rstrip('/')}/dart/update",
+                ipc_sender=DartStateSender(ipc_socket) if ipc_socket else None,
+            )
+            router.add(board["board_id"], forwarder, name=board.get("name", ""))
+        return router
+
+    def add(self, board_id: str, forwarder: RoundForwarder, name: str = "") -> BoardRoute:
+        route = BoardRoute(board_id, forwarder, name=name)
+        self.routes[board_id] = route
+        return route
+
+    def start(self) -> None:
+        for route in self.routes.values():
+            route.forwarder.start()
+
+    def stop(self) -> None:
+        for route in self.routes.values():
+            route.forwarder.stop()
+
+    def bind_match(self, board_id: str, match_id: str) -> Optional[str]:
+        """Route ``match_id`` to ``board_id``; return the board's previous match."""
+
+        with self._lock:
+            route = self.routes.get(board_id)
+            if route is None:
+                return None
+            previous = route.match_id
+            if previous is not None:
+                self._matches.pop(previous, None)
+            route.match_id = match_id
+            self._matches[match_id] = board_id
+            return previous if previous != match_id else None
+
+    def route_for(self, match_id: Optional[str]) -> Optional[BoardRoute]:
+        """Return the route of ``match_id``; a single board takes every match."""
+
+        with self._lock:
+            board_id = self._matches.get(match_id)
+            if board_id is None and len(self.routes) == 1:
+                return next(iter(self.routes.values()))
+            return self.routes.get(board_id)
+
+    def dispatch(self, match_id: Optional[str], turn: Optional[dict], state: Optional[dict]) -> Optional[BoardRoute]:
+        """Forward a match update to its board's display."""
+
+        route = self.route_for(match_id)
+        if route is None:
+            self.unrouted += 1
+            return None
+        route.record(self._clock())
+        if turn is not None:
+            route.latest_round = turn
+        if state is not None:
+            route.latest_state = state
+            route.forwarder.submit(state)
+        return route
+
+    def resync(self) -> None:
+        """Re-send the last known state of every board in full."""
+
+        for route in self.routes.values():
+            route.forwarder.resync()
+            if route.latest_state is not None:
+                route.forwarder.submit(route.latest_state)
+
+    def subscriptions(self) -> List[dict]:
+        """Subscribe messages for every board and every active match."""
+
+        messages = [
+            {"channel": BOARDS_CHANNEL, "type": "subscribe", "topic": f"{board_id}.matches"}
+            for board_id in self.routes
+        ]
+        with self._lock:
+            matches = list(self._matches)
+        messages += [
+            {"channel": MATCHES_CHANNEL, "type": "subscribe", "topic": f"{match_id}.state"}
+            for match_id in matches
+        ]
+        return messages
+
+    def stats(self) -> dict:
+        """Per-board throughput and forwarding lag suitable for JSON output."""
+
+        result = {board_id: route.stats() for board_id, route in self.routes.items()}
+        return {"boards": result, "unrouted": self.unrouted}
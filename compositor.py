@@ -0,0 +1,172 @@
+"""NumPy framebuffer compositor for text screens on the matrix.
+
+Drawing the scoreboard with ``graphics.DrawText`` rasterises every glyph on
+every frame.  :class:`Compositor` keeps a panel-sized RGB framebuffer instead:
+text runs are rendered once into sprites (cached per font, text and colour)
+and only the rows whose runs changed since the previous frame are cleared and
+blitted again.  The finished frame is pushed with a single ``SetImage``.
+
+Glyph placement mirrors ``rpi-rgb-led-matrix``: ``y`` is the baseline, a glyph
+starts at ``x + x_offset`` and its top row is ``y - height - y_offset``.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from font_metrics import BdfFont
+
+Color = Tuple[int, int, int]
+
+
+@dataclass
+class Sprite:
+    """Rasterised text run; row 0 is ``top`` pixels below the baseline."""
+
+    mask: np.ndarray
+    rgb: np.ndarray
+    top: int
+
+    @property
+    def width(self) -> int:
+        return self.mask.shape[1]
+
+
+def render_sprite(font: BdfFont, text: str, color: Color) -> Sprite:
+    """Rasterise ``text`` the way ``graphics.DrawText`` would draw it."""
+
+    width = max(font.text_width(text), 1)
+    ascent = font.baseline
+    mask = np.zeros((font.height, width), dtype=bool)
+    x = 0
+    for char in text:
+        advance = font.char_width(char)
+        glyph = font.glyph(char)
+        if glyph is not None:
+            top = ascent - glyph.height - glyph.y_offset
+            for row_index, bits in enumerate(glyph.rows):
+                y = top + row_index
+                if not 0 <= y < font.height:
+                    continue
+                # Nur innerhalb der Advance-Breite zeichnen (wie die Matrix-Lib)
+                for col in range(min(glyph.width, advance)):
+                    if bits & (1 << (glyph.width - 1 - col)):
+                        px = x + glyph.x_offset + col
+                        if 0 <= px < width:
+                            mask[y, px] = True
+        x += advance
+    rgb = np.zeros(mask.shape + (3,), dtype=np.uint8)
+    rgb[mask] = color
+    return Sprite(mask=mask, rgb=rgb, top=-ascent)
+
+
+class SpriteCache:
+    """LRU cache of text sprites keyed by ``(font, text, colour)``."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Sprite]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, font: BdfFont, text: str, color: Color) -> Sprite:
+        key = (id(font), text, tuple(color))
+        with self._lock:
+            sprite = self._entries.get(key)
+            if sprite is not None:
+                self._entries.move_to_end(key)
+                return sprite
+        sprite = render_sprite(font, text, color)
+        with self._lock:
+            self._entries[key] = sprite
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return sprite
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class Run:
+    """One positioned text run for :meth:`Compositor.compose`."""
+
+    font: BdfFont
+    x: int
+    y: int
+    color: Color
+    text: str
+
+
+class Compositor:
+    """Panel-sized framebuffer with row-level dirty tracking."""
+
+    def __init__(self, width: int, height: int, sprites: SpriteCache = None) -> None:
+        self.width = width
+        self.height = height
+        self.sprites = sprites or SpriteCache()
+        self.framebuffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self._rows: Dict[int, Tuple[Run, ...]] = {}
+        self.rows_redrawn = 0
+
+    def compose(self, runs: Iterable[Run]) -> bool:
+        """Update the framebuffer to show ``runs``; return ``True`` if it changed."""
+
+        rows: Dict[int, List[Run]] = {}
+        for run in runs:
+            rows.setdefault(run.y, []).append(run)
+        new_rows = {y: tuple(r) for y, r in rows.items()}
+
+        dirty = [y for y in set(self._rows) | set(new_rows) if self._rows.get(y) != new_rows.get(y)]
+        if not dirty:
+            return False
+
+        cleared = []
+        for y in dirty:
+            for run in self._rows.get(y, ()) + new_rows.get(y, ()):
+                cleared.append(self._band(run))
+        for top, bottom in cleared:
+            self.framebuffer[max(top, 0):max(bottom, 0)] = 0
+
+        # Zeilen, deren Band einen geleerten Bereich schneidet, neu zeichnen
+        for y, row_runs in new_rows.items():
+            if y in dirty or any(self._overlaps(self._band(run), cleared) for run in row_runs):
+                for run in row_runs:
+                    self._blit(run)
+                self.rows_redrawn += 1
+        self._rows = new_rows
+        return True
+
+    def reset(self) -> None:
+        """Forget the previous frame so the next :meth:`compose` redraws everything."""
+
+        self.framebuffer[:] = 0
+        self._rows = {}
+
+    def image(self) -> Image.Image:
+        """Return the framebuffer as an ``RGB`` image for ``SetImage``."""
+
+        return Image.fromarray(self.framebuffer, "RGB")
+
+    @staticmethod
+    def _band(run: Run) -> Tuple[int, int]:
+        top = run.y - run.font.baseline
+        return top, top + run.font.height
+
+    @staticmethod
+    def _overlaps(band: Tuple[int, int], others: List[Tuple[int, int]]) -> bool:
+        return any(band[0] < bottom and top < band[1] for top, bottom in others)
+
+    def _blit(self, run: Run) -> None:
+        sprite = self.sprites.get(run.font, run.text, run.color)
+        top = run.y + sprite.top
+        y0, y1 = max(top, 0), min(top + sprite.mask.shape[0], self.height)
+        x0, x1 = max(run.x, 0), min(run.x + sprite.width, self.width)
+        if y0 >= y1 or x0 >= x1:
+            return
+        mask = sprite.mask[y0 - top:y1 - top, x0 - run.x:x1 - run.x]
+        target = self.framebuffer[y0:y1, x0:x1]
+        target[mask] = sprite.rgb[y0 - top:y1 - top, x0 - run.x:x1 - run.x][mask]
@@ -0,0 +1,146 @@
+"""Versioned delta updates for the dart state.
+
+``dart_state`` carries a ``version`` that increases with every accepted
+change.  Updates may send per-player ``patches`` instead of the whole player
+list, together with the ``base_version`` they were computed against.  A field
+that changed after ``base_version`` is not overwritten by such a patch, and a
+full player list based on an outdated version is rejected, so a delayed
+message can no longer undo a newer score.
+
+:func:`diff_players` is the sender side: it turns two player lists into the
+minimal set of patches.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PATCH_FIELDS = ("name", "score", "sets", "legs")
+
+
+class StaleUpdate(Exception):
+    """Raised when a full update is based on an outdated version."""
+
+    def __init__(self, version: int) -> None:
+        super().__init__(f"stale update, current version is {version}")
+        self.version = version
+
+
+class DeltaTracker:
+    """Remembers the version at which each field last changed."""
+
+    def __init__(self) -> None:
+        self.field_versions: Dict[Tuple, int] = {}
+        self.players_version = 0
+
+    def changed_since(self, key: Tuple, base_version: Optional[int]) -> bool:
+        if base_version is None:
+            return False
+        return max(self.field_versions.get(key, 0), self.players_version) > base_version
+
+    def apply(self, state: dict, data: dict) -> List[str]:
+        """Apply ``data`` to ``state`` and return the rejected field names.
+
+        ``state["version"]`` is increased once if anything changed.  Raises
+        :class:`StaleUpdate` for a full player list with an outdated
+        ``base_version``.
+        """
+
+        base = data.get("base_version")
+        base = int(base) if base is not None else None
+        version = state.get("version", 0)
+        new_version = version + 1
+        changed = False
+        rejected = []
+
+        players = data.get("players")
+        if isinstance(players, list) and players:
+            if base is not None and base < version:
+                raise StaleUpdate(version)
+            if players != state.get("players"):
+                state["players"] = players
+                self.players_version = new_version
+                self.field_versions.clear()
+                changed = True
+            state["current"] = min(state.get("current", 0), len(players) - 1)
+
+        patched = [dict(p) for p in state.get("players", [])]
+        patched_any = False
+        for patch in data.get("patches") or []:
+            index = _patch_index(patched, patch)
+            if index is None:
+                rejected.append(f"{patch.get('id', patch.get('index'))}")
+                continue
+            player = patched[index]
+            for field in PATCH_FIELDS:
+                if field not in patch or player.get(field) == patch[field]:
+                    continue
+                if self.changed_since((index, field), base):
+                    rejected.append(f"{index}.{field}")
+                    continue
+                player[field] = patch[field]
+                self.field_versions[(index, field)] = new_version
+                patched_any = True
+        if patched_any:
+            # Neue Liste statt In-Place-Änderung: der Renderer hält evtl. noch die alte
+            state["players"] = patched
+            changed = True
+
+        if "current" in data and state.get("players"):
+            current = max(0, min(int(data["current"]), len(state["players"]) - 1))
+            if current != state.get("current"):
+                if self.changed_since(("current",), base):
+                    rejected.append("current")
+                else:
+                    state["current"] = current
+                    self.field_versions[("current",)] = new_version
+                    changed = True
+        if "checkout" in data:
+            checkout = str(data.get("checkout") or "")
+            if checkout != state.get("checkout"):
+                if self.changed_since(("checkout",), base):
+                    rejected.append("checkout")
+                else:
+                    state["checkout"] = checkout
+                    self.field_versions[("checkout",)] = new_version
+                    changed = True
+
+        if changed:
+            state["version"] = new_version
+        return rejected
+
+    def reset(self, state: dict) -> None:
+        """Bump the version after ``state`` was replaced wholesale (``/dart/start``)."""
+
+        state["version"] = state.get("version", 0) + 1
+        self.players_version = state["version"]
+        self.field_versions.clear()
+
+
+def _patch_index(players: List[dict], patch: dict) -> Optional[int]:
+    if "id" in patch:
+        for index, player in enumerate(players):
+            if player.get("id") == patch["id"]:
+                return index
+        return None
+    index = patch.get("index")
+    if isinstance(index, int) and 0 <= index < len(players):
+        return index
+    return None
+
+
+def diff_players(previous: Iterable[dict], current: Iterable[dict]) -> Optional[List[dict]]:
+    """Return patches turning ``previous`` into ``current``.
+
+    Returns ``None`` if the lists differ in length, in which case the full
+    list has to be sent.
+    """
+
+    previous, current = list(previous), list(current)
+    if len(previous) != len(current):
+        return None
+    patches = []
+    for index, (old, new) in enumerate(zip(previous, current)):
+        changes = {f: new[f] for f in PATCH_FIELDS if f in new and old.get(f) != new[f]}
+        if changes:
+            changes["index"] = index
+            patches.append(changes)
+    return patches
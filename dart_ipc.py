@@ -0,0 +1,124 @@
+"""Local IPC channel carrying dart-state updates from the relay to the webserver.
+
+Both processes run on the same Pi, so instead of an HTTP round trip through
+Werkzeug each update can be sent as one Unix domain datagram.  A message is a
+small binary header (magic, format version, sequence number) followed by the
+compact JSON payload that ``/dart/update`` accepts.  The HTTP endpoint stays
+available for manual use.
+
+The socket path is configured with the ``DART_IPC_SOCKET`` environment
+variable (or the ``dart_ipc_socket`` setting of the webserver).
+"""
+
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV = "DART_IPC_SOCKET"
+MAGIC = b"ADST"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBI")  # magic, format version, sequence number
+MAX_MESSAGE = 64 * 1024
+
+
+def encode(payload: dict, seq: int) -> bytes:
+    """Return the datagram for ``payload`` with sequence number ``seq``."""
+
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(MAGIC, FORMAT_VERSION, seq & 0xFFFFFFFF) + body
+
+
+def decode(message: bytes):
+    """Return ``(seq, payload)`` or raise ``ValueError`` for foreign data."""
+
+    if len(message) < HEADER.size:
+        raise ValueError("message too short")
+    magic, version, seq = HEADER.unpack_from(message)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"unsupported message {magic!r} v{version}")
+    return seq, json.loads(message[HEADER.size:].decode("utf-8"))
+
+
+class DartStateSender:
+    """Send dart-state payloads to the webserver's socket."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.seq = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._lock = threading.Lock()
+
+    def send(self, payload: dict) -> None:
+        """Send ``payload``; raises ``OSError`` if nobody is listening."""
+
+        with self._lock:
+            self.seq += 1
+            self._sock.sendto(encode(payload, self.seq), self.path)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class DartStateReceiver:
+    """Receive dart-state datagrams and pass payloads to ``handler``."""
+
+    def __init__(self, path: str, handler: Callable[[dict], None]) -> None:
+        self.path = path
+        self.handler = handler
+        self.received = 0
+        self.rejected = 0
+        self._sock: Optional[socket.socket] = None
+        self._thread = None
+
+    def start(self) -> threading.Thread:
+        """Bind the socket and start the receiving thread."""
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._thread = threading.Thread(target=self._loop, name="dart-ipc", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Close the socket and remove its file."""
+
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)  # weckt den blockierenden recv()
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        if self._thread:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        sock = self._sock
+        while True:
+            try:
+                message = sock.recv(MAX_MESSAGE)
+            except OSError:
+                return
+            if not message:
+                return
+            try:
+                _seq, payload = decode(message)
+            except ValueError as exc:
+                self.rejected += 1
+                logger.warning("Ignoring IPC message: %s", exc)
+                continue
+            self.received += 1
+            try:
+                self.handler(payload)
+            except Exception:
+                logger.exception("Handling IPC dart update failed")
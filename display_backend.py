@@ -0,0 +1,209 @@
+"""Display backends for the LED matrix.
+
+``webserver.py`` talks to the panel only through :class:`DisplayBackend`:
+creating a frame canvas, ``SetImage``, ``DrawText``, ``SwapOnVSync`` and
+``Clear``.  :class:`RGBMatrixBackend` wraps ``rgbmatrix`` on the Pi.
+:class:`VirtualMatrixBackend` renders into NumPy arrays and records every
+shown frame with a timestamp, so rendering and playback can be tested and
+benchmarked on any Linux box.
+
+The backend is chosen with the ``MATRIX_BACKEND`` environment variable or the
+``display_backend`` setting (``rgbmatrix`` or ``virtual``).
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+import os
+import threading
+import time
+from typing import Deque, Tuple
+
+import numpy as np
+from PIL import Image
+
+from compositor import SpriteCache
+from font_metrics import BdfFont
+
+BACKEND_ENV = "MATRIX_BACKEND"
+DEFAULT_BACKEND = "rgbmatrix"
+
+
+class DisplayBackend(ABC):
+    """Minimal matrix API used by the web server."""
+
+    width: int
+    height: int
+
+    @abstractmethod
+    def create_frame_canvas(self):
+        """Return an off-screen canvas for double buffering."""
+
+    @abstractmethod
+    def load_font(self, path: str):
+        """Load the BDF font at ``path`` for :meth:`draw_text`."""
+
+    @abstractmethod
+    def color(self, red: int, green: int, blue: int):
+        """Return a colour object for :meth:`draw_text`."""
+
+    @abstractmethod
+    def draw_text(self, canvas, font, x: int, y: int, color, text: str) -> int:
+        """Draw ``text`` with its baseline at ``y``; return the advance."""
+
+    @abstractmethod
+    def set_image(self, image: Image.Image, x: int = 0, y: int = 0, canvas=None) -> None:
+        """Copy ``image`` to ``canvas``, or straight to the panel if ``None``."""
+
+    @abstractmethod
+    def swap_on_vsync(self, canvas):
+        """Show ``canvas`` and return the canvas to draw the next frame on."""
+
+    @abstractmethod
+    def clear(self, canvas=None) -> None:
+        """Blank ``canvas``, or the panel if ``None``."""
+
+
+class RGBMatrixBackend(DisplayBackend):
+    """Backend driving a real panel through ``rpi-rgb-led-matrix``."""
+
+    def __init__(self, settings: dict) -> None:
+        from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
+
+        self._graphics = graphics
+        options = RGBMatrixOptions()
+        options.rows = settings.get("rows", 64)
+        options.cols = settings.get("cols", 64)
+        options.chain_length = settings.get("chain_length", 3)
+        options.hardware_mapping = settings.get("hardware_mapping", 'regular')
+        options.gpio_slowdown = settings.get("gpio_slowdown", 4)
+        options.brightness = 100
+        #options.pwm_lsb_nanoseconds = 130
+        #options.pwm_dither_bits = 1
+        options.limit_refresh_rate_hz = 60
+        self.width, self.height = panel_size(settings)
+        self.matrix = RGBMatrix(options=options)
+
+    def create_frame_canvas(self):
+        return self.matrix.CreateFrameCanvas()
+
+    def load_font(self, path: str):
+        font = self._graphics.Font()
+        font.LoadFont(path)
+        return font
+
+    def color(self, red: int, green: int, blue: int):
+        return self._graphics.Color(red, green, blue)
+
+    def draw_text(self, canvas, font, x: int, y: int, color, text: str) -> int:
+        return self._graphics.DrawText(canvas, font, x, y, color, text)
+
+    def set_image(self, image: Image.Image, x: int = 0, y: int = 0, canvas=None) -> None:
+        (canvas or self.matrix).SetImage(image, x, y)
+
+    def swap_on_vsync(self, canvas):
+        return self.matrix.SwapOnVSync(canvas)
+
+    def clear(self, canvas=None) -> None:
+        (canvas or self.matrix).Clear()
+
+
+class VirtualCanvas:
+    """In-memory canvas holding an ``(height, width, 3)`` pixel array."""
+
+    def __init__(self, width: int, height: int) -> None:
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+
+
+class VirtualMatrixBackend(DisplayBackend):
+    """Headless backend recording shown frames as ``(timestamp, pixels)``.
+
+    At most ``max_frames`` frames are kept; ``frame_count`` counts all of them.
+    """
+
+    def __init__(self, settings: dict, max_frames: int = 256) -> None:
+        self.width, self.height = panel_size(settings)
+        self.frames: Deque[Tuple[float, np.ndarray]] = deque(maxlen=max_frames)
+        self.frame_count = 0
+        self._front = VirtualCanvas(self.width, self.height)
+        self._sprites = SpriteCache()
+        self._lock = threading.Lock()
+
+    def _record(self) -> None:
+        with self._lock:
+            self.frames.append((time.monotonic(), self._front.pixels.copy()))
+            self.frame_count += 1
+
+    @property
+    def last_frame(self) -> np.ndarray:
+        """Pixels currently shown on the virtual panel."""
+
+        return self._front.pixels
+
+    def create_frame_canvas(self) -> VirtualCanvas:
+        return VirtualCanvas(self.width, self.height)
+
+    def load_font(self, path: str) -> BdfFont:
+        return BdfFont.load(path)
+
+    def color(self, red: int, green: int, blue: int) -> Tuple[int, int, int]:
+        return (red, green, blue)
+
+    def draw_text(self, canvas: VirtualCanvas, font: BdfFont, x: int, y: int, color, text: str) -> int:
+        sprite = self._sprites.get(font, text, tuple(color))
+        _paste(canvas.pixels, sprite.rgb, x, y + sprite.top, sprite.mask)
+        return font.text_width(text)
+
+    def set_image(self, image: Image.Image, x: int = 0, y: int = 0, canvas=None) -> None:
+        target = canvas or self._front
+        _paste(target.pixels, np.asarray(image.convert("RGB")), x, y)
+        if canvas is None:
+            self._record()
+
+    def swap_on_vsync(self, canvas: VirtualCanvas) -> VirtualCanvas:
+        previous, self._front = self._front, canvas
+        self._record()
+        return previous
+
+    def clear(self, canvas=None) -> None:
+        (canvas or self._front).pixels[:] = 0
+        if canvas is None:
+            self._record()
+
+
+def _paste(target: np.ndarray, source: np.ndarray, x: int, y: int, mask: np.ndarray = None) -> None:
+    """Copy ``source`` into ``target`` at ``(x, y)`` with clipping."""
+
+    height, width = target.shape[:2]
+    y0, y1 = max(y, 0), min(y + source.shape[0], height)
+    x0, x1 = max(x, 0), min(x + source.shape[1], width)
+    if y0 >= y1 or x0 >= x1:
+        return
+    src = source[y0 - y:y1 - y, x0 - x:x1 - x]
+    if mask is None:
+        target[y0:y1, x0:x1] = src
+    else:
+        m = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+        target[y0:y1, x0:x1][m] = src[m]
+
+
+BACKENDS = {
+    "rgbmatrix": RGBMatrixBackend,
+    "virtual": VirtualMatrixBackend,
+}
+
+
+def panel_size(settings: dict) -> Tuple[int, int]:
+    """Panel ``(width, height)`` in pixels without opening the display."""
+
+    return settings.get("cols", 64) * settings.get("chain_length", 3), settings.get("rows", 64)
+
+
+def create_backend(settings: dict) -> DisplayBackend:
+    """Instantiate the backend selected by env var or settings."""
+
+    name = os.getenv(BACKEND_ENV) or settings.get("display_backend") or DEFAULT_BACKEND
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise RuntimeError(f"Unknown display backend: {name}") from None
+    return backend_cls(settings)
@@ -0,0 +1,40 @@
+"""Change notification for the matrix render loop.
+
+The render loop used to redraw once per second whether or not anything had
+changed.  :class:`ChangeSignal` lets producers (dart endpoints, WLAN monitor,
+GIF player) bump a version counter; the loop sleeps until the version moves
+or its own clock tick is due.
+"""
+
+import threading
+from typing import Optional
+
+
+class ChangeSignal:
+    """Monotonic version counter with blocking wait."""
+
+    def __init__(self) -> None:
+        self._version = 0
+        self._cond = threading.Condition()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def notify(self) -> int:
+        """Record a change and wake all waiters; return the new version."""
+
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+            return self._version
+
+    def wait(self, seen: int, timeout: Optional[float] = None) -> int:
+        """Block until the version differs from ``seen`` or ``timeout`` passes.
+
+        Returns the current version, which equals ``seen`` on timeout.
+        """
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != seen, timeout)
+            return self._version
@@ -0,0 +1,100 @@
+"""Glyph metrics and bitmaps for the BDF fonts used on the matrix.
+
+``graphics.DrawText`` returns the width of the drawn string, and the display
+code used to draw off-screen just to measure text.  :class:`BdfFont` parses a
+BDF file once and answers advance/width queries from a dictionary, using the
+same rules as ``rpi-rgb-led-matrix``: the advance is the glyph's ``DWIDTH``,
+unknown characters fall back to U+FFFD and count as zero if that is missing.
+
+The glyph bitmaps are kept as well so text can be rasterised without the
+matrix library (see :mod:`compositor`).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+REPLACEMENT_CODEPOINT = 0xFFFD
+
+
+@dataclass
+class Glyph:
+    """Bitmap of one character; ``rows`` are MSB-first bit masks."""
+
+    width: int
+    height: int
+    x_offset: int
+    y_offset: int
+    rows: List[int]
+
+
+class BdfFont:
+    """Advance widths and glyph bitmaps of a BDF font."""
+
+    def __init__(
+        self,
+        advances: Dict[int, int],
+        height: int,
+        baseline: int,
+        glyphs: Optional[Dict[int, Glyph]] = None,
+        name: str = "",
+    ) -> None:
+        self.advances = advances
+        self.height = height
+        self.baseline = baseline
+        self.glyphs = glyphs or {}
+        self.name = name
+        self._fallback = advances.get(REPLACEMENT_CODEPOINT, 0)
+
+    @classmethod
+    def load(cls, path: str) -> "BdfFont":
+        """Parse the BDF file at ``path``."""
+
+        advances = {}
+        glyphs = {}
+        height = baseline = 0
+        codepoint = None
+        glyph = None
+        bitmap = None
+        with open(path, "r", encoding="latin-1") as fh:
+            for line in fh:
+                parts = line.split()
+                if not parts:
+                    continue
+                keyword = parts[0]
+                if bitmap is not None and keyword != "ENDCHAR":
+                    # Hex-Zeile linksbündig auf die Glyphbreite bringen
+                    bits = len(keyword) * 4
+                    bitmap.append(int(keyword, 16) >> max(0, bits - glyph.width) if glyph.width else 0)
+                elif keyword == "FONTBOUNDINGBOX":
+                    height = int(parts[2])
+                    baseline = height + int(parts[4])
+                elif keyword == "ENCODING":
+                    codepoint = int(parts[1])
+                elif keyword == "DWIDTH" and codepoint is not None and codepoint >= 0:
+                    advances[codepoint] = int(parts[1])
+                elif keyword == "BBX" and codepoint is not None and codepoint >= 0:
+                    glyph = Glyph(int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]), [])
+                elif keyword == "BITMAP" and glyph is not None:
+                    bitmap = glyph.rows
+                elif keyword == "ENDCHAR":
+                    if glyph is not None:
+                        glyphs[codepoint] = glyph
+                    codepoint = glyph = bitmap = None
+        return cls(advances, height, baseline, glyphs, name=path)
+
+    def glyph(self, char: str) -> Optional[Glyph]:
+        """Return the glyph drawn for ``char`` (with U+FFFD fallback)."""
+
+        return self.glyphs.get(ord(char)) or self.glyphs.get(REPLACEMENT_CODEPOINT)
+
+    def char_width(self, char: str) -> int:
+        """Return the advance of ``char`` in pixels."""
+
+        return self.advances.get(ord(char), self._fallback)
+
+    def text_width(self, text: str) -> int:
+        """Return the width ``graphics.DrawText`` reports for ``text``."""
+
+        advances = self.advances
+        fallback = self._fallback
+        return sum(advances.get(ord(c), fallback) for c in text)
@@ -0,0 +1,141 @@
+"""Decoded GIF frame cache used by the matrix GIF player.
+
+Decoding a GIF with Pillow (``seek`` + ``convert('RGB')`` for every frame) is
+expensive on a Raspberry Pi.  :class:`GifFrameCache` decodes each file once into
+ready-to-push RGB frames plus their durations and keeps the result in memory
+until the configured byte budget is exhausted, evicting the least recently
+used GIFs first.
+
+If an up-to-date frame pack (see :mod:`gif_pack`) exists next to the GIF, the
+frames are served from its memory mapping instead of being decoded.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+import threading
+from typing import List, Sequence, Tuple
+
+from PIL import Image
+
+import gif_pack
+
+DEFAULT_DURATION_MS = 100
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class GifFrames:
+    """Decoded frames of a single GIF."""
+
+    path: str
+    frames: Sequence[Image.Image]
+    durations: List[int]
+    nbytes: int
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(zip(self.frames, self.durations))
+
+
+def decode_gif(path: str) -> GifFrames:
+    """Decode all frames of ``path`` into RGB images and durations (ms)."""
+
+    frames = []
+    durations = []
+    nbytes = 0
+    with Image.open(path) as gif:
+        for index in range(getattr(gif, "n_frames", 1)):
+            gif.seek(index)
+            frame = gif.convert("RGB")
+            frames.append(frame)
+            durations.append(int(gif.info.get("duration", DEFAULT_DURATION_MS) or DEFAULT_DURATION_MS))
+            nbytes += frame.width * frame.height * 3
+    return GifFrames(path=path, frames=frames, durations=durations, nbytes=nbytes)
+
+
+def load_frames(path: str) -> GifFrames:
+    """Return frames for ``path`` from its frame pack, or decode the GIF."""
+
+    if gif_pack.is_pack_fresh(path):
+        try:
+            pack = gif_pack.FramePack(gif_pack.pack_path_for(path))
+            return GifFrames(path=path, frames=pack, durations=pack.durations, nbytes=pack.nbytes)
+        except (OSError, ValueError):
+            pass
+    return decode_gif(path)
+
+
+class GifFrameCache:
+    """LRU cache of decoded GIFs keyed by path and modification time.
+
+    ``budget_bytes`` limits the memory used by cached frames.  A GIF that is
+    larger than the whole budget is still returned but not cached.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> None:
+        """Create an empty cache limited to ``budget_bytes``."""
+
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, float, bool], GifFrames]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> GifFrames:
+        """Return decoded frames for ``path``, decoding on a cache miss."""
+
+        key = (path, os.path.getmtime(path), gif_pack.is_pack_fresh(path))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = load_frames(path)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: Tuple[str, float, bool], entry: GifFrames) -> None:
+        with self._lock:
+            # Alte Versionen derselben Datei verwerfen
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self.used_bytes -= self._entries.pop(stale).nbytes
+            if key in self._entries or entry.nbytes > self.budget_bytes:
+                return
+            self._entries[key] = entry
+            self.used_bytes += entry.nbytes
+            while self.used_bytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+
+    def discard(self, path: str) -> None:
+        """Drop all cached versions of ``path``."""
+
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self.used_bytes -= self._entries.pop(key).nbytes
+
+    def clear(self) -> None:
+        """Remove every cached GIF."""
+
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def stats(self) -> dict:
+        """Return cache counters suitable for JSON output."""
+
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_bytes": self.used_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,190 @@
+"""Metadata index of the GIF library.
+
+The GIF pages and the PG autoplay used to ``os.listdir`` the folder and
+``os.path.getmtime`` every file on each request, and knew nothing about a GIF
+without opening it.  :class:`GifIndex` keeps one entry per GIF (name, folder,
+mtime, size, dimensions, frame count, total duration, content hash) in a JSON
+sidecar ``.gif_index.json`` inside the GIF folder.  Uploads and deletes update
+it incrementally; :meth:`GifIndex.sync` reconciles it with files copied in by
+other means and only probes files that are new or changed;
+:meth:`GifIndex.refresh` does so only when a folder's mtime moved.
+"""
+
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+INDEX_NAME = ".gif_index.json"
+INDEX_VERSION = 1
+
+
+@dataclass
+class GifEntry:
+    """Metadata of one GIF; ``name`` is relative to the GIF folder."""
+
+    name: str
+    folder: str
+    mtime: float
+    size: int
+    width: int
+    height: int
+    frames: int
+    duration_ms: int
+    hash: str
+
+
+def probe(root: str, name: str) -> GifEntry:
+    """Read the metadata of ``root/name`` (frames are seeked, not converted)."""
+
+    path = os.path.join(root, name)
+    st = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+    with Image.open(path) as img:
+        width, height = img.size
+        frames = getattr(img, "n_frames", 1)
+        duration = 0
+        for index in range(frames):
+            img.seek(index)
+            duration += int(img.info.get("duration", 100))
+    folder = os.path.dirname(name).replace(os.sep, "/")
+    return GifEntry(name.replace(os.sep, "/"), folder, st.st_mtime, st.st_size, width, height, frames, duration, digest.hexdigest())
+
+
+class GifIndex:
+    """Persistent, incrementally updated index of ``root`` and its subfolders."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.path = os.path.join(root, INDEX_NAME)
+        self._entries: Dict[str, GifEntry] = {}
+        self._lock = threading.RLock()
+        self._dir_mtimes: Dict[str, Optional[int]] = {}  # Ordner-mtime beim letzten sync
+
+    def load(self) -> None:
+        """Read the sidecar file; a missing or unreadable file gives an empty index."""
+
+        try:
+            with open(self.path, "r") as fh:
+                data = json.load(fh)
+            if data.get("version") != INDEX_VERSION:
+                return
+            entries = {item["name"]: GifEntry(**item) for item in data.get("entries", [])}
+        except (OSError, ValueError, TypeError, KeyError):
+            return
+        with self._lock:
+            self._entries = entries
+
+    def save(self) -> None:
+        """Write the sidecar file atomically."""
+
+        with self._lock:
+            data = {"version": INDEX_VERSION, "entries": [asdict(e) for e in self._entries.values()]}
+        fd, tmp = tempfile.mkstemp(prefix=".gif_index-", suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(data, fh)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def add(self, name: str, save: bool = True) -> Optional[GifEntry]:
+        """Index (or re-index) ``name``; returns ``None`` for unreadable files."""
+
+        try:
+            entry = probe(self.root, name)
+        except (OSError, ValueError):
+            with self._lock:
+                self._entries.pop(name, None)
+            return None
+        with self._lock:
+            self._entries[entry.name] = entry
+        if save:
+            self.save()
+        return entry
+
+    def put(self, entry: GifEntry, save: bool = True) -> None:
+        """Insert an entry probed elsewhere (e.g. in an upload worker)."""
+
+        with self._lock:
+            self._entries[entry.name] = entry
+        if save:
+            self.save()
+
+    def remove(self, name: str, save: bool = True) -> None:
+        with self._lock:
+            self._entries.pop(name.replace(os.sep, "/"), None)
+        if save:
+            self.save()
+
+    def get(self, name: str) -> Optional[GifEntry]:
+        with self._lock:
+            return self._entries.get(name)
+
+    def entries(self, folder: str = "") -> List[GifEntry]:
+        """Entries directly in ``folder`` (``""`` = top level), newest first."""
+
+        with self._lock:
+            items = [e for e in self._entries.values() if e.folder == folder]
+        items.sort(key=lambda e: e.mtime, reverse=True)
+        return items
+
+    def names(self, folder: str = "") -> List[str]:
+        return [e.name for e in self.entries(folder)]
+
+    def sync(self, folders=("", "pg")) -> int:
+        """Reconcile the index with ``folders``; return the number of changes."""
+
+        changes = 0
+        for folder in folders:
+            directory = os.path.join(self.root, folder)
+            # Vor dem Scannen merken: Änderungen währenddessen fallen beim nächsten refresh auf
+            self._dir_mtimes[folder] = self._dir_mtime(folder)
+            found = {}
+            if os.path.isdir(directory):
+                with os.scandir(directory) as it:
+                    for item in it:
+                        if item.is_file() and item.name.lower().endswith(".gif"):
+                            name = f"{folder}/{item.name}" if folder else item.name
+                            st = item.stat()
+                            found[name] = (st.st_mtime, st.st_size)
+            with self._lock:
+                stale = [n for n, e in self._entries.items() if e.folder == folder and n not in found]
+                for name in stale:
+                    del self._entries[name]
+                known = dict(self._entries)
+            changes += len(stale)
+            for name, (mtime, size) in found.items():
+                entry = known.get(name)
+                if entry is None or entry.mtime != mtime or entry.size != size:
+                    self.add(name, save=False)
+                    changes += 1
+        if changes:
+            self.save()
+        return changes
+
+    def _dir_mtime(self, folder: str) -> Optional[int]:
+        try:
+            return os.stat(os.path.join(self.root, folder)).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self, folder: str) -> int:
+        """Sync ``folder`` only if files were added, removed or renamed since the last sync.
+
+        Costs a single ``stat`` while the directory is unchanged.
+        """
+
+        if folder in self._dir_mtimes and self._dir_mtimes[folder] == self._dir_mtime(folder):
+            return 0
+        return self.sync((folder,))
@@ -0,0 +1,237 @@
+"""Background processing of uploaded GIFs.
+
+Uploads used to be saved, transcoded and (not) validated inside the request
+thread, so a batch of large GIFs blocked the web UI and a broken file ended up
+in the playlist.  Now the request only streams each file to a temporary file
+(with a size cap, see :class:`CappedSpool`) and queues a job; a bounded
+process pool validates the image, moves it to a free name, writes the
+panel-sized frame pack (:mod:`gif_pack`) and probes the index metadata
+(:mod:`gif_index`).  :class:`UploadJobQueue` tracks the jobs for the status
+endpoint and applies finished results in the web process.
+"""
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import gif_index
+import gif_pack
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+MAX_FRAMES = 2000
+
+
+class CappedSpool(io.FileIO):
+    """Temporary upload file that aborts the request beyond ``cap`` bytes."""
+
+    def __init__(self, path: str, cap: int) -> None:
+        super().__init__(path, "w+b")
+        self.cap = cap
+        self.written = 0
+
+    def write(self, data) -> int:
+        self.written += len(data)
+        if self.written > self.cap:
+            raise RequestEntityTooLarge(f"Datei größer als {self.cap // (1024 * 1024)} MB")
+        return super().write(data)
+
+
+def validate(path: str) -> None:
+    """Raise ``ValueError`` unless ``path`` is a readable GIF."""
+
+    try:
+        with Image.open(path) as img:
+            if img.format != "GIF":
+                raise ValueError(f"kein GIF ({img.format})")
+            img.verify()
+        with Image.open(path) as img:
+            # verify() prüft nicht die Frames selbst: alle einmal dekodieren
+            frames = getattr(img, "n_frames", 1)
+            if frames > MAX_FRAMES:
+                raise ValueError(f"zu viele Frames ({frames})")
+            for index in range(frames):
+                img.seek(index)
+                img.load()
+    except (OSError, SyntaxError, EOFError) as exc:
+        raise ValueError(f"ungültiges GIF: {exc}") from None
+
+
+def claim_name(directory: str, filename: str) -> str:
+    """Create an empty placeholder for ``filename`` (or ``base_N.gif``) and return the name."""
+
+    base, ext = os.path.splitext(filename)
+    for counter in itertools.count():
+        name = filename if counter == 0 else f"{base}_{counter}{ext}"
+        try:
+            os.close(os.open(os.path.join(directory, name), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return name
+        except FileExistsError:
+            continue
+
+
+def process_upload(tmp_path: str, gif_root: str, filename: str, width: int, height: int) -> dict:
+    """Validate, store, transcode and probe one upload (runs in a worker process)."""
+
+    try:
+        validate(tmp_path)
+        name = claim_name(gif_root, filename)
+        path = os.path.join(gif_root, name)
+        os.replace(tmp_path, path)
+        os.chmod(path, 0o644)
+        try:
+            gif_pack.transcode(path, width, height)
+        except (OSError, ValueError):
+            os.remove(path)
+            raise
+        return {"name": name, "entry": gif_index.probe(gif_root, name)}
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@dataclass
+class UploadJob:
+    id: int
+    filename: str
+    state: str = QUEUED
+    name: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def as_dict(self) -> dict:
+        state = self.state
+        if state == QUEUED and self.future is not None and self.future.running():
+            state = PROCESSING
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "state": state,
+            "name": self.name,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+def default_executor(workers: int = 1) -> Executor:
+    # forkserver: kein fork() des mehrfädigen Webserver-Prozesses
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+
+
+class QueueFull(Exception):
+    """Raised when more than ``max_pending`` jobs are waiting."""
+
+
+class UploadJobQueue:
+    """Submit upload jobs to ``executor`` and keep their status.
+
+    ``on_done(result)`` is called in the web process for every successful job.
+    At most ``max_pending`` jobs may be unfinished; finished jobs are kept
+    until ``keep`` newer ones exist.
+    """
+
+    def __init__(
+        self,
+        executor_factory: Callable[[], Executor] = default_executor,
+        on_done: Callable[[dict], None] = None,
+        max_pending: int = 16,
+        keep: int = 50,
+    ) -> None:
+        self.executor_factory = executor_factory
+        self.on_done = on_done
+        self.max_pending = max_pending
+        self.keep = keep
+        self._executor: Optional[Executor] = None
+        self._jobs: Dict[int, UploadJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.state == QUEUED)
+
+    def submit(self, tmp_path: str, gif_root: str, filename: str, width: int, height: int) -> UploadJob:
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} Uploads in Bearbeitung")
+            if self._executor is None:
+                self._executor = self.executor_factory()
+            job = UploadJob(next(self._ids), filename)
+            args = (tmp_path, gif_root, filename, width, height)
+            try:
+                job.future = self._executor.submit(process_upload, *args)
+            except BrokenProcessPool:
+                # Ein Worker ist gestorben (z. B. OOM-Killer): Pool neu anlegen, einmal wiederholen
+                logger.warning("Upload worker pool broken, starting a new one")
+                self._executor.shutdown(wait=False)
+                self._executor = self.executor_factory()
+                job.future = self._executor.submit(process_upload, *args)
+            self._jobs[job.id] = job
+            self._trim()
+        job.future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        return job
+
+    def _finish(self, job: UploadJob, future: Future) -> None:
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            # Der nächste submit() bemerkt den kaputten Pool und legt einen neuen an
+            job.error = "Verarbeitung abgebrochen (Worker-Prozess beendet)"
+            job.state = FAILED
+            logger.error("Upload worker died while processing %s", job.filename)
+        except Exception as exc:
+            job.error = str(exc)
+            job.state = FAILED
+            logger.warning("Upload %s rejected: %s", job.filename, exc)
+        else:
+            job.name = result["name"]
+            if self.on_done is not None:
+                try:
+                    self.on_done(result)
+                except Exception:
+                    logger.exception("Applying upload %s failed", job.filename)
+            job.state = DONE
+        job.finished = time.time()
+
+    def _trim(self) -> None:
+        finished = [job for job in self._jobs.values() if job.state in (DONE, FAILED)]
+        for job in finished[: max(0, len(finished) - self.keep)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: int) -> Optional[UploadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[dict]:
+        with self._lock:
+            return [job.as_dict() for job in self._jobs.values()]
+
+    def wait_all(self, timeout: float = None) -> bool:
+        """Block until all jobs finished; return ``False`` on timeout."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._pending() == 0:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
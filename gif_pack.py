@@ -0,0 +1,154 @@
+"""Raw frame packs for GIFs, sized for the LED matrix.
+
+A frame pack stores every frame of a GIF already cropped/padded to the panel
+size (``cols * chain_length`` x ``rows``) together with a duration table.  The
+pixel data is kept in ``RGBX`` layout, which is the in-memory layout Pillow
+(and ``rgbmatrix.SetImage``) uses for ``RGB`` images.  Playback ``mmap``s the
+file and turns a frame into an image with one straight unpack from the
+mapping; there is no palette decode, compositing or scaling at play time.
+
+The pack lives next to the original GIF (``<name>.gif.pack``); the GIF itself
+is kept for the web preview.  Run ``python gif_pack.py <folder>`` once to
+transcode GIFs that were uploaded before packs existed.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from typing import List, Sequence
+
+from PIL import Image
+
+MAGIC = b"ADMP"
+FORMAT_VERSION = 1
+PACK_SUFFIX = ".pack"
+HEADER = struct.Struct("<4sHHHI")  # magic, version, width, height, frame count
+BYTES_PER_PIXEL = 4
+DEFAULT_DURATION_MS = 100
+
+
+def pack_path_for(gif_path: str) -> str:
+    """Return the frame pack path belonging to ``gif_path``."""
+
+    return gif_path + PACK_SUFFIX
+
+
+def is_pack_fresh(gif_path: str) -> bool:
+    """Return ``True`` if a pack exists and is not older than its GIF."""
+
+    pack_path = pack_path_for(gif_path)
+    try:
+        return os.path.getmtime(pack_path) >= os.path.getmtime(gif_path)
+    except OSError:
+        return False
+
+
+def transcode(gif_path: str, width: int, height: int) -> str:
+    """Write the frame pack for ``gif_path`` and return its path.
+
+    Frames are placed at the top-left corner of a black panel-sized canvas,
+    matching ``SetImage(frame, 0, 0)``: larger GIFs are cropped, smaller ones
+    padded.
+    """
+
+    pack_path = pack_path_for(gif_path)
+    tmp_path = pack_path + ".tmp"
+    with Image.open(gif_path) as gif:
+        n_frames = getattr(gif, "n_frames", 1)
+        durations = []
+        with open(tmp_path, "wb") as fh:
+            fh.write(HEADER.pack(MAGIC, FORMAT_VERSION, width, height, n_frames))
+            fh.write(b"\0" * (4 * n_frames))
+            for index in range(n_frames):
+                gif.seek(index)
+                frame = Image.new("RGB", (width, height))
+                frame.paste(gif.convert("RGB").crop((0, 0, width, height)), (0, 0))
+                fh.write(frame.tobytes("raw", "RGBX"))
+                durations.append(int(gif.info.get("duration", DEFAULT_DURATION_MS) or DEFAULT_DURATION_MS))
+            fh.seek(HEADER.size)
+            fh.write(struct.pack(f"<{n_frames}I", *durations))
+    os.replace(tmp_path, pack_path)
+    return pack_path
+
+
+class FramePack(Sequence):
+    """Read-only, memory-mapped view of a frame pack.
+
+    Indexing returns a ``PIL.Image`` in ``RGB`` mode that can be passed to
+    ``SetImage`` directly.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a frame pack: {path}")
+        self.durations: List[int] = list(struct.unpack_from(f"<{count}I", self._mm, HEADER.size))
+        self._frame_size = self.width * self.height * BYTES_PER_PIXEL
+        self._data_offset = HEADER.size + 4 * count
+        self._view = memoryview(self._mm)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start = self._data_offset + index * self._frame_size
+        # SetImage akzeptiert nur Mode "RGB"; RGBX -> RGB ist ein reiner memcpy
+        return Image.frombytes(
+            "RGB", (self.width, self.height), self._view[start:start + self._frame_size], "raw", "RGBX"
+        )
+
+    def close(self) -> None:
+        self._view.release()
+        self._mm.close()
+
+
+def migrate(folder: str, width: int, height: int) -> int:
+    """Create missing or outdated packs for all GIFs below ``folder``."""
+
+    count = 0
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]  # z.B. .thumbs
+        for name in files:
+            if not name.lower().endswith(".gif"):
+                continue
+            path = os.path.join(root, name)
+            if is_pack_fresh(path):
+                continue
+            try:
+                transcode(path, width, height)
+                count += 1
+                print(f"packed {path}")
+            except (OSError, ValueError) as exc:
+                print(f"skipped {path}: {exc}")
+    return count
+
+
+def main() -> None:
+    """Entry point for the one-shot migration of an existing GIF folder."""
+
+    parser = argparse.ArgumentParser(description="Transcode GIFs into matrix frame packs.")
+    parser.add_argument("folder", nargs="?", default="/home/pi/rgbserver/gifs")
+    parser.add_argument("--width", type=int, default=192, help="cols * chain_length")
+    parser.add_argument("--height", type=int, default=64, help="rows")
+    args = parser.parse_args()
+    count = migrate(args.folder, args.width, args.height)
+    print(f"{count} GIFs transcoded")
+
+
+if __name__ == "__main__":
+    main()
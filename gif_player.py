@@ -0,0 +1,381 @@
+"""Frame timing for GIF playback on the matrix.
+
+:class:`FrameScheduler` shows frames against monotonic deadlines instead of
+sleeping a fixed duration after each ``SetImage``.  Time spent converting and
+transferring a frame is therefore subtracted from the following wait, and
+frames whose slot has already passed are skipped so animations keep their
+authored speed.  Per-GIF counters are collected in :class:`PlaybackStats`.
+
+:class:`GifPrefetcher` decodes the upcoming playlist entries on a worker
+thread while the current GIF plays, so switching GIFs does not stall the panel.
+
+:class:`GifPlayer` is the single long-lived playback worker.  Web handlers
+only enqueue play/stop commands; the worker applies them between frames.
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from gif_cache import GifFrameCache, GifFrames
+
+logger = logging.getLogger(__name__)
+
+# Frames, die später als diese Toleranz erscheinen, gelten als "late"
+LATE_TOLERANCE_SECS = 0.005
+# Liegen wir weiter als das zurück, wird neu synchronisiert statt nachzuholen
+RESYNC_SECS = 1.0
+
+
+@dataclass
+class PlaybackStats:
+    """Counters for one GIF."""
+
+    frames_shown: int = 0
+    frames_late: int = 0
+    frames_dropped: int = 0
+    intended_secs: float = 0.0
+    elapsed_secs: float = 0.0
+    # Abweichung des Anzeigezeitpunkts von der Deadline (für Jitter)
+    lateness_sum: float = 0.0
+    lateness_sq_sum: float = 0.0
+    lateness_max: float = 0.0
+
+    def record_lateness(self, lateness: float) -> None:
+        self.lateness_sum += lateness
+        self.lateness_sq_sum += lateness * lateness
+        self.lateness_max = max(self.lateness_max, lateness)
+
+    @property
+    def jitter_secs(self) -> float:
+        """Standard deviation of frame lateness."""
+
+        if self.frames_shown < 2:
+            return 0.0
+        mean = self.lateness_sum / self.frames_shown
+        return max(0.0, self.lateness_sq_sum / self.frames_shown - mean * mean) ** 0.5
+
+    def as_dict(self) -> dict:
+        frames = self.frames_shown + self.frames_dropped
+        return {
+            "frames_shown": self.frames_shown,
+            "frames_late": self.frames_late,
+            "frames_dropped": self.frames_dropped,
+            "intended_fps": round(frames / self.intended_secs, 2) if self.intended_secs else 0.0,
+            "actual_fps": round(self.frames_shown / self.elapsed_secs, 2) if self.elapsed_secs else 0.0,
+            "jitter_ms": round(self.jitter_secs * 1000, 3),
+            "max_late_ms": round(self.lateness_max * 1000, 3),
+        }
+
+
+class FrameScheduler:
+    """Drift-compensated frame pacing shared by all GIF playback paths.
+
+    ``clock`` must be monotonic.  The deadline carries over from one GIF to the
+    next so a playlist as a whole stays on time; call :meth:`reset` when a new
+    playback starts.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.deadline = None
+        self._stats: Dict[str, PlaybackStats] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Start timing from the next shown frame."""
+
+        self.deadline = None
+
+    def run(
+        self,
+        name: str,
+        frames: Iterable[Tuple[object, int]],
+        show: Callable[[object], None],
+        stop,
+    ) -> None:
+        """Show ``(frame, duration_ms)`` pairs via ``show`` until done or ``stop``.
+
+        ``stop`` is anything with ``is_set()`` and ``wait(timeout)``, e.g. a
+        :class:`threading.Event` or the player's :class:`CommandQueue`.
+        """
+
+        with self._lock:
+            stats = self._stats.setdefault(name, PlaybackStats())
+        started = self.clock()
+        for frame, duration_ms in frames:
+            if stop.is_set():
+                break
+            duration = duration_ms / 1000.0
+            now = self.clock()
+            if self.deadline is None or now - self.deadline > RESYNC_SECS:
+                self.deadline = now
+
+            if now >= self.deadline + duration:
+                # Slot dieses Frames ist schon vorbei -> überspringen
+                stats.frames_dropped += 1
+            else:
+                if now - self.deadline > LATE_TOLERANCE_SECS:
+                    stats.frames_late += 1
+                stats.record_lateness(max(0.0, now - self.deadline))
+                show(frame)
+                stats.frames_shown += 1
+            stats.intended_secs += duration
+            self.deadline += duration
+
+            delay = self.deadline - self.clock()
+            if delay > 0 and stop.wait(delay):
+                break
+        stats.elapsed_secs += self.clock() - started
+
+    def stats(self) -> dict:
+        """Return per-GIF counters suitable for JSON output."""
+
+        with self._lock:
+            return {name: s.as_dict() for name, s in self._stats.items()}
+
+
+class GifPrefetcher:
+    """Decode upcoming GIFs in the background.
+
+    ``depth`` is the number of upcoming entries kept ready and
+    ``budget_bytes`` caps the memory held by prefetched but not yet played
+    GIFs.  Prefetched frames also warm the shared :class:`GifFrameCache`.
+    """
+
+    def __init__(self, cache: GifFrameCache, depth: int = 1, budget_bytes: int = 16 * 1024 * 1024) -> None:
+        self.cache = cache
+        self.depth = depth
+        self.budget_bytes = budget_bytes
+        self._ready: "OrderedDict[str, GifFrames]" = OrderedDict()
+        self._pending = set()
+        self._generation = 0
+        self._jobs: "queue.Queue[Tuple[int, str]]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name="gif-prefetch", daemon=True)
+            self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            generation, path = self._jobs.get()
+            entry = None
+            try:
+                entry = self.cache.get(path)
+            except Exception as exc:
+                logger.error("Prefetching %s failed: %s", path, exc)
+            with self._cond:
+                self._pending.discard(path)
+                held = sum(e.nbytes for e in self._ready.values())
+                if (
+                    entry is not None
+                    and generation == self._generation
+                    and held + entry.nbytes <= self.budget_bytes
+                ):
+                    self._ready[path] = entry
+                self._cond.notify_all()
+
+    def schedule(self, upcoming: List[str], current: str = None) -> None:
+        """Queue the first ``depth`` paths of ``upcoming`` for decoding."""
+
+        if self.depth <= 0:
+            return
+        self._ensure_worker()
+        with self._cond:
+            for path in upcoming[: self.depth]:
+                if path == current or path in self._ready or path in self._pending:
+                    continue
+                self._pending.add(path)
+                self._jobs.put((self._generation, path))
+
+    def take(self, path: str) -> GifFrames:
+        """Return frames for ``path``, waiting for an in-flight prefetch."""
+
+        with self._cond:
+            while path in self._pending:
+                self._cond.wait()
+            entry = self._ready.pop(path, None)
+        if entry is not None:
+            return entry
+        return self.cache.get(path)
+
+    def clear(self) -> None:
+        """Forget prefetched GIFs, e.g. when a different playlist starts."""
+
+        with self._cond:
+            self._generation += 1
+            self._ready.clear()
+
+
+class CommandQueue:
+    """FIFO of player commands that also acts as the playback stop signal.
+
+    Playback of the current command continues while the queue is empty, so
+    ``is_set()``/``wait()`` report whether a newer command is waiting.
+    """
+
+    def __init__(self) -> None:
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, command: tuple) -> None:
+        with self._cond:
+            self._items.append(command)
+            self._cond.notify_all()
+
+    def get(self) -> tuple:
+        """Block for the next command."""
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._items)
+            return self._items.popleft()
+
+    def peek(self):
+        """Return the next command without removing it, or ``None``."""
+
+        with self._cond:
+            return self._items[0] if self._items else None
+
+    def is_set(self) -> bool:
+        return bool(self._items)
+
+    def wait(self, timeout: float = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._items, timeout)
+
+
+class GifPlayer:
+    """Persistent GIF playback worker driven by a command queue.
+
+    ``show`` pushes a frame to the matrix and ``clear`` blanks it when
+    playback stops.  ``on_change`` is called whenever the worker starts or
+    stops owning the matrix.  :meth:`play` and :meth:`stop` return immediately.
+    """
+
+    def __init__(
+        self,
+        prefetcher: GifPrefetcher,
+        scheduler: FrameScheduler,
+        show: Callable[[object], None],
+        clear: Callable[[], None],
+        name_for: Callable[[str], str] = lambda path: path,
+        on_change: Callable[[], None] = None,
+    ) -> None:
+        self.prefetcher = prefetcher
+        self.scheduler = scheduler
+        self.show = show
+        self.clear = clear
+        self.name_for = name_for
+        self.on_change = on_change
+        self._commands = CommandQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._playing = False
+        self._current = None
+        self._playlist: List[str] = []
+        # Quelle des zuletzt angeforderten Abspielens ("gif", "playlist", "pg")
+        self._source = None
+
+    def _send(self, command: tuple) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="gif-player", daemon=True)
+                self._thread.start()
+        self._commands.put(command)
+
+    def play(self, paths: List[str], source: str = None) -> None:
+        """Switch playback to ``paths`` (looped)."""
+
+        with self._lock:
+            self._source = source
+        self._send(("play", list(paths)))
+
+    def stop(self) -> None:
+        """Stop playback and clear the matrix."""
+
+        with self._lock:
+            self._source = None
+        self._send(("stop",))
+
+    def is_playing(self) -> bool:
+        """Return ``True`` while the worker owns the matrix."""
+
+        return self._playing
+
+    @property
+    def source(self) -> str:
+        """Source of the most recently requested playback, ``None`` if stopped."""
+
+        return self._source
+
+    def status(self) -> dict:
+        """Return the worker state suitable for JSON output."""
+
+        with self._lock:
+            return {
+                "state": "playing" if self._playing else "stopped",
+                "source": self._source,
+                "current": self.name_for(self._current) if self._current else None,
+                "playlist": [self.name_for(p) for p in self._playlist],
+            }
+
+    def _worker(self) -> None:
+        while True:
+            command = self._commands.get()
+            try:
+                if command[0] == "play" and command[1]:
+                    self._play(command[1])
+                elif self._playing:
+                    self._finish()
+            except Exception:
+                logger.exception("GIF playback failed")
+
+    def _play(self, paths: List[str]) -> None:
+        with self._lock:
+            self._playlist = paths
+        if not self._playing:
+            self._playing = True
+            self._notify()
+        self.scheduler.reset()
+        self.prefetcher.clear()
+        try:
+            while not self._commands.is_set():
+                for index, path in enumerate(paths):
+                    if self._commands.is_set():
+                        break
+                    with self._lock:
+                        self._current = path
+                    try:
+                        frames = self.prefetcher.take(path)
+                    except (OSError, ValueError) as exc:
+                        logger.error("Cannot play %s: %s", path, exc)
+                        if self._commands.wait(1.0):
+                            break
+                        continue
+                    # Nächste Einträge (zyklisch) schon dekodieren, während dieses GIF läuft
+                    self.prefetcher.schedule(paths[index + 1:] + paths[:index], current=path)
+                    self.scheduler.run(self.name_for(path), frames, self.show, self._commands)
+        finally:
+            # Bei direktem Wechsel zu einem anderen GIF nicht zwischendurch leeren
+            pending = self._commands.peek()
+            if pending is None or pending[0] != "play":
+                self._finish()
+
+    def _finish(self) -> None:
+        self.clear()
+        with self._lock:
+            self._current = None
+            self._playlist = []
+        self._playing = False
+        self._notify()
+
+    def _notify(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
@@ -0,0 +1,120 @@
+"""Downscaled preview thumbnails for the GIF and playlist pages.
+
+The pages used to embed every full-size GIF, so opening them on a phone made
+the Pi stream the whole library.  :class:`ThumbnailService` builds small,
+low-frame-rate animated previews on a thread pool: right after an upload, or
+lazily when a preview is first requested.  Thumbnails are stored by content
+hash (from :mod:`gif_index`), so the hash doubles as a strong ETag and
+unchanged GIFs never get re-encoded.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+THUMB_VERSION = 1  # erhöhen, wenn sich das Vorschauformat ändert
+THUMB_SIZE = (128, 128)
+MAX_FRAMES = 12
+MIN_FRAME_MS = 100
+
+
+def build_thumbnail(src: str, dst: str, size=THUMB_SIZE, max_frames: int = MAX_FRAMES) -> None:
+    """Write a downscaled preview of ``src`` with at most ``max_frames`` frames.
+
+    Frames are sampled evenly and their durations merged, so the preview runs
+    at the original speed with a lower frame rate.
+    """
+
+    with Image.open(src) as img:
+        count = getattr(img, "n_frames", 1)
+        step = max(1, -(-count // max_frames))
+        frames, durations = [], []
+        for index in range(count):
+            img.seek(index)
+            duration = int(img.info.get("duration", 100))
+            if index % step == 0:
+                frame = img.convert("RGB")
+                frame.thumbnail(size)
+                frames.append(frame)
+                durations.append(duration)
+            else:
+                durations[-1] += duration
+    durations = [max(MIN_FRAME_MS, d) for d in durations]
+    tmp = dst + ".tmp"
+    save_args = {"format": "GIF", "optimize": True}
+    if len(frames) > 1:
+        save_args.update(save_all=True, append_images=frames[1:], duration=durations, loop=0)
+    frames[0].save(tmp, **save_args)
+    os.replace(tmp, dst)
+
+
+class ThumbnailService:
+    """Build and locate thumbnails in ``thumb_dir`` on a worker pool."""
+
+    def __init__(self, gif_root: str, thumb_dir: str, workers: int = 2) -> None:
+        self.gif_root = gif_root
+        self.thumb_dir = thumb_dir
+        self.built = 0
+        self.failed = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def etag(self, content_hash: str) -> str:
+        return f"{content_hash}-v{THUMB_VERSION}"
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.thumb_dir, self.etag(content_hash) + ".gif")
+
+    def ensure(self, name: str, content_hash: str) -> Optional[Future]:
+        """Queue the thumbnail of ``name`` unless it exists; return its future."""
+
+        dst = self.path_for(content_hash)
+        if os.path.exists(dst):
+            return None
+        with self._lock:
+            future = self._pending.get(content_hash)
+            if future is None:
+                future = self._pool.submit(self._build, name, content_hash, dst)
+                self._pending[content_hash] = future
+            return future
+
+    def _build(self, name: str, content_hash: str, dst: str) -> str:
+        try:
+            os.makedirs(self.thumb_dir, exist_ok=True)
+            build_thumbnail(os.path.join(self.gif_root, name), dst)
+            self.built += 1
+            return dst
+        except (OSError, ValueError) as exc:
+            self.failed += 1
+            logger.error("Building thumbnail for %s failed: %s", name, exc)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(content_hash, None)
+
+    def get(self, name: str, content_hash: str, timeout: float = 10.0) -> Optional[str]:
+        """Return the thumbnail path, building it if needed; ``None`` on failure."""
+
+        future = self.ensure(name, content_hash)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                return None
+        dst = self.path_for(content_hash)
+        return dst if os.path.exists(dst) else None
+
+    def discard(self, content_hash: str) -> None:
+        """Remove the thumbnail of a deleted GIF."""
+
+        try:
+            os.remove(self.path_for(content_hash))
+        except FileNotFoundError:
+            pass
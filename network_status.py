@@ -0,0 +1,215 @@
+"""SSID and IP address for the info screen, read from the kernel.
+
+The WLAN monitor used to run ``iwgetid -r`` and ``hostname -I`` every 10 s,
+two fork/execs per check for as long as the device runs, and an address change
+took up to 10 s to show.  :class:`KernelNetworkProvider` reads the default
+route from ``/proc/net/route``, the IPv4 address with ``SIOCGIFADDR`` and the
+SSID with the wireless extension ioctl ``SIOCGIWESSID`` (what ``iwgetid``
+uses) - no subprocesses.
+
+:class:`NetworkMonitor` caches the last status and calls ``on_change`` only
+when it differs.  It re-reads on a slow timer job and, where available,
+right after rtnetlink reports a link, address or route change.  Tests and
+headless runs can pass :class:`StaticNetworkProvider` instead.
+"""
+
+import array
+import fcntl
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SIOCGIFADDR = 0x8915
+SIOCGIWESSID = 0x8B1B
+IW_ESSID_MAX_SIZE = 32
+IWREQ_SIZE = 32
+RTF_UP = 0x0001
+# rtnetlink-Gruppen: Link-Status, IPv4-Adressen, IPv4-Routen
+RTMGRP_LINK = 0x01
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+
+
+class NetworkStatus(NamedTuple):
+    ssid: str  # "" ohne WLAN-Verbindung
+    ip: str  # "" ohne IPv4-Adresse
+    interface: Optional[str] = None
+
+
+def default_interface(route_file: str = "/proc/net/route") -> Optional[str]:
+    """Interface of the IPv4 default route with the lowest metric."""
+
+    best = None
+    try:
+        with open(route_file) as fh:
+            next(fh, None)
+            for line in fh:
+                fields = line.split()
+                if len(fields) < 7 or fields[1] != "00000000" or not int(fields[3], 16) & RTF_UP:
+                    continue
+                metric = int(fields[6])
+                if best is None or metric < best[0]:
+                    best = (metric, fields[0])
+    except OSError:
+        return None
+    return best[1] if best else None
+
+
+def interface_address(name: str) -> Optional[str]:
+    """IPv4 address of ``name`` or ``None``."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            res = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, struct.pack("256s", name.encode()[:15]))
+        except OSError:
+            return None
+    return socket.inet_ntoa(res[20:24])
+
+
+def wireless_ssid(name: str) -> str:
+    """SSID ``name`` is associated with (``""`` if none or not wireless)."""
+
+    buf = array.array("B", bytes(IW_ESSID_MAX_SIZE + 1))
+    address, length = buf.buffer_info()
+    req = struct.pack("16sPHH", name.encode()[:15], address, length, 0)
+    req += bytes(max(0, IWREQ_SIZE - len(req)))
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            res = fcntl.ioctl(sock.fileno(), SIOCGIWESSID, req)
+        except OSError:
+            return ""
+    size = struct.unpack_from("16sPHH", res)[2]
+    return bytes(buf[:size]).rstrip(b"\0").decode("utf-8", "replace")
+
+
+class KernelNetworkProvider:
+    """Read SSID and IP from ``/proc``, ``/sys`` and ioctls."""
+
+    def __init__(self, sys_net: str = "/sys/class/net", route_file: str = "/proc/net/route") -> None:
+        self.sys_net = sys_net
+        self.route_file = route_file
+
+    def interfaces(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.sys_net) if name != "lo")
+        except OSError:
+            return []
+
+    def wireless_interfaces(self) -> List[str]:
+        return [
+            name for name in self.interfaces()
+            if os.path.exists(os.path.join(self.sys_net, name, "wireless"))
+            or os.path.exists(os.path.join(self.sys_net, name, "phy80211"))
+        ]
+
+    def read(self) -> NetworkStatus:
+        ssid = ""
+        for name in self.wireless_interfaces():
+            ssid = wireless_ssid(name)
+            if ssid:
+                break
+        # Wie "hostname -I | cut -d' ' -f1": bevorzugt das Interface der Default-Route
+        route = default_interface(self.route_file)
+        candidates = ([route] if route else []) + [name for name in self.interfaces() if name != route]
+        for name in candidates:
+            ip = interface_address(name)
+            if ip:
+                return NetworkStatus(ssid, ip, name)
+        return NetworkStatus(ssid, "", None)
+
+
+class StaticNetworkProvider:
+    """Provider returning a fixed status (tests, development boxes)."""
+
+    def __init__(self, ssid: str = "", ip: str = "", interface: str = None) -> None:
+        self.status = NetworkStatus(ssid, ip, interface)
+
+    def set(self, ssid: str, ip: str, interface: str = None) -> None:
+        self.status = NetworkStatus(ssid, ip, interface)
+
+    def read(self) -> NetworkStatus:
+        return self.status
+
+
+def open_netlink() -> Optional[socket.socket]:
+    """rtnetlink socket subscribed to link, address and route changes, or ``None``."""
+
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE))
+    except (OSError, AttributeError):
+        return None
+    return sock
+
+
+class NetworkMonitor:
+    """Cache the provider's status and report changes to ``on_change(status)``."""
+
+    def __init__(
+        self,
+        provider,
+        on_change: Callable[[NetworkStatus], None],
+        interval: float = 30.0,
+        debounce: float = 0.2,
+    ) -> None:
+        self.provider = provider
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.status: Optional[NetworkStatus] = None
+        self.reads = 0
+        self.changes = 0
+        self.kernel_events = 0
+        self.job = None
+        self._netlink = None
+
+    def refresh(self) -> bool:
+        """Read the status now; return ``True`` if it changed."""
+
+        try:
+            status = self.provider.read()
+        except OSError as exc:
+            logger.warning("Reading network status failed: %s", exc)
+            return False
+        self.reads += 1
+        if status == self.status:
+            return False
+        self.status = status
+        self.changes += 1
+        self.on_change(status)
+        return True
+
+    def watch(self, scheduler):
+        """Refresh as a job of ``scheduler`` and after every rtnetlink event."""
+
+        self.job = scheduler.call_every(self.interval, self.refresh, name="network", first=0)
+        self._netlink = open_netlink()
+        if self._netlink is None:
+            logger.info("rtnetlink not available, checking network every %.0f s", self.interval)
+        else:
+            threading.Thread(target=self._listen, name="netlink", daemon=True).start()
+        return self.job
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                self._netlink.recv(65536)
+            except OSError:
+                return
+            self.kernel_events += 1
+            # Adresse, Route und Link kommen meist zusammen: einmal gesammelt lesen
+            self.job.reschedule(self.debounce)
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status._asdict() if self.status else None,
+            "reads": self.reads,
+            "changes": self.changes,
+            "kernel_events": self.kernel_events,
+            "netlink": self._netlink is not None,
+        }
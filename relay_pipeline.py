@@ -0,0 +1,173 @@
+"""Classification, extraction and dedup of AutoDarts websocket messages.
+
+During a match AutoDarts pushes the full match state many times per turn,
+while the matrix only changes when a score, the current player or the
+checkout suggestion changes.  :class:`MessagePipeline` handles one raw
+message in three cheap-to-expensive steps:
+
+1. classify the channel from the first bytes of the raw text (no JSON
+   decoding) and drop channels the relay does not use,
+2. drop byte-identical repeats of the previous message on the same topic,
+3. decode, extract only the fields the matrix needs and drop the message if
+   that digest is unchanged.
+
+Counters for each outcome are available through :meth:`MessagePipeline.stats`.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import json
+import re
+from typing import Dict, Optional
+
+BOARDS_CHANNEL = "autodarts.boards"
+MATCHES_CHANNEL = "autodarts.matches"
+
+# Die Felder stehen bei AutoDarts vorne; nur der Kopf der Nachricht wird durchsucht
+HEAD_BYTES = 256
+_CHANNEL_RE = re.compile(r'"channel"\s*:\s*"([^"]*)"')
+_TOPIC_RE = re.compile(r'"topic"\s*:\s*"([^"]*)"')
+
+MATCH_START = "match_start"
+ROUND = "round"
+
+
+@dataclass
+class RelayEvent:
+    """Result of a processed message that has to be acted upon."""
+
+    kind: str
+    match_id: Optional[str] = None
+    board_id: Optional[str] = None
+    turn: Optional[dict] = None
+    state: Optional[dict] = None
+
+
+def classify(raw: str):
+    """Return ``(channel, topic)`` found in the head of ``raw``, ``None`` if absent."""
+
+    head = raw[:HEAD_BYTES]
+    channel = _CHANNEL_RE.search(head)
+    topic = _TOPIC_RE.search(head)
+    return (channel.group(1) if channel else None, topic.group(1) if topic else None)
+
+
+def extract_state(data: dict) -> Optional[dict]:
+    """Map an AutoDarts match state to the ``/dart/update`` payload.
+
+    Uses ``players[].name``, ``gameScores``, ``scores[].sets/legs``, the index
+    in ``player`` and the names in ``state.checkoutGuide``.  Returns ``None``
+    if the message carries no players.
+    """
+
+    players = data.get("players") or []
+    if not players:
+        return None
+    game_scores = data.get("gameScores") or []
+    scores = data.get("scores") or []
+    result = []
+    for index, player in enumerate(players):
+        entry = {"name": str(player.get("name") or f"Spieler {index + 1}")}
+        if index < len(game_scores):
+            entry["score"] = game_scores[index]
+        if index < len(scores) and isinstance(scores[index], dict):
+            entry["sets"] = scores[index].get("sets", 0)
+            entry["legs"] = scores[index].get("legs", 0)
+        result.append(entry)
+    guide = (data.get("state") or {}).get("checkoutGuide") or []
+    checkout = " ".join(str(seg.get("name", "")) for seg in guide if isinstance(seg, dict)).strip()
+    return {"players": result, "current": int(data.get("player") or 0), "checkout": checkout}
+
+
+def _digest(value) -> str:
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MessagePipeline:
+    """Turn raw websocket messages into :class:`RelayEvent` objects."""
+
+    def __init__(self) -> None:
+        self.received = 0
+        self.ignored = 0
+        self.duplicates = 0
+        self.unchanged = 0
+        self.invalid = 0
+        self.forwarded = 0
+        self._last_raw: Dict[str, int] = {}
+        self._last_digest: Dict[str, str] = {}
+
+    def reset(self) -> None:
+        """Forget previous digests, e.g. after a reconnect."""
+
+        self._last_raw.clear()
+        self._last_digest.clear()
+
+    def process(self, raw) -> Optional[RelayEvent]:
+        """Return the event for ``raw`` or ``None`` if it can be dropped."""
+
+        self.received += 1
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "replace")
+        channel, topic = classify(raw)
+        if channel not in (BOARDS_CHANNEL, MATCHES_CHANNEL) and channel is not None:
+            self.ignored += 1
+            return None
+
+        key = topic or channel or ""
+        raw_hash = hash(raw)
+        if channel == MATCHES_CHANNEL and self._last_raw.get(key) == raw_hash:
+            self.duplicates += 1
+            return None
+
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            self.invalid += 1
+            return None
+        channel = msg.get("channel")
+        topic = msg.get("topic") or topic
+        data = msg.get("data") or {}
+        if not isinstance(data, dict):
+            self.invalid += 1
+            return None
+
+        if channel == BOARDS_CHANNEL:
+            if data.get("event") == "start" and "id" in data:
+                self.forwarded += 1
+                board_id = topic.split(".", 1)[0] if topic else None
+                return RelayEvent(MATCH_START, match_id=data["id"], board_id=board_id)
+            self.ignored += 1
+            return None
+        if channel != MATCHES_CHANNEL:
+            self.ignored += 1
+            return None
+
+        self._last_raw[key] = raw_hash
+        turns = data.get("turns") or []
+        turn = turns[0] if turns else None
+        state = extract_state(data)
+        if turn is None and state is None:
+            self.ignored += 1
+            return None
+        digest = _digest([turn, state])
+        if self._last_digest.get(key) == digest:
+            self.unchanged += 1
+            return None
+        self._last_digest[key] = digest
+        self.forwarded += 1
+        match_id = data.get("id") or (topic.split(".", 1)[0] if topic else None)
+        return RelayEvent(ROUND, match_id=match_id, turn=turn, state=state)
+
+    def stats(self) -> dict:
+        """Return pipeline counters suitable for JSON output."""
+
+        return {
+            "received": self.received,
+            "ignored": self.ignored,
+            "duplicates": self.duplicates,
+            "unchanged": self.unchanged,
+            "invalid": self.invalid,
+            "forwarded": self.forwarded,
+            "dropped": self.ignored + self.duplicates + self.unchanged + self.invalid,
+        }
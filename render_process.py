@@ -0,0 +1,452 @@
+"""Dedicated render process owning the LED matrix.
+
+Flask request threads, the WLAN monitor, the GIF player and the render loop
+used to share one interpreter, so page loads and uploads held the GIL while
+frames were due and the panel stuttered.  With ``render_process`` enabled the
+web server starts :func:`run_renderer` in a child process that owns the
+display backend, the scoreboard renderer (:mod:`screens`) and the GIF player.
+
+The web process only publishes state:
+
+* the current view (dart state, mode, SSID/IP) goes into a small shared
+  memory block (:class:`SharedState`, a seqlock over JSON in an ``mmap``) and
+  a byte on a wake pipe wakes the child;
+* GIF commands (play/stop/discard, settings) and status/stats queries go
+  over a pipe; the child reports player state changes and query replies.
+
+:class:`RenderClient` is the web-side end; :class:`RemotePlayer` offers the
+:class:`gif_player.GifPlayer` interface used by the routes.  If the child
+dies, the client starts a new one (with backoff); it picks up the view from
+the shared block and the last GIF command is sent again.
+"""
+
+import itertools
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sequenznummer (ungerade = Schreiben läuft) und Länge des JSON-Blocks
+HEADER = struct.Struct("<QI")
+STATE_BYTES = 64 * 1024
+
+
+def _shm_dir() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class SharedState:
+    """Single-writer, multi-reader JSON state in a memory-mapped file."""
+
+    def __init__(self, path: str, size: int = STATE_BYTES, create: bool = False) -> None:
+        self.path = path
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+        fd = os.open(path, flags, 0o600)
+        try:
+            if create:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self._map = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def create(cls, size: int = STATE_BYTES) -> "SharedState":
+        fd, path = tempfile.mkstemp(prefix="autodarts-matrix-", dir=_shm_dir())
+        os.close(fd)
+        os.unlink(path)
+        return cls(path, size, create=True)
+
+    @property
+    def seq(self) -> int:
+        return HEADER.unpack_from(self._map, 0)[0]
+
+    def publish(self, data: dict) -> int:
+        """Write ``data``; only one process may publish.  Returns the new sequence."""
+
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        if HEADER.size + len(payload) > self.size:
+            raise ValueError(f"state too large ({len(payload)} bytes)")
+        seq = self.seq
+        HEADER.pack_into(self._map, 0, seq + 1, 0)
+        self._map[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(self._map, 0, seq + 2, len(payload))
+        return seq + 2
+
+    def read(self, spins: int = 1000) -> Tuple[int, Optional[dict]]:
+        """Return ``(seq, data)``; ``data`` is ``None`` before the first publish."""
+
+        for _ in range(spins):
+            seq, length = HEADER.unpack_from(self._map, 0)
+            if seq % 2:
+                time.sleep(0)
+                continue
+            payload = self._map[HEADER.size:HEADER.size + length]
+            if HEADER.unpack_from(self._map, 0)[0] == seq:
+                return seq, json.loads(payload) if length else None
+        raise TimeoutError("shared state kept changing")
+
+    def close(self) -> None:
+        self._map.close()
+
+    def unlink(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def panel_name(gif_root: str) -> Callable[[str], str]:
+    return lambda path: os.path.relpath(path, gif_root)
+
+
+def run_renderer(state_path: str, conn, wake_conn, settings: dict, font_dir: str, gif_root: str) -> None:
+    """Entry point of the render process."""
+
+    from display_backend import create_backend
+    from gif_cache import GifFrameCache
+    from gif_player import FrameScheduler, GifPlayer, GifPrefetcher
+    from screens import MatrixRenderer, empty_view, next_redraw
+
+    logging.basicConfig(level=logging.INFO)
+    display = create_backend(settings)
+    renderer = MatrixRenderer(display, font_dir)
+    state = SharedState(state_path)
+    cache = GifFrameCache(budget_bytes=int(settings.get("gif_cache_mb", 64)) * 1024 * 1024)
+    scheduler = FrameScheduler()
+    prefetcher = GifPrefetcher(
+        cache,
+        depth=int(settings.get("gif_prefetch_depth", 1)),
+        budget_bytes=int(settings.get("gif_prefetch_mb", 16)) * 1024 * 1024,
+    )
+    send_lock = threading.Lock()
+    running = threading.Event()
+    running.set()
+    wake = threading.Event()
+    renders = 0
+
+    def wakeups() -> None:
+        # Weckbytes aus der Pipe in ein lokales Event übersetzen
+        while running.is_set():
+            try:
+                wake_conn.recv_bytes()
+            except (OSError, EOFError):
+                running.clear()
+            wake.set()
+
+    def send(message: tuple) -> None:
+        try:
+            with send_lock:
+                conn.send(message)
+        except (OSError, EOFError):
+            running.clear()
+            wake.set()
+
+    def on_change() -> None:
+        wake.set()
+        send(("status", player.status()))
+
+    player = GifPlayer(
+        prefetcher,
+        scheduler,
+        show=lambda frame: display.set_image(frame, 0, 0),
+        clear=lambda: display.clear(),
+        name_for=panel_name(gif_root),
+        on_change=on_change,
+    )
+
+    def commands() -> None:
+        while running.is_set():
+            try:
+                command = conn.recv()
+            except (OSError, EOFError):
+                command = ("quit",)
+            kind = command[0]
+            if kind == "play":
+                player.play(command[1], source=command[2])
+            elif kind == "stop":
+                player.stop()
+            elif kind == "discard":
+                cache.discard(command[1])
+            elif kind == "settings":
+                values = command[1]
+                cache.budget_bytes = int(values.get("gif_cache_mb", 64)) * 1024 * 1024
+                prefetcher.depth = int(values.get("gif_prefetch_depth", 1))
+                prefetcher.budget_bytes = int(values.get("gif_prefetch_mb", 16)) * 1024 * 1024
+            elif kind == "status":
+                send(("reply", command[1], player.status()))
+            elif kind == "stats":
+                send(("reply", command[1], {
+                    "playback": scheduler.stats(),
+                    "cache": cache.stats(),
+                    "render": {"pid": os.getpid(), "renders": renders, "state_seq": state.seq},
+                }))
+            elif kind == "quit":
+                running.clear()
+                wake.set()
+
+    threading.Thread(target=commands, name="render-commands", daemon=True).start()
+    threading.Thread(target=wakeups, name="render-wakeups", daemon=True).start()
+    send(("ready", os.getpid()))
+    try:
+        while running.is_set():
+            # Erst löschen, dann lesen: ein publish() danach weckt die nächste Runde
+            wake.clear()
+            view = state.read()[1] or empty_view()
+            if not player.is_playing():
+                renderer.render(view)
+                renders += 1
+            wake.wait(next_redraw(view, player.is_playing()))
+    finally:
+        player.stop()
+        state.close()
+        display.clear()
+
+
+# Wartezeit vor Neustart des Kindprozesses: verdoppelt sich bis zum Maximum
+RESPAWN_DELAY_SECS = 1.0
+RESPAWN_MAX_DELAY_SECS = 30.0
+# Lief der Prozess so lange, beginnt die Wartezeit wieder von vorn
+RESPAWN_RESET_SECS = 60.0
+
+
+class RenderClient:
+    """Web-side handle of the render process.
+
+    ``on_change`` is called whenever the child reports a change of the GIF
+    player state (like :class:`gif_player.GifPlayer` ``on_change``).  A child
+    that exits unexpectedly is restarted.
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        font_dir: str,
+        gif_root: str,
+        on_change: Callable[[], None] = None,
+        start_method: str = "forkserver",
+    ) -> None:
+        self.settings = settings
+        self.font_dir = font_dir
+        self.gif_root = gif_root
+        self.on_change = on_change
+        self.published = 0
+        self.skipped = 0
+        self.player = RemotePlayer(self, panel_name(gif_root))
+        self._ctx = multiprocessing.get_context(start_method)
+        self._state: Optional[SharedState] = None
+        self._conn = None
+        self._wake = None
+        self._process = None
+        self._last_payload = None
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._replies: Dict[int, list] = {}
+        self._replies_cond = threading.Condition()
+        self._ready = threading.Event()
+        self._stopping = False
+        self._replay = None  # letztes play-Kommando für einen neuen Kindprozess
+        self._spawned_at = 0.0
+        self._failures = 0
+        self.restarts = 0
+
+    def start(self, timeout: float = 10.0) -> None:
+        """Spawn the render process and wait until it drew its first frame."""
+
+        self._state = SharedState.create()
+        self._spawn(timeout)
+
+    def _spawn(self, timeout: float) -> None:
+        self._ready.clear()
+        conn, child_conn = self._ctx.Pipe()
+        # Eigene Weck-Pipe je Kindprozess: ein multiprocessing.Event bleibt
+        # hängen, wenn ein Prozess in wait() getötet wird
+        wake_reader, wake = self._ctx.Pipe(duplex=False)
+        os.set_blocking(wake.fileno(), False)
+        process = self._ctx.Process(
+            target=run_renderer,
+            args=(self._state.path, child_conn, wake_reader, self.settings, self.font_dir, self.gif_root),
+            name="matrix-render",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        wake_reader.close()
+        with self._send_lock:
+            old_conn, old_wake, old_process = self._conn, self._wake, self._process
+            self._conn, self._wake, self._process = conn, wake, process
+        if old_conn is not None:
+            old_conn.close()
+            old_wake.close()
+            old_process.join(0)
+        self._spawned_at = time.monotonic()
+        threading.Thread(target=self._receive, args=(conn,), name="render-replies", daemon=True).start()
+        if not self._ready.wait(timeout):
+            logger.warning("Render process not ready after %.0f s", timeout)
+
+    def _respawn(self) -> None:
+        """Start a new child after the old one died; replays the last GIF command."""
+
+        if time.monotonic() - self._spawned_at > RESPAWN_RESET_SECS:
+            self._failures = 0
+        delay = min(RESPAWN_MAX_DELAY_SECS, RESPAWN_DELAY_SECS * 2 ** self._failures)
+        self._failures += 1
+        logger.error("Render process exited, restarting in %.0f s", delay)
+        time.sleep(delay)
+        if self._stopping:
+            return
+        self.restarts += 1
+        self._spawn(10.0)
+        if self._replay is not None:
+            # Der neue Prozess meldet den Wiedergabestatus selbst
+            self.send(self._replay)
+
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def publish(self, view: dict) -> bool:
+        """Hand ``view`` to the render process; unchanged views are skipped."""
+
+        if self._state is None:
+            return False
+        payload = json.dumps(view, sort_keys=True)
+        if payload == self._last_payload:
+            self.skipped += 1
+            return False
+        self._last_payload = payload
+        self._state.publish(view)
+        self._wake_child()
+        self.published += 1
+        return True
+
+    def _wake_child(self) -> None:
+        try:
+            self._wake.send_bytes(b"")
+        except (OSError, AttributeError):
+            # Pipe voll (Kind ist schon geweckt) oder kein Kindprozess: ein
+            # neuer liest den Stand beim Start ohnehin
+            pass
+
+    def send(self, command: tuple) -> None:
+        if command[0] == "play":
+            self._replay = command
+        elif command[0] == "stop":
+            self._replay = None
+        if self._conn is None:
+            return
+        try:
+            with self._send_lock:
+                self._conn.send(command)
+        except (OSError, EOFError):
+            logger.error("Render process not reachable")
+
+    def discard(self, path: str) -> None:
+        self.send(("discard", path))
+
+    def configure(self, settings: dict) -> None:
+        self.send(("settings", settings))
+
+    def query(self, kind: str, timeout: float = 1.0) -> Optional[dict]:
+        """Ask the child for ``"status"`` or ``"stats"``; ``None`` on timeout."""
+
+        request_id = next(self._ids)
+        with self._replies_cond:
+            self._replies[request_id] = []
+        self.send((kind, request_id))
+        with self._replies_cond:
+            self._replies_cond.wait_for(lambda: self._replies[request_id], timeout)
+            reply = self._replies.pop(request_id)
+        return reply[0] if reply else None
+
+    def stats(self, timeout: float = 1.0) -> dict:
+        """Playback, cache and render counters of the child (``{}`` on timeout)."""
+
+        result = self.query("stats", timeout) or {}
+        result["publish"] = {"published": self.published, "skipped": self.skipped, "restarts": self.restarts}
+        return result
+
+    def _receive(self, conn) -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                self.player._update({"state": "stopped", "current": None, "playlist": []})
+                if not self._stopping:
+                    if self.on_change is not None:
+                        self.on_change()
+                    self._respawn()
+                return
+            kind = message[0]
+            if kind == "ready":
+                self._ready.set()
+            elif kind == "status":
+                self.player._update(message[1])
+                if self.on_change is not None:
+                    self.on_change()
+            elif kind == "reply":
+                with self._replies_cond:
+                    if message[1] in self._replies:
+                        self._replies[message[1]].append(message[2])
+                        self._replies_cond.notify_all()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._process is None:
+            return
+        self._stopping = True
+        self.send(("quit",))
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+        self._wake.close()
+        self._state.close()
+        self._state.unlink()
+        self._process = None
+
+
+class RemotePlayer:
+    """:class:`gif_player.GifPlayer` look-alike forwarding to the render process."""
+
+    def __init__(self, client: RenderClient, name_for: Callable[[str], str]) -> None:
+        self.client = client
+        self.name_for = name_for
+        self._lock = threading.Lock()
+        self._source = None
+        self._status = {"state": "stopped", "current": None, "playlist": []}
+
+    def play(self, paths: List[str], source: str = None) -> None:
+        with self._lock:
+            self._source = source
+        self.client.send(("play", list(paths), source))
+
+    def stop(self) -> None:
+        with self._lock:
+            self._source = None
+        self.client.send(("stop",))
+
+    def is_playing(self) -> bool:
+        return self._status["state"] == "playing"
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    def status(self) -> dict:
+        # Aktueller Stand aus dem Kindprozess, sonst die letzte Statusmeldung
+        status = self.client.query("status") if self.client.alive() else None
+        if status is not None:
+            self._update(status)
+        with self._lock:
+            return dict(self._status, source=self._source)
+
+    def _update(self, status: dict) -> None:
+        with self._lock:
+            self._status = {key: status.get(key) for key in ("state", "current", "playlist")}
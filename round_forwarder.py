@@ -0,0 +1,214 @@
+"""Non-blocking forwarding of round updates from the relay to the webserver.
+
+Posting each AutoDarts message synchronously on the websocket thread stalls
+message reception whenever the webserver is slow or restarting.
+:class:`RoundForwarder` hands payloads to its own worker through a
+latest-wins mailbox: while a post is in flight, newer payloads replace the
+waiting one, so a burst of state messages collapses to the newest.  Posts use
+a pooled keep-alive :class:`requests.Session`, or the local IPC socket from
+:mod:`dart_ipc` when one is configured (HTTP remains the fallback).
+
+Over HTTP, player lists are sent as per-player patches against the last
+delivered list (see :mod:`dart_delta`), with a full list at least every
+``full_sync_secs``.  Patches and full lists carry the last version the
+webserver reported as ``base_version``, so a delayed post cannot overwrite a
+newer score.  If the webserver rejects patches, answers with an older version
+than they were based on (e.g. after a restart) or refuses a full list as stale
+(409), the current list is sent again in full right away.  The IPC socket has
+no reply channel, so it always gets full lists without a base version.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
+
+from dart_delta import diff_players
+from dart_ipc import DartStateSender
+
+logger = logging.getLogger(__name__)
+
+
+class RoundForwarder:
+    """Forward the latest payload to ``url`` on a background worker."""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 2,
+        session: Optional[requests.Session] = None,
+        ipc_sender: Optional[DartStateSender] = None,
+        full_sync_secs: float = 30.0,
+    ) -> None:
+        self.url = url
+        self.ipc_sender = ipc_sender
+        self.full_sync_secs = full_sync_secs
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.forwarded = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.stale = 0
+        # Zuletzt zugestellte Spielerliste und Version für Delta-Updates
+        self._last_players = None
+        self._last_full = 0.0
+        self._version = None
+        # Zeit von submit() bis zur Zustellung
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._submitted_at = 0.0
+        self._pending_at = 0.0
+        self._pending = None
+        self._has_pending = False
+        self._cond = threading.Condition()
+        self._run = True
+        self._thread = None
+
+    def start(self) -> threading.Thread:
+        """Start the forwarding worker."""
+
+        self._thread = threading.Thread(target=self._worker, name="round-forwarder", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop the worker after the current post."""
+
+        with self._cond:
+            self._run = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def submit(self, payload: dict) -> None:
+        """Queue ``payload``, replacing any payload that has not been sent yet."""
+
+        with self._cond:
+            if self._has_pending:
+                self.coalesced += 1
+            self._pending = payload
+            self._pending_at = time.monotonic()
+            self._has_pending = True
+            self._cond.notify()
+
+    def resync(self) -> None:
+        """Send the next player list in full (after a reconnect or restart)."""
+
+        self._last_players = None
+        self._version = None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._has_pending or not self._run)
+                if not self._run:
+                    return
+                payload = self._pending
+                self._submitted_at = self._pending_at
+                self._pending = None
+                self._has_pending = False
+            self._post(payload)
+
+    def _prepare(self, payload: dict) -> dict:
+        """Replace the player list by patches if a recent full list was delivered.
+
+        Both carry ``base_version`` once the webserver reported a version.
+        """
+
+        players = payload.get("players")
+        if self.ipc_sender is not None or not isinstance(players, list):
+            return payload  # IPC: kein Rückkanal für Version/Ablehnungen
+        patches = None
+        if self._last_players is not None and time.monotonic() - self._last_full <= self.full_sync_secs:
+            patches = diff_players(self._last_players, players)
+        if patches is None:
+            body = dict(payload)
+        else:
+            body = {key: value for key, value in payload.items() if key != "players"}
+            body["patches"] = patches
+        if self._version is not None:
+            body["base_version"] = self._version
+        return body
+
+    def _delivered(self, payload: dict, body: dict) -> None:
+        self.forwarded += 1
+        if self._submitted_at:
+            self.last_lag = time.monotonic() - self._submitted_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+        if isinstance(payload.get("players"), list):
+            self._last_players = payload["players"]
+            if "players" in body:
+                self._last_full = time.monotonic()
+
+    def _post(self, payload: dict) -> None:
+        body = self._prepare(payload)
+        if self.ipc_sender is not None:
+            try:
+                self.ipc_sender.send(body)
+                self._delivered(payload, body)
+                return
+            except OSError as exc:
+                logger.warning("IPC forwarding failed, using HTTP: %s", exc)
+        try:
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+            if response.status_code == 409:
+                # Webserver hat einen neueren Stand als unsere Basis: aktuelle Liste
+                # ohne Basis erneut senden, sie ist der neueste Stand von AutoDarts
+                self.stale += 1
+                self.resync()
+                if "base_version" in body:
+                    logger.info("Full list refused as stale by %s, sending it again", self.url)
+                    self._post(payload)
+                return
+            response.raise_for_status()
+            version, rejected = _response_feedback(response)
+            base = body.get("base_version")
+            if "patches" in body and (rejected or (None not in (version, base) and version < base)):
+                # Webserver kennt den Stand nicht (z.B. nach Neustart): sofort komplett senden
+                self.stale += 1
+                self.resync()
+                logger.info("Patches rejected by %s, sending full state", self.url)
+                self._post(payload)
+                return
+            self._version = version
+            self._delivered(payload, body)
+            if rejected:
+                # Webserver hat neuere Felder behalten; nächste Liste wieder komplett
+                self._last_players = None
+            logger.info("Forwarded round to %s", self.url)
+        except requests.RequestException as exc:
+            self.failed += 1
+            self._last_players = None
+            logger.error("Forwarding to webserver failed: %s", exc)
+
+    def stats(self) -> dict:
+        """Return forwarding counters suitable for JSON output."""
+
+        return {
+            "url": self.url,
+            "ipc_socket": self.ipc_sender.path if self.ipc_sender else None,
+            "forwarded": self.forwarded,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "stale": self.stale,
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
+
+def _response_feedback(response) -> Tuple[Optional[int], list]:
+    """Return ``(version, rejected)`` from a ``/dart/update`` response."""
+
+    try:
+        data = response.json()
+    except ValueError:
+        return None, []
+    if not isinstance(data, dict):
+        return None, []
+    try:
+        version = int(data.get("version"))
+    except (ValueError, TypeError):
+        version = None
+    return version, list(data.get("rejected") or [])
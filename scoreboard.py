@@ -0,0 +1,92 @@
+"""Layout of the darts scoreboard on the matrix.
+
+All players are listed below each other: name left-aligned, score/sets/legs
+right-aligned in their own columns, the current player highlighted.  With at
+most three players a non-empty checkout hint is centred in row four.
+
+:func:`layout_for` turns the dart state into a list of positioned text runs.
+Results are cached per ``(players, current, checkout)`` tuple, so an unchanged
+scoreboard is redrawn without measuring any text.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from font_metrics import BdfFont
+
+# Layout (Spacing wie bisher in draw_dart_screen)
+Y_START = 12
+LINE_SPACING = 16
+PADDING = 2
+COLUMN_GAP = 6
+X_NAME = 2
+CHECKOUT_ROW = 3
+
+# Farbrollen; die konkreten Farben setzt der Renderer
+ROLE_NORMAL = "normal"
+ROLE_CURRENT = "current"
+ROLE_CHECKOUT = "checkout"
+
+PlayerRow = Tuple[str, str, str, str]
+
+
+@dataclass(frozen=True)
+class TextRun:
+    """A single ``DrawText`` call: text at baseline ``y`` starting at ``x``."""
+
+    x: int
+    y: int
+    role: str
+    text: str
+
+
+def player_rows(players: Iterable[dict]) -> Tuple[PlayerRow, ...]:
+    """Reduce player dicts to hashable ``(name, score, sets, legs)`` strings."""
+
+    return tuple(
+        (
+            str(p.get("name", "Spieler")),
+            str(p.get("score", 0)),
+            str(p.get("sets", 0)),
+            str(p.get("legs", 0)),
+        )
+        for p in players
+    )
+
+
+def layout_for(players: Iterable[dict], current: int, checkout: str, font: BdfFont, width: int) -> Tuple[TextRun, ...]:
+    """Return the text runs for the given dart state."""
+
+    return _layout(player_rows(players), current, checkout, font, width)
+
+
+@lru_cache(maxsize=64)
+def _layout(rows: Tuple[PlayerRow, ...], current: int, checkout: str, font: BdfFont, width: int) -> Tuple[TextRun, ...]:
+    if not rows:
+        return (TextRun(2, 12, ROLE_NORMAL, "Keine Spieler"),)
+
+    text_w = font.text_width
+    max_score_w = max(text_w(r[1]) for r in rows)
+    max_sets_w = max(text_w(r[2]) for r in rows)
+    max_legs_w = max(text_w(r[3]) for r in rows)
+
+    # Spaltenpositionen (von rechts nach links)
+    x_legs = width - max_legs_w - PADDING
+    x_sets = x_legs - max_sets_w - COLUMN_GAP
+    x_score = x_sets - max_score_w - COLUMN_GAP
+
+    runs = []
+    for idx, (name, score, sets, legs) in enumerate(rows):
+        role = ROLE_CURRENT if idx == current else ROLE_NORMAL
+        y = Y_START + idx * LINE_SPACING
+        runs.append(TextRun(X_NAME, y, role, name))
+        runs.append(TextRun(x_score + (max_score_w - text_w(score)), y, role, score))
+        runs.append(TextRun(x_sets + (max_sets_w - text_w(sets)), y, role, sets))
+        runs.append(TextRun(x_legs + (max_legs_w - text_w(legs)), y, role, legs))
+
+    if 1 <= len(rows) <= 3 and checkout:
+        y_checkout = Y_START + CHECKOUT_ROW * LINE_SPACING
+        x_checkout = max(0, (width - text_w(checkout)) // 2)
+        runs.append(TextRun(x_checkout, y_checkout, ROLE_CHECKOUT, checkout))
+    return tuple(runs)
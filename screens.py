@@ -0,0 +1,86 @@
+"""Matrix screens: clock/network info and the darts scoreboard.
+
+:class:`MatrixRenderer` owns the canvas, fonts and the scoreboard compositor
+of one :class:`display_backend.DisplayBackend` and draws a *view* - a plain
+dict with ``dart_mode``, ``players``, ``current``, ``checkout``, ``ssid`` and
+``ip``.  The same renderer is used by the in-process ``display_loop`` of the
+web server and by the dedicated render process (:mod:`render_process`).
+"""
+
+from datetime import datetime
+import os
+import time
+from typing import Optional
+
+import scoreboard
+from compositor import Compositor, Run
+from font_metrics import BdfFont
+
+SCOREBOARD_COLORS = {
+    scoreboard.ROLE_NORMAL: (255, 255, 255),
+    scoreboard.ROLE_CURRENT: (0, 255, 0),
+    scoreboard.ROLE_CHECKOUT: (255, 255, 0),
+}
+
+
+def empty_view() -> dict:
+    return {"dart_mode": False, "players": [], "current": 0, "checkout": "", "ssid": "?", "ip": "Keine IP"}
+
+
+def next_redraw(view: dict, playing: bool) -> Optional[float]:
+    """Seconds until the clock needs a redraw; ``None`` if only changes matter."""
+
+    if view.get("dart_mode") or playing:
+        return None
+    return 1.0 - (time.time() % 1.0)  # nächster Sekundenwechsel der Uhr
+
+
+class MatrixRenderer:
+    """Draw views on ``display`` using the BDF fonts in ``font_dir``."""
+
+    def __init__(self, display, font_dir: str) -> None:
+        self.display = display
+        self.width = display.width
+        self.height = display.height
+        self.canvas = display.create_frame_canvas()
+        self.font = display.load_font(os.path.join(font_dir, "5x8.bdf"))
+        self.text_color = display.color(255, 255, 0)
+        # Glyph-Breiten zum Messen ohne Off-Screen-DrawText
+        self.font_dart_metrics = BdfFont.load(os.path.join(font_dir, "9x18B.bdf"))
+        # Framebuffer für den Scoreboard-Modus; Text-Sprites werden gecacht
+        self.compositor = Compositor(self.width, self.height)
+
+    def draw_dart_screen(self, players, current: int, checkout: str) -> None:
+        """Alle Spieler untereinander: Name links, Score/Sets/Legs rechtsbündig; Checkout zentriert in Zeile 4 wenn <=3 Spieler."""
+        runs = scoreboard.layout_for(players, current, checkout, self.font_dart_metrics, self.width)
+        # Nur geänderte Zeilen werden neu geblittet, dann ein einziges SetImage
+        self.compositor.compose(
+            Run(self.font_dart_metrics, run.x, run.y, SCOREBOARD_COLORS[run.role], run.text) for run in runs
+        )
+        self.display.set_image(self.compositor.image(), 0, 0, canvas=self.canvas)
+
+    def draw_info_screen(self, ssid: str, ip: str) -> None:
+        display, canvas, font, color = self.display, self.canvas, self.font, self.text_color
+        display.clear(canvas)
+        now = datetime.now().strftime("%H:%M:%S")
+        if ssid != "Hotspot":
+            display.draw_text(canvas, font, 2, 20, color, f"IP: {ip}")
+            display.draw_text(canvas, font, 2, 35, color, f"SSID: {ssid}")
+            display.draw_text(canvas, font, 2, 50, color, f"Uhrzeit: {now}")
+        else:
+            display.draw_text(canvas, font, 2, 20, color, "Verbinde mit:")
+            display.draw_text(canvas, font, 2, 35, color, "LEDMatrix-Controller")
+            display.draw_text(canvas, font, 2, 45, color, f"IP: 192.168.50.1")
+            display.draw_text(canvas, font, 2, 50, color, f"Uhrzeit: {now}")
+
+    def swap(self) -> None:
+        self.canvas = self.display.swap_on_vsync(self.canvas)
+
+    def render(self, view: dict) -> None:
+        """Draw ``view`` and show it."""
+
+        if view.get("dart_mode"):
+            self.draw_dart_screen(view.get("players", []), int(view.get("current", 0)), str(view.get("checkout", "") or ""))
+        else:
+            self.draw_info_screen(view.get("ssid", "?"), view.get("ip", ""))
+        self.swap()
@@ -0,0 +1,173 @@
+"""Cached access to ``settings.json`` shared by the webserver and the relay.
+
+Both services used to re-read and re-parse the file on every request (the
+relay once per credential) and wrote it in place, so a crash mid-write could
+leave a truncated file.  :class:`SettingsStore` keeps the parsed settings in
+memory and only re-reads when the file's mtime or size changed, which costs
+one ``stat`` per access.  Writes go to a temporary file that replaces the
+original atomically.  Subscribers are called with the new settings and the
+changed keys after every write and after edits made by the other process
+(noticed on access or by :meth:`SettingsStore.watch`).
+"""
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[dict, Set[str]], None]
+
+
+class SettingsStore:
+    """In-memory copy of a JSON settings file, invalidated by mtime."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.reads = 0
+        self._data: dict = {}
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._subscribers: List[Callback] = []
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Inode ändert sich bei jedem atomaren Ersetzen, auch innerhalb eines mtime-Ticks
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _refresh(self) -> Set[str]:
+        """Re-read the file if it changed; return the changed keys."""
+
+        stamp = self._file_stamp()
+        if self._loaded and stamp == self._stamp:
+            return set()
+        if stamp is None:
+            data = {}
+        else:
+            with open(self.path, "r") as fh:
+                data = json.load(fh)
+            self.reads += 1
+        changed = _changed_keys(self._data, data) if self._loaded else set()
+        self._data, self._stamp, self._loaded = data, stamp, True
+        return changed
+
+    def get(self) -> dict:
+        """Return a copy of the current settings (``{}`` if the file is missing)."""
+
+        with self._lock:
+            changed = self._refresh()
+            data = copy.deepcopy(self._data)
+        if changed:
+            self._notify(data, changed)
+        return data
+
+    def value(self, key: str, default=None):
+        """Return a single setting."""
+
+        return self.get().get(key, default)
+
+    def save(self, data: dict) -> None:
+        """Replace the settings atomically and notify subscribers."""
+
+        with self._lock:
+            self._refresh()
+            changed = _changed_keys(self._data, data)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as fh:
+                    json.dump(data, fh, indent=4)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                if os.path.exists(self.path):
+                    os.chmod(tmp, os.stat(self.path).st_mode & 0o777)
+                os.replace(tmp, self.path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+            self._data = copy.deepcopy(data)
+            self._stamp, self._loaded = self._file_stamp(), True
+        if changed:
+            self._notify(copy.deepcopy(data), changed)
+
+    def update(self, changes: dict) -> dict:
+        """Merge ``changes`` into the settings, save and return the result."""
+
+        with self._lock:
+            data = self.get()
+            data.update(changes)
+            self.save(data)
+        return data
+
+    def subscribe(self, callback: Callback) -> None:
+        """Call ``callback(settings, changed_keys)`` after every change."""
+
+        self._subscribers.append(callback)
+
+    def _notify(self, data: dict, changed: Set[str]) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(data, changed)
+            except Exception:
+                logger.exception("Settings subscriber failed")
+
+    def _poll(self) -> None:
+        try:
+            self.get()
+        except (OSError, ValueError) as exc:
+            logger.warning("Reading %s failed: %s", self.path, exc)
+
+    def watch(self, interval: float = 2.0, scheduler=None):
+        """Poll the file's mtime so edits by another process reach subscribers.
+
+        With a :class:`timer_scheduler.TimerScheduler` the poll runs as one of
+        its jobs (returned), otherwise on an own thread (returned).
+        """
+
+        if self._watcher is None:
+            if scheduler is not None:
+                self._watcher = scheduler.call_every(interval, self._poll, name="settings-watch")
+            else:
+                def loop():
+                    while not self._stop.wait(interval):
+                        self._poll()
+
+                self._watcher = threading.Thread(target=loop, name="settings-watch", daemon=True)
+                self._watcher.start()
+        return self._watcher
+
+    def stop(self) -> None:
+        self._stop.set()
+        if isinstance(self._watcher, threading.Thread):
+            self._watcher.join()
+        elif self._watcher is not None:
+            self._watcher.cancel()
+
+
+def _changed_keys(old: dict, new: dict) -> Set[str]:
+    return {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+_stores: Dict[str, SettingsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(path: str) -> SettingsStore:
+    """Return the process-wide store for ``path``."""
+
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SettingsStore(path)
+        return store
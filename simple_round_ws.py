@@ -8,14 +8,20 @@ import logging
 
 import certifi
 import websocket
-import requests
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_socketio import SocketIO
 
 from autodarts_keycloak_client import AutodartsKeycloakClient
+from board_router import BoardRouter
+from dart_ipc import SOCKET_ENV
+from relay_pipeline import MATCHES_CHANNEL, MATCH_START, MessagePipeline
+from settings_store import store_for
+from timer_scheduler import TimerScheduler
+from ws_supervisor import ConnectionSupervisor
 
 AUTODARTS_WEBSOCKET_URL = "wss://api.autodarts.io/ms/v0/subscribe"
 SETTINGS_FILE = "/home/pi/rgbserver/settings.json"
+TOKEN_CACHE_FILE = os.getenv("AUTODARTS_TOKEN_CACHE", "/home/pi/rgbserver/autodarts_token.json")
 WEBSERVER_URL = os.getenv("WEBSERVER_URL", "http://localhost:5000")
 
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +32,13 @@ app = Flask(__name__)
 socketio = SocketIO(app, async_mode="threading")
 
 latest_round = {}
+DART_IPC_SOCKET = os.getenv(SOCKET_ENV)
+pipeline = MessagePipeline()
+# Wird in run_autodarts_ws aus load_boards() aufgebaut
+router = BoardRouter()
+supervisor = None
+# Token-Refresh und Settings-Watch teilen sich einen Timer-Thread
+timers = TimerScheduler(name="relay-timers")
 
 
 def get_env(name: str) -> str:
@@ -38,12 +51,9 @@ def get_env(name: str) -> str:
 
 
 def load_settings() -> dict:
-    """Load settings from ``SETTINGS_FILE``."""
+    """Return settings from ``SETTINGS_FILE`` (cached, re-read only after edits)."""
 
-    if not os.path.exists(SETTINGS_FILE):
-        return {}
-    with open(SETTINGS_FILE, "r") as fh:
-        return json.load(fh)
+    return store_for(SETTINGS_FILE).get()
 
 
 def get_setting(name: str) -> str:
@@ -68,8 +78,34 @@ def get_setting(name: str) -> str:
     return value
 
 
+def load_boards() -> list:
+    """Return the board-to-display mappings.
+
+    Taken from ``AUTODARTS_BOARDS`` (JSON) or the ``autodarts_boards``
+    setting; otherwise a single board from ``AUTODARTS_BOARD_ID`` forwarding
+    to ``WEBSERVER_URL``.
+    """
+
+    raw = os.getenv("AUTODARTS_BOARDS")
+    boards = json.loads(raw) if raw else load_settings().get("autodarts_boards")
+    if boards:
+        return boards
+    return [
+        {
+            "board_id": get_setting("AUTODARTS_BOARD_ID"),
+            "webserver_url": WEBSERVER_URL,
+            "ipc_socket": DART_IPC_SOCKET,
+        }
+    ]
+
+
 def run_autodarts_ws() -> None:
-    """Listen to the AutoDarts websocket and emit round events via SocketIO."""
+    """Listen to the AutoDarts websocket and emit round events via SocketIO.
+
+    All configured boards share this connection and token refresher.
+    """
+
+    global router, supervisor
 
     os.environ["SSL_CERT_FILE"] = certifi.where()
     kc = AutodartsKeycloakClient(
@@ -77,49 +113,50 @@ def run_autodarts_ws() -> None:
         password=get_setting("AUTODARTS_PASSWORD"),
         client_id=get_setting("AUTODARTS_CLIENT_ID"),
         client_secret=get_setting("AUTODARTS_CLIENT_SECRET"),
+        cache_file=TOKEN_CACHE_FILE,
     )
-    kc.start()
-    board_id = get_setting("AUTODARTS_BOARD_ID")
-    logger.info("Connecting to AutoDarts websocket for board %s", board_id)
-
+    # Header wird bei jedem neuen Token aktualisiert und beim nächsten Verbindungsaufbau genutzt
+    auth_header = {"Authorization": f"Bearer {kc.access_token}"}
+    kc.subscribe(lambda token: auth_header.update(Authorization=f"Bearer {token}"))
+    kc.start(scheduler=timers)
+    router = BoardRouter.from_config(load_boards())
+    router.start()
+    logger.info("Connecting to AutoDarts websocket for boards %s", ", ".join(router.routes))
 
     def on_open(ws):
-        subscribe = {
-            "channel": "autodarts.boards",
-            "type": "subscribe",
-            "topic": f"{board_id}.matches",
-        }
-        ws.send(json.dumps(subscribe))
+        supervisor.opened()
+        # Nach einem Reconnect: Dedup vergessen, Board- und Match-Topics neu
+        # abonnieren und den letzten Stand komplett an die Displays schicken
+        pipeline.reset()
+        for subscribe in router.subscriptions():
+            ws.send(json.dumps(subscribe))
+        router.resync()
 
     def on_message(ws, message):
         global latest_round
-        msg = json.loads(message)
-        channel = msg.get("channel")
-        data = msg.get("data", {})
-
-        if channel == "autodarts.boards":
-            if data.get("event") == "start" and "id" in data:
-                match_id = data["id"]
-                subscribe_match = {
-                    "channel": "autodarts.matches",
-                    "type": "subscribe",
-                    "topic": f"{match_id}.state",
-                }
-                ws.send(json.dumps(subscribe_match))
-        elif channel == "autodarts.matches":
-            turns = data.get("turns") or []
-            if turns:
-                latest_round = turns[0]
-                logger.info("Received round update: %s", latest_round)
-                socketio.emit("round", latest_round)
-                try:
-                    requests.post(f"{WEBSERVER_URL}/dart/update", json=latest_round, timeout=2)
-                    logger.info("Forwarded round to %s", WEBSERVER_URL)
-                except requests.RequestException as exc:
-                    logger.error("Forwarding to webserver failed: %s", exc)
-
-                except requests.RequestException as exc:
-                    print("Forwarding to webserver failed:", exc)
+        # Unveränderte oder irrelevante Nachrichten werden ohne Weiterleitung verworfen
+        event = pipeline.process(message)
+        if event is None:
+            return
+
+        if event.kind == MATCH_START:
+            previous = router.bind_match(event.board_id, event.match_id)
+            if previous:
+                ws.send(json.dumps({"channel": MATCHES_CHANNEL, "type": "unsubscribe", "topic": f"{previous}.state"}))
+            subscribe_match = {
+                "channel": MATCHES_CHANNEL,
+                "type": "subscribe",
+                "topic": f"{event.match_id}.state",
+            }
+            ws.send(json.dumps(subscribe_match))
+            return
+
+        # Nicht blockierend; ältere, noch nicht gesendete Stände werden ersetzt
+        route = router.dispatch(event.match_id, event.turn, event.state)
+        if event.turn is not None:
+            latest_round = event.turn
+            logger.info("Received round update: %s", latest_round)
+            socketio.emit("round", {**latest_round, "board_id": route.board_id if route else None})
 
 
     def on_error(ws, error):
@@ -128,29 +165,77 @@ def run_autodarts_ws() -> None:
     def on_close(ws, close_status_code, close_msg):
         logger.info("WebSocket closed")
 
-    headers = {"Authorization": f"Bearer {kc.access_token}"}
-    ws = websocket.WebSocketApp(
-        AUTODARTS_WEBSOCKET_URL,
-        header=headers,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close,
-    )
+    def connect():
+        # Bei jedem Verbindungsversuch das aktuelle Token verwenden
+        return websocket.WebSocketApp(
+            AUTODARTS_WEBSOCKET_URL,
+            header=dict(auth_header),
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close,
+        )
+
     sslopt = {"cert_reqs": ssl.CERT_REQUIRED, "ca_certs": certifi.where()}
-    ws.run_forever(sslopt=sslopt)
+    # Pings erkennen tote Verbindungen nach Sekunden statt erst beim TCP-Timeout
+    supervisor = ConnectionSupervisor(
+        connect, run_options={"sslopt": sslopt, "ping_interval": 20, "ping_timeout": 10}
+    )
+    supervisor.run()
 
 
 @app.route("/round")
 def get_round():
-    """Return the latest round data received from AutoDarts."""
+    """Return the latest round data received from AutoDarts.
 
+    ``?board=<id>`` returns the latest round of that board.
+    """
+
+    board_id = request.args.get("board")
+    if board_id:
+        route = router.routes.get(board_id)
+        return jsonify(route.latest_round if route else {})
     return jsonify(latest_round)
 
 
+@app.route("/stats")
+def get_stats():
+    """Return connection, message pipeline, timer and per-board forwarding stats."""
+
+    return jsonify(
+        {
+            "connection": supervisor.stats() if supervisor else None,
+            "messages": pipeline.stats(),
+            "timers": timers.stats(),
+            **router.stats(),
+        }
+    )
+
+
+RELAY_KEYS = {
+    "autodarts_username",
+    "autodarts_password",
+    "autodarts_client_id",
+    "autodarts_client_secret",
+    "autodarts_board_id",
+    "autodarts_boards",
+}
+
+
+def on_settings_changed(settings: dict, changed: set) -> None:
+    """Log edits made in the web UI that only take effect after a restart."""
+
+    if changed & RELAY_KEYS:
+        logger.warning("AutoDarts settings changed (%s), restart the relay to apply", ", ".join(sorted(changed & RELAY_KEYS)))
+
+
 def main() -> None:
     """Entry point used when running this module as a script."""
 
+    store = store_for(SETTINGS_FILE)
+    store.subscribe(on_settings_changed)
+    store.watch(scheduler=timers)
+    timers.start()
     threading.Thread(target=run_autodarts_ws, daemon=True).start()
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8080"))
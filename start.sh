@@ -4,6 +4,10 @@ set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR"
 
+# Optional: lokaler Kanal Relay -> Webserver statt HTTP (/dart/update bleibt verfügbar).
+# Zum Aktivieren einkommentieren oder DART_IPC_SOCKET vor dem Start setzen.
+# export DART_IPC_SOCKET="${DART_IPC_SOCKET:-/tmp/autodarts_matrix_dart.sock}"
+
 echo "[start.sh] Launching simple_round_ws.py"
 python3 -u simple_round_ws.py &
 
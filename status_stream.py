@@ -0,0 +1,121 @@
+"""Server-sent event stream of the dart status for browser viewers.
+
+The dart test page used to poll ``/dart/status`` every second, so each open
+tab added a Flask request per second on the Pi.  :class:`StatusBroadcaster`
+is a single producer: it wakes on the shared :class:`ChangeSignal`, builds the
+status once, encodes it once as an SSE message and hands the same bytes to
+every subscriber.  Unchanged snapshots are not re-sent; a heartbeat with the
+current snapshot goes out every ``heartbeat`` seconds so clients can resync
+counters that tick locally (and dead connections are noticed).
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from display_events import ChangeSignal
+
+RETRY_MS = 3000
+
+
+def encode_event(data: dict, event: str = "status") -> bytes:
+    """Return ``data`` as one SSE message."""
+
+    body = json.dumps(data, separators=(",", ":"))
+    return f"event: {event}\ndata: {body}\n\n".encode("utf-8")
+
+
+class StatusBroadcaster:
+    """Publish ``snapshot()`` to all subscribers when it changes.
+
+    Keys listed in ``volatile`` (e.g. an elapsed-seconds counter) are ignored
+    when deciding whether the snapshot changed; they are refreshed with the
+    next change or heartbeat.
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], dict],
+        signal: ChangeSignal,
+        heartbeat: float = 15.0,
+        volatile: Iterable[str] = (),
+    ) -> None:
+        self.snapshot = snapshot
+        self.signal = signal
+        self.heartbeat = heartbeat
+        self.volatile = tuple(volatile)
+        self.published = 0
+        self.viewers = 0
+        self._message: Optional[bytes] = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._run = True
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> threading.Thread:
+        """Start the producer thread (once)."""
+
+        with self._start_lock:
+            if self._thread is None:
+                self._publish(self.snapshot())
+                self._thread = threading.Thread(target=self._producer, name="status-stream", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        """Stop the producer and end all subscriber streams."""
+
+        with self._cond:
+            self._run = False
+            self._cond.notify_all()
+        self.signal.notify()
+        if self._thread:
+            self._thread.join()
+
+    def _stable(self, data: dict) -> dict:
+        return {key: value for key, value in data.items() if key not in self.volatile}
+
+    def _publish(self, data: dict) -> None:
+        message = encode_event(data)
+        with self._cond:
+            self._message = message
+            self._seq += 1
+            self.published += 1
+            self._cond.notify_all()
+
+    def _producer(self) -> None:
+        last = self._stable(self.snapshot())
+        last_sent = time.monotonic()
+        while self._run:
+            seen = self.signal.version
+            remaining = max(0.0, last_sent + self.heartbeat - time.monotonic())
+            self.signal.wait(seen, remaining)
+            if not self._run:
+                return
+            data = self.snapshot()
+            stable = self._stable(data)
+            if stable != last or time.monotonic() - last_sent >= self.heartbeat:
+                self._publish(data)
+                last, last_sent = stable, time.monotonic()
+
+    def subscribe(self) -> Iterator[bytes]:
+        """Yield the current message, then every newly published one."""
+
+        self.start()
+        with self._cond:
+            self.viewers += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode("ascii")
+            seq = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seq or not self._run)
+                    if not self._run:
+                        return
+                    seq, message = self._seq, self._message
+                yield message
+        finally:
+            with self._cond:
+                self.viewers -= 1
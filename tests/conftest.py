@@ -0,0 +1,95 @@
+import pathlib
+import sys
+import time
+
+import pytest
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+def write_bdf(path, width=9, height=18, descent=4, advances=None, chars=range(32, 127)):
+    """Write a small BDF font whose glyphs are filled rectangles.
+
+    ``advances`` maps characters to a ``DWIDTH`` differing from ``width``.
+    """
+
+    advances = advances or {}
+    lines = [
+        "STARTFONT 2.1",
+        f"FONTBOUNDINGBOX {width} {height} 0 {-descent}",
+        f"CHARS {len(chars)}",
+    ]
+    row = format((1 << width) - 1 << (8 - width % 8) % 8, "0{}X".format((width + 7) // 8 * 2))
+    for code in chars:
+        lines += [
+            f"STARTCHAR U+{code:04X}",
+            f"ENCODING {code}",
+            f"DWIDTH {advances.get(chr(code), width)} 0",
+            f"BBX {width} {height} 0 {-descent}",
+            "BITMAP",
+        ]
+        lines += [row] * height
+        lines.append("ENDCHAR")
+    lines.append("ENDFONT")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def write_gif(path, frames=3, size=(8, 4), duration=40):
+    """Write an animated GIF of solid frames; every frame has a different colour."""
+
+    images = [Image.new("RGB", size, (255, i * 60 % 256, 0)) for i in range(frames)]
+    images[0].save(path, format="GIF", save_all=True, append_images=images[1:], duration=duration, loop=0)
+    return str(path)
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll ``predicate`` until it is true; fail the test after ``timeout`` seconds."""
+
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def bdf_path(tmp_path):
+    return write_bdf(tmp_path / "test.bdf", advances={"1": 5, " ": 4})
+
+
+@pytest.fixture(scope="session")
+def webserver(tmp_path_factory):
+    """Import ``webserver`` and run its ``setup()`` with the virtual display backend and temp folders."""
+
+    import importlib
+    import json
+    import os
+
+    root = tmp_path_factory.mktemp("rgbserver")
+    fonts = root / "fonts"
+    fonts.mkdir()
+    write_bdf(fonts / "5x8.bdf", width=5, height=8, descent=2)
+    write_bdf(fonts / "9x18B.bdf")
+    (root / "gifs").mkdir()
+    (root / "settings.json").write_text(json.dumps({"rows": 64, "cols": 64, "chain_length": 3}))
+
+    env = {
+        "MATRIX_BACKEND": "virtual",
+        "SETTINGS_FILE": str(root / "settings.json"),
+        "PLAYLIST_FILE": str(root / "playlist.json"),
+        "GIF_FOLDER": str(root / "gifs"),
+        "FONT_DIR": str(fonts),
+    }
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        module = importlib.import_module("webserver")
+        module.setup()
+    finally:
+        for key, value in old.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return module
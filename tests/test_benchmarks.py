@@ -0,0 +1,27 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "benchmarks"))
+from run_benchmarks import compare
+
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = {
+        "draw_ms": {"value": 1.0, "unit": "ms", "better": "lower"},
+        "gif_fps": {"value": 50.0, "unit": "fps", "better": "higher"},
+        "new_metric": {"value": 0, "unit": "ms"},
+    }
+    results = {
+        "draw_ms": {"value": 1.5, "unit": "ms", "better": "lower"},
+        "gif_fps": {"value": 30.0, "unit": "fps", "better": "higher"},
+        "new_metric": {"value": 3.0, "unit": "ms"},
+    }
+    regressions = compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("draw_ms")
+
+
+def test_compare_within_threshold():
+    baseline = {"draw_ms": {"value": 1.0, "unit": "ms"}}
+    results = {"draw_ms": {"value": 1.1, "unit": "ms"}}
+    assert compare(results, baseline, threshold=0.2) == []
@@ -0,0 +1,81 @@
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import simple_round_ws
+from board_router import BoardRouter
+
+
+class FakeForwarder:
+    def __init__(self):
+        self.submitted = []
+        self.resyncs = 0
+
+    def resync(self):
+        self.resyncs += 1
+
+    def submit(self, payload):
+        self.submitted.append(payload)
+
+    def stats(self):
+        return {"forwarded": len(self.submitted)}
+
+
+def make_router():
+    router = BoardRouter(clock=lambda: 100.0)
+    a, b = FakeForwarder(), FakeForwarder()
+    router.add("board-a", a)
+    router.add("board-b", b)
+    return router, a, b
+
+
+def test_matches_are_routed_to_their_board():
+    router, a, b = make_router()
+    router.bind_match("board-a", "m1")
+    router.bind_match("board-b", "m2")
+    router.dispatch("m2", {"id": "t"}, {"players": [{"name": "B"}]})
+    router.dispatch("m1", None, {"players": [{"name": "A"}]})
+    router.dispatch("unknown", None, {"players": []})
+    assert a.submitted == [{"players": [{"name": "A"}]}]
+    assert b.submitted == [{"players": [{"name": "B"}]}]
+    stats = router.stats()
+    assert stats["unrouted"] == 1
+    assert stats["boards"]["board-b"]["updates"] == 1
+    assert router.routes["board-b"].latest_round == {"id": "t"}
+
+
+def test_new_match_replaces_previous_on_board():
+    router, _a, _b = make_router()
+    assert router.bind_match("board-a", "m1") is None
+    assert router.bind_match("board-a", "m3") == "m1"
+    assert router.route_for("m1") is None
+    topics = [sub["topic"] for sub in router.subscriptions()]
+    assert topics == ["board-a.matches", "board-b.matches", "m3.state"]
+
+
+def test_resync_resends_latest_state():
+    router, a, b = make_router()
+    router.bind_match("board-a", "m1")
+    router.dispatch("m1", None, {"players": [{"name": "A"}]})
+    router.resync()
+    assert a.submitted == [{"players": [{"name": "A"}]}] * 2
+    assert (a.resyncs, b.resyncs, b.submitted) == (1, 1, [])
+
+
+def test_single_board_takes_unbound_matches():
+    router = BoardRouter()
+    forwarder = FakeForwarder()
+    router.add("only", forwarder)
+    assert router.dispatch("m9", None, {"players": []}).board_id == "only"
+
+
+def test_load_boards_from_settings(monkeypatch, tmp_path):
+    boards = [{"board_id": "a", "webserver_url": "http://10.0.0.2:5000"}]
+    cfg = tmp_path / "settings.json"
+    cfg.write_text(json.dumps({"autodarts_boards": boards}))
+    monkeypatch.delenv("AUTODARTS_BOARDS", raising=False)
+    monkeypatch.setattr(simple_round_ws, "SETTINGS_FILE", str(cfg))
+    assert simple_round_ws.load_boards() == boards
+    router = BoardRouter.from_config(boards)
+    assert router.routes["a"].forwarder.url == "http://10.0.0.2:5000/dart/update"
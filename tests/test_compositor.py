@@ -0,0 +1,55 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from compositor import Compositor, Run, SpriteCache, render_sprite
+from conftest import write_bdf
+from font_metrics import BdfFont
+
+
+def test_sprite_matches_glyph_boxes(tmp_path):
+    font = BdfFont.load(write_bdf(tmp_path / "f.bdf", width=5, height=8, descent=2, advances={"i": 3}))
+    sprite = render_sprite(font, "ai", (255, 0, 0))
+    assert sprite.mask.shape == (8, 8)
+    assert sprite.top == -6
+    # "a" füllt 5 Spalten, "i" wird auf seine Advance-Breite 3 beschnitten
+    assert sprite.mask.all()
+    assert tuple(sprite.rgb[0, 0]) == (255, 0, 0)
+
+
+def test_compose_redraws_only_changed_rows(bdf_path):
+    font = BdfFont.load(bdf_path)
+    comp = Compositor(192, 64)
+    white = (255, 255, 255)
+    runs = [Run(font, 2, 12, white, "A"), Run(font, 2, 44, white, "B")]
+    assert comp.compose(runs)
+    assert comp.rows_redrawn == 2
+    assert tuple(comp.framebuffer[0, 2]) == white
+    assert not comp.compose(runs)
+
+    comp.compose([Run(font, 2, 12, white, "A"), Run(font, 20, 44, white, "B")])
+    assert comp.rows_redrawn == 3
+    assert not comp.framebuffer[30:48, 2:11].any()
+    assert comp.framebuffer[30:48, 20:29].all()
+    assert comp.image().size == (192, 64)
+
+
+def test_overlapping_rows_are_restored(bdf_path):
+    font = BdfFont.load(bdf_path)
+    comp = Compositor(192, 64)
+    green = (0, 255, 0)
+    comp.compose([Run(font, 2, 12, green, "A"), Run(font, 2, 28, green, "B")])
+    # Zeile 1 ändert sich; ihr Band überlappt Zeile 2 (Unterlänge 4 px)
+    comp.compose([Run(font, 2, 12, green, "C"), Run(font, 2, 28, green, "B")])
+    assert comp.rows_redrawn == 4
+    assert comp.framebuffer[14:32, 2:11, 1].all()
+
+
+def test_sprite_cache_reuses_sprites(bdf_path):
+    font = BdfFont.load(bdf_path)
+    cache = SpriteCache(max_entries=2)
+    first = cache.get(font, "501", (255, 255, 255))
+    assert cache.get(font, "501", (255, 255, 255)) is first
+    cache.get(font, "60", (255, 255, 255))
+    cache.get(font, "501", (0, 255, 0))
+    assert len(cache) == 2
@@ -0,0 +1,62 @@
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from dart_delta import DeltaTracker, StaleUpdate, diff_players
+
+
+def new_state():
+    state = {"players": [], "current": 0, "checkout": "", "version": 0}
+    tracker = DeltaTracker()
+    tracker.apply(state, {"players": [{"id": "a", "name": "A", "score": 501}, {"id": "b", "name": "B", "score": 501}]})
+    return state, tracker
+
+
+def test_patches_bump_version_once():
+    state, tracker = new_state()
+    assert state["version"] == 1
+    rejected = tracker.apply(state, {"base_version": 1, "patches": [{"index": 0, "score": 441}, {"id": "b", "legs": 1}]})
+    assert rejected == []
+    assert state["version"] == 2
+    assert state["players"][0]["score"] == 441
+    assert state["players"][1]["legs"] == 1
+
+
+def test_unchanged_update_keeps_version():
+    state, tracker = new_state()
+    tracker.apply(state, {"patches": [{"index": 0, "score": 501}], "checkout": ""})
+    assert state["version"] == 1
+
+
+def test_stale_patch_does_not_overwrite_newer_field():
+    state, tracker = new_state()
+    tracker.apply(state, {"base_version": 1, "patches": [{"index": 0, "score": 441}]})
+    # verspätete Nachricht, die noch auf Version 1 basiert
+    rejected = tracker.apply(state, {"base_version": 1, "patches": [{"index": 0, "score": 501}, {"index": 1, "score": 400}]})
+    assert rejected == ["0.score"]
+    assert state["players"][0]["score"] == 441
+    assert state["players"][1]["score"] == 400
+
+
+def test_stale_full_update_is_rejected():
+    state, tracker = new_state()
+    tracker.apply(state, {"patches": [{"index": 0, "score": 441}]})
+    with pytest.raises(StaleUpdate) as exc:
+        tracker.apply(state, {"base_version": 1, "players": [{"name": "A", "score": 501}]})
+    assert exc.value.version == 2
+
+
+def test_patching_does_not_mutate_previous_list():
+    state, tracker = new_state()
+    old_players = state["players"]
+    tracker.apply(state, {"patches": [{"index": 0, "score": 1}]})
+    assert old_players[0]["score"] == 501
+
+
+def test_diff_players():
+    old = [{"name": "A", "score": 501}, {"name": "B", "score": 501}]
+    new = [{"name": "A", "score": 441}, {"name": "B", "score": 501}]
+    assert diff_players(old, new) == [{"score": 441, "index": 0}]
+    assert diff_players(old, new[:1]) is None
@@ -0,0 +1,41 @@
+import pathlib
+import socket
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import dart_ipc
+from conftest import wait_until
+from dart_ipc import DartStateReceiver, DartStateSender
+
+
+def test_roundtrip(tmp_path):
+    received = []
+    path = str(tmp_path / "dart.sock")
+    receiver = DartStateReceiver(path, received.append)
+    receiver.start()
+    sender = DartStateSender(path)
+    sender.send({"players": [{"name": "A", "score": 501}], "current": 0})
+    sender.send({"checkout": "D20"})
+    wait_until(lambda: len(received) == 2)
+    assert received[0]["players"][0]["score"] == 501
+    assert sender.seq == 2
+
+    raw = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    raw.sendto(b"garbage-data", path)
+    wait_until(lambda: receiver.rejected == 1)
+    receiver.stop()
+    assert not pathlib.Path(path).exists()
+
+
+def test_send_without_listener_raises(tmp_path):
+    with pytest.raises(OSError):
+        DartStateSender(str(tmp_path / "missing.sock")).send({})
+
+
+def test_decode_rejects_other_versions():
+    message = dart_ipc.HEADER.pack(dart_ipc.MAGIC, 99, 1) + b"{}"
+    with pytest.raises(ValueError):
+        dart_ipc.decode(message)
+    assert dart_ipc.decode(dart_ipc.encode({"a": 1}, 7)) == (7, {"a": 1})
@@ -0,0 +1,45 @@
+import pathlib
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import display_backend
+from display_backend import VirtualMatrixBackend
+
+
+def test_virtual_backend_records_frames(bdf_path):
+    backend = VirtualMatrixBackend({"rows": 8, "cols": 8, "chain_length": 2})
+    canvas = backend.create_frame_canvas()
+    font = backend.load_font(bdf_path)
+    assert backend.draw_text(canvas, font, 0, 14, backend.color(255, 0, 0), "1") == 5
+    canvas = backend.swap_on_vsync(canvas)
+    assert backend.frame_count == 1
+    assert tuple(backend.last_frame[0, 0]) == (255, 0, 0)
+
+    backend.set_image(Image.new("RGB", (4, 4), (0, 0, 255)), 14, 6)
+    timestamp, pixels = backend.frames[-1]
+    assert tuple(pixels[7, 15]) == (0, 0, 255)
+    assert timestamp >= backend.frames[0][0]
+
+    backend.clear()
+    assert not backend.last_frame.any()
+    assert backend.frame_count == 3
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("MATRIX_BACKEND", "virtual")
+    assert isinstance(display_backend.create_backend({"display_backend": "rgbmatrix"}), VirtualMatrixBackend)
+    monkeypatch.setenv("MATRIX_BACKEND", "nope")
+    with pytest.raises(RuntimeError):
+        display_backend.create_backend({})
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class NoSwap(display_backend.DisplayBackend):
+        def create_frame_canvas(self):
+            return None
+
+    with pytest.raises(TypeError):
+        NoSwap()
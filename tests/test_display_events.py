@@ -0,0 +1,31 @@
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from display_events import ChangeSignal
+
+
+def test_wait_returns_immediately_after_missed_change():
+    signal = ChangeSignal()
+    seen = signal.version
+    signal.notify()
+    assert signal.wait(seen, timeout=5) == seen + 1
+
+
+def test_wait_times_out_without_change():
+    signal = ChangeSignal()
+    started = time.monotonic()
+    assert signal.wait(signal.version, timeout=0.02) == 0
+    assert time.monotonic() - started >= 0.02
+
+
+def test_notify_wakes_waiter():
+    signal = ChangeSignal()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(signal.wait(0, timeout=5)))
+    waiter.start()
+    signal.notify()
+    waiter.join(1)
+    assert result == [1]
@@ -0,0 +1,22 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from font_metrics import BdfFont
+from conftest import write_bdf
+
+
+def test_text_width_sums_advances(bdf_path):
+    font = BdfFont.load(bdf_path)
+    assert font.height == 18
+    assert font.baseline == 14
+    assert font.char_width("5") == 9
+    assert font.text_width("501") == 9 + 9 + 5
+    assert font.text_width("") == 0
+
+
+def test_unknown_characters(tmp_path):
+    font = BdfFont.load(write_bdf(tmp_path / "a.bdf", chars=[65]))
+    assert font.text_width("A€") == 9
+    font = BdfFont.load(write_bdf(tmp_path / "b.bdf", chars=[65, 0xFFFD], advances={"�": 3}))
+    assert font.text_width("A€") == 12
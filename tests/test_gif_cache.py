@@ -0,0 +1,46 @@
+import os
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import write_gif
+from gif_cache import GifFrameCache
+
+
+def test_get_decodes_once(tmp_path):
+    path = write_gif(tmp_path / "a.gif")
+    cache = GifFrameCache(budget_bytes=10_000)
+    first = cache.get(path)
+    second = cache.get(path)
+    assert first is second
+    assert len(first) == 3
+    assert first.durations == [40, 40, 40]
+    assert first.frames[0].mode == "RGB"
+    assert cache.stats()["hits"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    a = write_gif(tmp_path / "a.gif")
+    b = write_gif(tmp_path / "b.gif")
+    c = write_gif(tmp_path / "c.gif")
+    # Jede GIF belegt 3 * 8 * 4 * 3 = 288 Bytes
+    cache = GifFrameCache(budget_bytes=600)
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)
+    cache.get(c)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["used_bytes"] == 576
+    cache.get(a)
+    assert cache.stats()["hits"] == 2
+
+
+def test_reloads_after_modification(tmp_path):
+    path = write_gif(tmp_path / "a.gif", frames=2)
+    cache = GifFrameCache(budget_bytes=10_000)
+    assert len(cache.get(path)) == 2
+    write_gif(tmp_path / "a.gif", frames=4)
+    os.utime(path, (1, 1))
+    assert len(cache.get(path)) == 4
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,72 @@
+import json
+import os
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import write_gif
+from gif_index import INDEX_NAME, GifIndex
+
+
+def test_sync_indexes_metadata(tmp_path):
+    write_gif(tmp_path / "a.gif")
+    (tmp_path / "pg").mkdir()
+    write_gif(tmp_path / "pg" / "b.gif", frames=2)
+    (tmp_path / "notes.txt").write_text("x")
+
+    index = GifIndex(str(tmp_path))
+    assert index.sync() == 2
+    entry = index.get("a.gif")
+    assert (entry.width, entry.height, entry.frames, entry.duration_ms) == (8, 4, 3, 120)
+    assert entry.size == os.path.getsize(tmp_path / "a.gif")
+    assert index.names("pg") == ["pg/b.gif"]
+    assert index.sync() == 0
+
+    reloaded = GifIndex(str(tmp_path))
+    reloaded.load()
+    assert reloaded.get("a.gif") == entry
+
+
+def test_incremental_add_remove_and_order(tmp_path):
+    index = GifIndex(str(tmp_path))
+    write_gif(tmp_path / "old.gif")
+    os.utime(tmp_path / "old.gif", (1000, 1000))
+    write_gif(tmp_path / "new.gif")
+    index.add("old.gif")
+    index.add("new.gif")
+    assert index.names() == ["new.gif", "old.gif"]
+
+    index.remove("old.gif")
+    data = json.loads((tmp_path / INDEX_NAME).read_text())
+    assert [e["name"] for e in data["entries"]] == ["new.gif"]
+
+
+def test_sync_drops_deleted_and_reprobes_changed(tmp_path):
+    write_gif(tmp_path / "a.gif")
+    write_gif(tmp_path / "b.gif")
+    index = GifIndex(str(tmp_path))
+    index.sync()
+    os.remove(tmp_path / "b.gif")
+    write_gif(tmp_path / "a.gif", frames=5)
+    assert index.sync() == 2
+    assert index.get("b.gif") is None
+    assert index.get("a.gif").frames == 5
+
+
+def test_refresh_only_rescans_changed_folders(tmp_path, monkeypatch):
+    (tmp_path / "pg").mkdir()
+    write_gif(tmp_path / "pg" / "a.gif")
+    index = GifIndex(str(tmp_path))
+    assert index.refresh("pg") == 1
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or real_scandir(path))
+    assert index.refresh("pg") == 0
+    assert scans == []
+
+    write_gif(tmp_path / "pg" / "b.gif")
+    os.remove(tmp_path / "pg" / "a.gif")
+    os.utime(tmp_path / "pg", ns=(0, os.stat(tmp_path / "pg").st_mtime_ns + 1))
+    assert index.refresh("pg") == 2
+    assert index.names("pg") == ["pg/b.gif"]
+    assert len(scans) == 1
@@ -0,0 +1,90 @@
+import pathlib
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import gif_pack
+from conftest import write_gif
+from gif_jobs import DONE, FAILED, QueueFull, UploadJob, UploadJobQueue, claim_name, process_upload, validate
+
+
+def test_validate_rejects_non_gifs(tmp_path):
+    validate(write_gif(tmp_path / "ok.gif"))
+    png = tmp_path / "image.gif"
+    Image.new("RGB", (4, 4)).save(png, format="PNG")
+    with pytest.raises(ValueError):
+        validate(str(png))
+    truncated = tmp_path / "cut.gif"
+    truncated.write_bytes((tmp_path / "ok.gif").read_bytes()[:40])
+    with pytest.raises(ValueError):
+        validate(str(truncated))
+
+
+def test_claim_name_never_overwrites(tmp_path):
+    (tmp_path / "a.gif").write_bytes(b"x")
+    (tmp_path / "a_1.gif").write_bytes(b"x")
+    assert claim_name(str(tmp_path), "a.gif") == "a_2.gif"
+    assert claim_name(str(tmp_path), "b.gif") == "b.gif"
+
+
+def test_process_upload_stores_packs_and_probes(tmp_path):
+    root = tmp_path / "gifs"
+    root.mkdir()
+    write_gif(root / "x.gif")
+    tmp = write_gif(tmp_path / "upload.job", frames=3)
+    result = process_upload(tmp, str(root), "x.gif", 16, 8)
+    assert result["name"] == "x_1.gif"
+    assert result["entry"].frames == 3
+    assert gif_pack.is_pack_fresh(str(root / "x_1.gif"))
+    assert not pathlib.Path(tmp).exists()
+
+
+def test_queue_reports_results_and_limits_pending(tmp_path):
+    done = []
+    queue = UploadJobQueue(lambda: ThreadPoolExecutor(max_workers=1), on_done=done.append, max_pending=5)
+    root = tmp_path / "gifs"
+    root.mkdir()
+    good = queue.submit(write_gif(tmp_path / "1.job"), str(root), "good.gif", 8, 8)
+    (tmp_path / "2.job").write_bytes(b"nope")
+    bad = queue.submit(str(tmp_path / "2.job"), str(root), "bad.gif", 8, 8)
+    assert queue.wait_all(10)
+    assert (good.state, bad.state) == (DONE, FAILED)
+    assert [r["name"] for r in done] == ["good.gif"]
+    assert sorted(p.name for p in root.iterdir()) == ["good.gif", "good.gif.pack"]
+
+    queue.max_pending = 0
+    with pytest.raises(QueueFull):
+        queue.submit(str(tmp_path / "3.job"), str(root), "c.gif", 8, 8)
+
+
+class BrokenExecutor:
+    def submit(self, *args):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced(tmp_path):
+    broken = BrokenExecutor()
+    executors = [broken, ThreadPoolExecutor(max_workers=1)]
+    queue = UploadJobQueue(lambda: executors.pop(0))
+    root = tmp_path / "gifs"
+    root.mkdir()
+    job = queue.submit(write_gif(tmp_path / "1.job"), str(root), "a.gif", 8, 8)
+    assert queue.wait_all(10)
+    assert job.state == DONE
+    assert broken.shut_down and not executors
+
+
+def test_job_of_dead_worker_fails():
+    queue = UploadJobQueue(lambda: None)
+    job = UploadJob(1, "a.gif")
+    future = Future()
+    future.set_exception(BrokenProcessPool("worker died"))
+    queue._finish(job, future)
+    assert job.state == FAILED and "Worker" in job.error
@@ -0,0 +1,40 @@
+import os
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import gif_pack
+from conftest import write_gif
+from gif_cache import GifFrameCache
+
+
+def test_transcode_crops_and_pads(tmp_path):
+    path = write_gif(tmp_path / "a.gif", size=(8, 4))
+    gif_pack.transcode(path, width=6, height=5)
+    pack = gif_pack.FramePack(gif_pack.pack_path_for(path))
+    assert len(pack) == 3
+    assert pack.durations == [40, 40, 40]
+    frame = pack[1]
+    assert frame.mode == "RGB"
+    assert frame.size == (6, 5)
+    assert frame.getpixel((5, 3)) == (255, 60, 0)
+    assert frame.getpixel((0, 4)) == (0, 0, 0)
+
+
+def test_cache_prefers_fresh_pack(tmp_path):
+    path = write_gif(tmp_path / "a.gif")
+    gif_pack.transcode(path, width=8, height=4)
+    frames = GifFrameCache().get(path)
+    assert isinstance(frames.frames, gif_pack.FramePack)
+
+    os.utime(gif_pack.pack_path_for(path), (1, 1))
+    assert not gif_pack.is_pack_fresh(path)
+    assert isinstance(GifFrameCache().get(path).frames, list)
+
+
+def test_migrate_skips_fresh_packs(tmp_path):
+    write_gif(tmp_path / "a.gif")
+    (tmp_path / "pg").mkdir()
+    write_gif(tmp_path / "pg" / "b.gif")
+    assert gif_pack.migrate(str(tmp_path), 8, 4) == 2
+    assert gif_pack.migrate(str(tmp_path), 8, 4) == 0
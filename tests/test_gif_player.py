@@ -0,0 +1,144 @@
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import wait_until
+from gif_player import FrameScheduler, GifPlayer, GifPrefetcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeStop(threading.Event):
+    """Stop event whose wait() advances the fake clock instead of sleeping."""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout
+        return self.is_set()
+
+
+def test_work_time_is_subtracted_from_wait():
+    clock = FakeClock()
+    shown = []
+
+    def show(frame):
+        shown.append((frame, clock.now))
+        clock.now += 0.03  # SetImage dauert 30 ms
+
+    scheduler = FrameScheduler(clock=clock)
+    scheduler.run("a.gif", [(i, 100) for i in range(5)], show, FakeStop(clock))
+    assert [t for _, t in shown] == [0.0, 0.1, 0.2, 0.30000000000000004, 0.4]
+    stats = scheduler.stats()["a.gif"]
+    assert stats["frames_shown"] == 5
+    assert stats["frames_dropped"] == 0
+    assert stats["actual_fps"] == stats["intended_fps"] == 10.0
+
+
+def test_frames_are_dropped_when_behind():
+    clock = FakeClock()
+    shown = []
+
+    def show(frame):
+        shown.append(frame)
+        clock.now += 0.25 if frame == 0 else 0.01
+
+    scheduler = FrameScheduler(clock=clock)
+    scheduler.run("a.gif", [(i, 100) for i in range(5)], show, FakeStop(clock))
+    assert shown == [0, 2, 3, 4]
+    stats = scheduler.stats()["a.gif"]
+    assert stats["frames_dropped"] == 1
+    assert stats["frames_late"] == 1
+
+
+def test_stop_interrupts_playback():
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    shown = []
+
+    def show(frame):
+        shown.append(frame)
+        stop.set()
+
+    FrameScheduler(clock=clock).run("a.gif", [(i, 100) for i in range(5)], show, stop)
+    assert shown == [0]
+
+
+class CountingCache:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, path):
+        from gif_cache import GifFrames
+
+        self.calls.append(path)
+        return GifFrames(path=path, frames=[path], durations=[100], nbytes=10)
+
+
+def test_prefetcher_decodes_upcoming_in_background():
+    cache = CountingCache()
+    prefetcher = GifPrefetcher(cache, depth=2, budget_bytes=100)
+    prefetcher.schedule(["b.gif", "c.gif", "d.gif"], current="a.gif")
+    assert prefetcher.take("b.gif").path == "b.gif"
+    assert prefetcher.take("c.gif").path == "c.gif"
+    assert cache.calls == ["b.gif", "c.gif"]
+
+
+def test_prefetcher_respects_budget():
+    cache = CountingCache()
+    prefetcher = GifPrefetcher(cache, depth=2, budget_bytes=10)
+    prefetcher.schedule(["b.gif", "c.gif"])
+    prefetcher.take("c.gif")
+    prefetcher.take("b.gif")
+    # c.gif passte nicht mehr ins Budget und wird beim take() erneut geholt
+    assert cache.calls == ["b.gif", "c.gif", "c.gif"]
+
+
+def make_player(shown, cleared):
+    cache = CountingCache()
+    return GifPlayer(
+        GifPrefetcher(cache, depth=0),
+        FrameScheduler(),
+        show=shown.append,
+        clear=lambda: cleared.append(True),
+    )
+
+
+def test_player_commands_return_immediately():
+    shown, cleared = [], []
+    player = make_player(shown, cleared)
+    player.play(["a.gif"], source="gif")
+    wait_until(lambda: shown)
+    assert player.is_playing()
+    assert player.status()["current"] == "a.gif"
+    assert player.source == "gif"
+
+    started = time.monotonic()
+    player.stop()
+    assert time.monotonic() - started < 0.05
+    wait_until(lambda: not player.is_playing())
+    assert cleared == [True]
+    assert player.status()["state"] == "stopped"
+
+
+def test_player_switches_without_clearing():
+    shown, cleared = [], []
+    player = make_player(shown, cleared)
+    player.play(["a.gif"])
+    wait_until(lambda: shown)
+    player.play(["b.gif"], source="pg")
+    wait_until(lambda: "b.gif" in shown)
+    assert cleared == []
+    assert player.source == "pg"
+    player.stop()
+    wait_until(lambda: cleared)
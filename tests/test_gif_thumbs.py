@@ -0,0 +1,40 @@
+import pathlib
+import sys
+
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import write_gif
+from gif_thumbs import ThumbnailService, build_thumbnail
+
+
+def test_thumbnail_is_small_and_keeps_total_duration(tmp_path):
+    src = write_gif(tmp_path / "big.gif", frames=30, size=(192, 64))
+    dst = str(tmp_path / "thumb.gif")
+    build_thumbnail(src, dst, size=(64, 64), max_frames=10)
+    with Image.open(dst) as img:
+        assert img.size == (64, 21)
+        assert img.n_frames == 10
+        total = 0
+        for index in range(img.n_frames):
+            img.seek(index)
+            total += img.info["duration"]
+    assert total == 30 * 40
+
+
+def test_service_builds_once_per_hash(tmp_path):
+    write_gif(tmp_path / "a.gif", frames=3)
+    service = ThumbnailService(str(tmp_path), str(tmp_path / ".thumbs"))
+    path = service.get("a.gif", "abc")
+    assert path.endswith("abc-v1.gif")
+    assert service.get("a.gif", "abc") == path
+    assert service.built == 1
+    service.discard("abc")
+    assert not pathlib.Path(path).exists()
+
+
+def test_failed_build_returns_none(tmp_path):
+    (tmp_path / "broken.gif").write_bytes(b"not a gif")
+    service = ThumbnailService(str(tmp_path), str(tmp_path / ".thumbs"))
+    assert service.get("broken.gif", "x") is None
+    assert service.failed == 1
@@ -0,0 +1,108 @@
+import json
+import os
+import pathlib
+import stat
+import sys
+import time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import autodarts_keycloak_client
+from autodarts_keycloak_client import AutodartsKeycloakClient
+
+
+class FakeKeycloak:
+    calls = []
+
+    def __init__(self, **kwargs):
+        self.counter = 0
+
+    def _token(self, expires_in):
+        self.counter += 1
+        return {
+            "access_token": f"access-{self.counter}",
+            "refresh_token": f"refresh-{self.counter}",
+            "expires_in": expires_in,
+            "refresh_expires_in": 3600,
+        }
+
+    def token(self, username, password):
+        FakeKeycloak.calls.append("token")
+        return self._token(FakeKeycloak.expires_in)
+
+    def refresh_token(self, refresh_token):
+        FakeKeycloak.calls.append("refresh")
+        return self._token(FakeKeycloak.expires_in)
+
+    def userinfo(self, token):
+        FakeKeycloak.calls.append("userinfo")
+        return {"sub": "user-1"}
+
+
+def make_client(monkeypatch, cache_file, expires_in=300):
+    FakeKeycloak.calls = []
+    FakeKeycloak.expires_in = expires_in
+    monkeypatch.setattr(autodarts_keycloak_client, "KeycloakOpenID", FakeKeycloak)
+    return AutodartsKeycloakClient(username="u", password="p", client_id="c", cache_file=cache_file)
+
+
+def test_cached_tokens_are_reused_without_login(monkeypatch, tmp_path):
+    cache = str(tmp_path / "token.json")
+    first = make_client(monkeypatch, cache)
+    assert FakeKeycloak.calls == ["token", "userinfo"]
+    assert stat.S_IMODE(os.stat(cache).st_mode) == 0o600
+
+    second = make_client(monkeypatch, cache)
+    assert FakeKeycloak.calls == []
+    assert (second.access_token, second.user_id) == (first.access_token, "user-1")
+
+
+def test_expired_access_token_is_refreshed_from_cache(monkeypatch, tmp_path):
+    cache = tmp_path / "token.json"
+    make_client(monkeypatch, str(cache))
+    data = json.loads(cache.read_text())
+    data["expires_at"] = time.time() - 1
+    cache.write_text(json.dumps(data))
+
+    client = make_client(monkeypatch, str(cache))
+    assert FakeKeycloak.calls == ["refresh"]
+    assert client.user_id == "user-1"
+
+
+def test_cache_of_other_user_is_ignored(monkeypatch, tmp_path):
+    cache = tmp_path / "token.json"
+    make_client(monkeypatch, str(cache))
+    data = json.loads(cache.read_text())
+    data["username"] = "someone else"
+    cache.write_text(json.dumps(data))
+    make_client(monkeypatch, str(cache))
+    assert FakeKeycloak.calls == ["token", "userinfo"]
+
+
+def test_refresh_at_expiry_notifies_subscribers(monkeypatch, tmp_path):
+    # expires_in=1 -> Refresh nach int(0.9 * 1) = 0 s
+    client = make_client(monkeypatch, str(tmp_path / "token.json"), expires_in=1)
+    tokens = []
+    client.subscribe(tokens.append)
+    FakeKeycloak.expires_in = 300
+    client.start()
+    deadline = time.monotonic() + 2
+    while not tokens and time.monotonic() < deadline:
+        time.sleep(0.005)
+    client.stop()
+    assert tokens == ["access-2"]
+    assert FakeKeycloak.calls[-1] == "refresh"
+
+
+def test_refresh_runs_as_scheduler_job(monkeypatch, tmp_path):
+    from timer_scheduler import TimerScheduler
+
+    client = make_client(monkeypatch, str(tmp_path / "token.json"), expires_in=1)
+    tokens = []
+    client.subscribe(tokens.append)
+    FakeKeycloak.expires_in = 300
+    timers = TimerScheduler()
+    job = client.start(scheduler=timers)
+    assert timers.run_pending() > 200  # nächster Refresh erst nach int(0.9 * 300) s
+    assert tokens == ["access-2"] and job.runs == 1
+    client.stop()
+    assert timers.jobs() == []
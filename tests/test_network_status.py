@@ -0,0 +1,61 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import network_status
+from network_status import KernelNetworkProvider, NetworkMonitor, NetworkStatus, StaticNetworkProvider, default_interface
+from timer_scheduler import TimerScheduler
+
+ROUTES = """Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+eth0\t00000000\t0101A8C0\t0003\t0\t0\t202\t00000000\t0\t0\t0
+wlan0\t00000000\t0132A8C0\t0003\t0\t0\t303\t00000000\t0\t0\t0
+wlan0\t0032A8C0\t00000000\t0001\t0\t0\t303\t00FFFFFF\t0\t0\t0
+"""
+
+
+def test_default_interface_prefers_lowest_metric(tmp_path):
+    routes = tmp_path / "route"
+    routes.write_text(ROUTES)
+    assert default_interface(str(routes)) == "eth0"
+    routes.write_text(ROUTES.splitlines()[0] + "\n")
+    assert default_interface(str(routes)) is None
+    assert default_interface(str(tmp_path / "missing")) is None
+
+
+def test_loopback_address_via_ioctl():
+    assert network_status.interface_address("lo") == "127.0.0.1"
+    assert network_status.interface_address("does-not-exist") is None
+    assert network_status.wireless_ssid("lo") == ""
+
+
+def test_kernel_provider_reads_ssid_and_route_address(tmp_path, monkeypatch):
+    sys_net = tmp_path / "net"
+    for name in ("lo", "eth0", "wlan0"):
+        (sys_net / name).mkdir(parents=True)
+    (sys_net / "wlan0" / "wireless").mkdir()
+    routes = tmp_path / "route"
+    routes.write_text(ROUTES)
+    addresses = {"eth0": None, "wlan0": "192.168.50.7"}
+    monkeypatch.setattr(network_status, "interface_address", addresses.get)
+    monkeypatch.setattr(network_status, "wireless_ssid", lambda name: "Vereinsheim" if name == "wlan0" else "")
+
+    provider = KernelNetworkProvider(str(sys_net), str(routes))
+    assert provider.wireless_interfaces() == ["wlan0"]
+    # eth0 hat die Default-Route, aber keine Adresse -> nächstes Interface
+    assert provider.read() == NetworkStatus("Vereinsheim", "192.168.50.7", "wlan0")
+
+
+def test_monitor_reports_only_changes_and_rereads_on_kernel_events():
+    provider = StaticNetworkProvider("Home", "10.0.0.2")
+    seen = []
+    monitor = NetworkMonitor(provider, seen.append)
+    assert monitor.refresh() and not monitor.refresh()
+    provider.set("Home", "10.0.0.3")
+    assert monitor.refresh()
+    assert [s.ip for s in seen] == ["10.0.0.2", "10.0.0.3"]
+    assert monitor.stats()["reads"] == 3
+
+    timers = TimerScheduler()
+    job = monitor.watch(timers)
+    assert job.name == "network" and job.deadline <= timers.clock()
+    job.cancel()
@@ -0,0 +1,63 @@
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from relay_pipeline import MATCH_START, ROUND, MessagePipeline, classify, extract_state
+
+
+def match_message(score=501, throws=0, player=0):
+    return json.dumps({
+        "channel": "autodarts.matches",
+        "topic": "m1.state",
+        "data": {
+            "id": "m1",
+            "player": player,
+            "players": [{"name": "Anna"}, {"name": "Ben"}],
+            "gameScores": [score, 501],
+            "scores": [{"sets": 0, "legs": 1}, {"sets": 0, "legs": 0}],
+            "turns": [{"id": "t1", "throws": [{}] * throws}],
+            "state": {"checkoutGuide": [{"name": "T20"}, {"name": "D20"}]},
+        },
+    })
+
+
+def test_classify_reads_head_only():
+    assert classify('{"channel":"autodarts.matches","topic":"m1.state","data":{}}') == ("autodarts.matches", "m1.state")
+    assert classify('{"data":{}}') == (None, None)
+
+
+def test_extract_state():
+    state = extract_state(json.loads(match_message(score=441, player=1))["data"])
+    assert state == {
+        "players": [
+            {"name": "Anna", "score": 441, "sets": 0, "legs": 1},
+            {"name": "Ben", "score": 501, "sets": 0, "legs": 0},
+        ],
+        "current": 1,
+        "checkout": "T20 D20",
+    }
+
+
+def test_pipeline_drops_repeats_and_counts():
+    pipeline = MessagePipeline()
+    event = pipeline.process(match_message())
+    assert event.kind == ROUND and event.match_id == "m1"
+    assert event.state["players"][0]["score"] == 501
+
+    assert pipeline.process(match_message()) is None
+    # anderer Text, gleicher Inhalt
+    assert pipeline.process(match_message().replace(", ", ",  ")) is None
+    assert pipeline.process(match_message(throws=1)).turn["throws"] == [{}]
+    assert pipeline.process('{"channel":"autodarts.other","data":{}}') is None
+    assert pipeline.process("not json") is None
+
+    stats = pipeline.stats()
+    assert (stats["forwarded"], stats["duplicates"], stats["unchanged"]) == (2, 1, 1)
+    assert (stats["ignored"], stats["invalid"], stats["dropped"]) == (1, 1, 4)
+
+
+def test_pipeline_match_start():
+    pipeline = MessagePipeline()
+    event = pipeline.process(json.dumps({"channel": "autodarts.boards", "topic": "b1.matches", "data": {"event": "start", "id": "m2"}}))
+    assert (event.kind, event.match_id, event.board_id) == (MATCH_START, "m2", "b1")
@@ -0,0 +1,122 @@
+import pathlib
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import wait_until, write_bdf
+from render_process import RenderClient, SharedState
+
+
+def test_shared_state_roundtrip(tmp_path):
+    writer = SharedState.create(size=256)
+    try:
+        reader = SharedState(writer.path)
+        assert reader.read() == (0, None)
+        seq = writer.publish({"dart_mode": True, "players": [{"name": "A", "score": 501}]})
+        assert seq == 2 and seq % 2 == 0
+        assert reader.read() == (2, {"dart_mode": True, "players": [{"name": "A", "score": 501}]})
+        writer.publish({"dart_mode": False})
+        assert reader.read() == (4, {"dart_mode": False})
+        with pytest.raises(ValueError):
+            writer.publish({"blob": "x" * 300})
+        # fehlgeschlagenes publish lässt den letzten Stand stehen
+        assert reader.read() == (4, {"dart_mode": False})
+        reader.close()
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_reader_never_sees_torn_writes():
+    import threading
+
+    writer = SharedState.create(size=4096)
+    reader = SharedState(writer.path)
+    done = threading.Event()
+
+    def publish():
+        for i in range(2000):
+            writer.publish({"i": i, "pad": str(i) * (i % 50)})
+        done.set()
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    while not done.is_set():
+        seq, data = reader.read()
+        if data is not None:
+            assert data["pad"] == str(data["i"]) * (data["i"] % 50)
+    thread.join()
+    reader.close()
+    writer.close()
+    writer.unlink()
+
+
+def test_render_process_plays_gifs_and_reports_jitter(tmp_path):
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    write_bdf(fonts / "5x8.bdf", width=5, height=8, descent=2)
+    write_bdf(fonts / "9x18B.bdf")
+    gifs = tmp_path / "gifs"
+    gifs.mkdir()
+    frames = [Image.new("RGB", (16, 16), (i * 40, 0, 0)) for i in range(5)]
+    frames[0].save(gifs / "a.gif", save_all=True, append_images=frames[1:], duration=20, loop=0)
+
+    changes = []
+    settings = {"rows": 16, "cols": 16, "chain_length": 1, "display_backend": "virtual"}
+    client = RenderClient(settings, str(fonts), str(gifs), on_change=lambda: changes.append(1))
+    client.start()
+    try:
+        assert client.alive()
+        assert client.publish({"dart_mode": True, "players": [{"name": "A", "score": 501}], "current": 0})
+        assert not client.publish({"dart_mode": True, "players": [{"name": "A", "score": 501}], "current": 0})
+        wait_until(lambda: client.stats()["render"]["state_seq"] == 2, timeout=10.0)
+
+        client.player.play([str(gifs / "a.gif")], source="gif")
+        assert client.player.source == "gif"
+        wait_until(client.player.is_playing, timeout=10.0)
+        assert client.player.status()["current"] == "a.gif"
+        wait_until(lambda: client.stats()["playback"].get("a.gif", {}).get("frames_shown", 0) > 5, timeout=10.0)
+        assert "jitter_ms" in client.stats()["playback"]["a.gif"]
+
+        client.player.stop()
+        wait_until(lambda: not client.player.is_playing(), timeout=10.0)
+        assert changes
+    finally:
+        path = client._state.path
+        client.stop()
+    assert not client.alive()
+    assert not pathlib.Path(path).exists()
+
+
+def test_crashed_render_process_is_restarted(tmp_path, monkeypatch):
+    import render_process
+
+    monkeypatch.setattr(render_process, "RESPAWN_DELAY_SECS", 0.05)
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    write_bdf(fonts / "5x8.bdf", width=5, height=8, descent=2)
+    write_bdf(fonts / "9x18B.bdf")
+    gifs = tmp_path / "gifs"
+    gifs.mkdir()
+    frames = [Image.new("RGB", (16, 16), (0, i * 40, 0)) for i in range(3)]
+    frames[0].save(gifs / "b.gif", save_all=True, append_images=frames[1:], duration=20, loop=0)
+
+    settings = {"rows": 16, "cols": 16, "chain_length": 1, "display_backend": "virtual"}
+    client = RenderClient(settings, str(fonts), str(gifs))
+    client.start()
+    try:
+        client.publish({"dart_mode": True, "players": [{"name": "A", "score": 501}], "current": 0})
+        client.player.play([str(gifs / "b.gif")], source="gif")
+        wait_until(client.player.is_playing, timeout=10.0)
+        old_pid = client._process.pid
+        client._process.kill()
+        wait_until(lambda: client.restarts == 1 and client.alive(), timeout=10.0)
+        assert client._process.pid != old_pid
+        # Ansicht aus dem Shared Memory, GIF-Kommando wiederholt
+        wait_until(lambda: (client.stats().get("render") or {}).get("state_seq") == 2, timeout=10.0)
+        wait_until(client.player.is_playing, timeout=10.0)
+    finally:
+        client.stop()
+    assert not client.alive()
@@ -0,0 +1,164 @@
+import pathlib
+import sys
+import threading
+
+import requests
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from conftest import wait_until
+from round_forwarder import RoundForwarder
+
+
+class FakeResponse:
+    def __init__(self, version=None, rejected=(), status_code=200):
+        self.version = version
+        self.rejected = list(rejected)
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"version": self.version, "rejected": self.rejected}
+
+
+class FakeSession:
+    def __init__(self, fail=False):
+        self.posts = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.entered = threading.Event()
+        self.responses = []
+
+    def post(self, url, json, timeout):
+        self.entered.set()
+        self.release.wait(2)
+        if self.fail:
+            raise requests.ConnectionError("down")
+        self.posts.append(json)
+        return self.responses.pop(0) if self.responses else FakeResponse()
+
+
+def test_burst_collapses_to_latest():
+    session = FakeSession()
+    forwarder = RoundForwarder("http://x/dart/update", session=session)
+    forwarder.start()
+    forwarder.submit({"n": 1})
+    session.entered.wait(1)
+    # Während der erste Post hängt, kommen drei neue Nachrichten
+    for n in (2, 3, 4):
+        forwarder.submit({"n": n})
+    session.release.set()
+    wait_until(lambda: forwarder.forwarded == 2)
+    assert session.posts == [{"n": 1}, {"n": 4}]
+    assert forwarder.stats()["coalesced"] == 2
+    forwarder.stop()
+
+
+def test_failures_are_counted():
+    session = FakeSession(fail=True)
+    session.release.set()
+    forwarder = RoundForwarder("http://x/dart/update", session=session)
+    forwarder.start()
+    forwarder.submit({"n": 1})
+    wait_until(lambda: forwarder.failed == 1)
+    assert forwarder.forwarded == 0
+    forwarder.stop()
+
+
+class FakeSender:
+    path = "/tmp/x.sock"
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    def send(self, payload):
+        if self.fail:
+            raise FileNotFoundError("no listener")
+        self.sent.append(payload)
+
+
+def test_ipc_sender_preferred_with_http_fallback():
+    sender = FakeSender()
+    session = FakeSession()
+    session.release.set()
+    forwarder = RoundForwarder("http://x/dart/update", session=session, ipc_sender=sender)
+    forwarder._post({"n": 1})
+    assert sender.sent == [{"n": 1}] and session.posts == []
+
+    sender.fail = True
+    forwarder._post({"n": 2})
+    assert session.posts == [{"n": 2}]
+    assert forwarder.forwarded == 2
+
+
+def test_player_lists_are_sent_as_patches():
+    session = FakeSession()
+    session.release.set()
+    forwarder = RoundForwarder("http://x/dart/update", session=session)
+    players = [{"name": "A", "score": 501}, {"name": "B", "score": 501}]
+    session.responses = [FakeResponse(version=1), FakeResponse(version=2)]
+    forwarder._post({"players": players, "current": 0})
+    forwarder._post({"players": [{"name": "A", "score": 441}, {"name": "B", "score": 501}], "current": 1})
+    assert session.posts[0]["players"] == players
+    assert session.posts[1] == {"current": 1, "patches": [{"score": 441, "index": 0}], "base_version": 1}
+
+    forwarder.full_sync_secs = 0
+    forwarder._post({"players": players, "current": 0})
+    assert session.posts[2] == {"players": players, "current": 0, "base_version": 2}
+
+
+def test_stale_full_list_is_resent_without_base():
+    session = FakeSession()
+    session.release.set()
+    forwarder = RoundForwarder("http://x/dart/update", session=session, full_sync_secs=0)
+    session.responses = [FakeResponse(version=3)]
+    forwarder._post({"players": [{"name": "A", "score": 501}]})
+    # Nach einem Fehler geht die Liste komplett, aber mit Basis raus
+    forwarder._last_players = None
+    session.responses = [FakeResponse(version=5, status_code=409), FakeResponse(version=6)]
+    forwarder._post({"players": [{"name": "A", "score": 441}]})
+    assert session.posts[1] == {"players": [{"name": "A", "score": 441}], "base_version": 3}
+    assert session.posts[2] == {"players": [{"name": "A", "score": 441}]}
+    assert forwarder.stale == 1 and forwarder.forwarded == 2
+    assert forwarder._version == 6
+
+
+def test_rejected_patches_are_resent_as_full_list():
+    session = FakeSession()
+    session.release.set()
+    forwarder = RoundForwarder("http://x/dart/update", session=session)
+    players = [{"name": "A", "score": 501}]
+    session.responses = [FakeResponse(version=7)]
+    forwarder._post({"players": players})
+    # Webserver neu gestartet: leere Liste, Patch abgelehnt, Version wieder klein
+    session.responses = [FakeResponse(version=0, rejected=["0"]), FakeResponse(version=1)]
+    forwarder._post({"players": [{"name": "A", "score": 441}]})
+    assert "patches" in session.posts[1]
+    assert session.posts[2] == {"players": [{"name": "A", "score": 441}]}
+    assert forwarder.stats()["stale"] == 1 and forwarder.forwarded == 2
+
+    # nur zurückgesprungene Version reicht ebenfalls
+    session.responses = [FakeResponse(version=0), FakeResponse(version=1)]
+    forwarder._post({"players": [{"name": "A", "score": 381}]})
+    assert session.posts[-1] == {"players": [{"name": "A", "score": 381}]}
+    assert forwarder.stale == 2
+
+
+def test_ipc_always_gets_full_lists():
+    sender = FakeSender()
+    forwarder = RoundForwarder("http://x/dart/update", session=FakeSession(), ipc_sender=sender)
+    forwarder._post({"players": [{"name": "A", "score": 501}]})
+    forwarder._post({"players": [{"name": "A", "score": 441}]})
+    assert sender.sent[1] == {"players": [{"name": "A", "score": 441}]}
+
+
+def test_resync_sends_full_list():
+    sender = FakeSender()
+    forwarder = RoundForwarder("http://x/dart/update", session=FakeSession(), ipc_sender=sender)
+    players = [{"name": "A", "score": 501}]
+    forwarder._post({"players": players})
+    forwarder.resync()
+    forwarder._post({"players": [{"name": "A", "score": 441}]})
+    assert "players" in sender.sent[1]
@@ -0,0 +1,47 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+import scoreboard
+from font_metrics import BdfFont
+
+
+def test_columns_are_right_aligned(bdf_path):
+    font = BdfFont.load(bdf_path)
+    players = [
+        {"name": "Anna", "score": 501, "sets": 0, "legs": 1},
+        {"name": "Bob", "score": 60, "sets": 10, "legs": 0},
+    ]
+    runs = scoreboard.layout_for(players, 1, "", font, 192)
+    by_text = {(r.y, r.text): r for r in runs}
+    # legs: rechter Rand minus Padding
+    assert by_text[(12, "1")].x == 192 - 2 - 9 + 4
+    assert by_text[(28, "0")].x == 192 - 2 - 9
+    # sets-Spalte ist so breit wie "10"
+    assert by_text[(28, "10")].x == 192 - 2 - 9 - 6 - 14
+    assert by_text[(12, "0")].x == by_text[(28, "10")].x + 5
+    assert by_text[(12, "Anna")].role == scoreboard.ROLE_NORMAL
+    assert by_text[(28, "Bob")].role == scoreboard.ROLE_CURRENT
+
+
+def test_checkout_only_with_up_to_three_players(bdf_path):
+    font = BdfFont.load(bdf_path)
+    runs = scoreboard.layout_for([{"name": "A"}], 0, "D20", font, 192)
+    checkout = runs[-1]
+    assert checkout.role == scoreboard.ROLE_CHECKOUT
+    assert (checkout.x, checkout.y) == ((192 - 27) // 2, 60)
+
+    runs = scoreboard.layout_for([{"name": "A"}] * 4, 0, "D20", font, 192)
+    assert all(r.role != scoreboard.ROLE_CHECKOUT for r in runs)
+
+
+def test_layout_is_cached(bdf_path):
+    font = BdfFont.load(bdf_path)
+    players = [{"name": "A", "score": 501}]
+    first = scoreboard.layout_for(players, 0, "", font, 192)
+    assert scoreboard.layout_for([dict(p) for p in players], 0, "", font, 192) is first
+
+
+def test_empty_scoreboard(bdf_path):
+    runs = scoreboard.layout_for([], 0, "", BdfFont.load(bdf_path), 192)
+    assert [r.text for r in runs] == ["Keine Spieler"]
@@ -0,0 +1,52 @@
+import json
+import os
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from settings_store import SettingsStore
+
+
+def test_reads_once_until_file_changes(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"rows": 64}))
+    store = SettingsStore(str(path))
+    for _ in range(5):
+        assert store.get() == {"rows": 64}
+    assert store.reads == 1
+
+    changes = []
+    store.subscribe(lambda data, changed: changes.append(changed))
+    # Änderung durch den anderen Prozess
+    other = SettingsStore(str(path))
+    other.update({"rows": 32, "cols": 64})
+    assert store.get() == {"rows": 32, "cols": 64}
+    assert store.reads == 2
+    assert changes == [{"rows", "cols"}]
+
+
+def test_save_is_atomic_and_notifies(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    os.chmod(path, 0o640)
+    store = SettingsStore(str(path))
+    changes = []
+    store.subscribe(lambda data, changed: changes.append((data["gif_cache_mb"], changed)))
+    store.update({"gif_cache_mb": 32})
+    store.update({"gif_cache_mb": 32})
+    assert json.loads(path.read_text()) == {"gif_cache_mb": 32}
+    assert changes == [(32, {"gif_cache_mb"})]
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+
+def test_returned_copy_is_independent(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"autodarts_boards": [{"board_id": "a"}]}))
+    store = SettingsStore(str(path))
+    store.get()["autodarts_boards"].append({"board_id": "b"})
+    assert store.get() == {"autodarts_boards": [{"board_id": "a"}]}
+
+
+def test_missing_file_is_empty(tmp_path):
+    assert SettingsStore(str(tmp_path / "missing.json")).get() == {}
@@ -0,0 +1,58 @@
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from display_events import ChangeSignal
+from status_stream import StatusBroadcaster, encode_event
+
+
+def parse(message):
+    lines = message.decode().strip().split("\n")
+    assert lines[0] == "event: status"
+    return json.loads(lines[1][len("data: "):])
+
+
+def test_encode_event():
+    assert encode_event({"a": 1}) == b'event: status\ndata: {"a":1}\n\n'
+
+
+def test_subscribers_share_one_producer_and_skip_unchanged():
+    signal = ChangeSignal()
+    state = {"score": 501, "elapsed": 0}
+    calls = []
+
+    def snapshot():
+        calls.append(1)
+        return dict(state)
+
+    broadcaster = StatusBroadcaster(snapshot, signal, heartbeat=60, volatile=("elapsed",))
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    assert next(first).startswith(b"retry:")
+    assert next(second).startswith(b"retry:")
+    assert parse(next(first))["score"] == 501
+    assert parse(next(second))["score"] == 501
+    assert broadcaster.viewers == 2
+
+    # nur "elapsed" geändert: keine neue Nachricht
+    state["elapsed"] = 5
+    signal.notify()
+    state["score"] = 441
+    signal.notify()
+    assert parse(next(first))["score"] == 441
+    assert parse(next(second)) == {"score": 441, "elapsed": 5}
+    assert broadcaster.published == 2
+
+    first.close()
+    assert broadcaster.viewers == 1
+    broadcaster.stop()
+    assert list(second) == []
+
+
+def test_heartbeat_resends_snapshot():
+    broadcaster = StatusBroadcaster(lambda: {"elapsed": 1}, ChangeSignal(), heartbeat=0.02, volatile=("elapsed",))
+    stream = broadcaster.subscribe()
+    next(stream)
+    next(stream)
+    assert parse(next(stream)) == {"elapsed": 1}
+    broadcaster.stop()
@@ -0,0 +1,103 @@
+import pathlib
+import sys
+import threading
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from timer_scheduler import TimerScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_jobs_run_in_deadline_order():
+    clock = FakeClock()
+    timers = TimerScheduler(clock=clock)
+    calls = []
+    timers.call_later(3, lambda: calls.append("c"), name="c")
+    timers.call_later(1, lambda: calls.append("a"), name="a")
+    timers.call_every(2, lambda: calls.append("b"), name="b")
+    assert timers.run_pending() == 1
+    clock.now += 3
+    assert timers.run_pending() == 1  # b wieder bei +4
+    assert calls == ["a", "b", "c"]
+    clock.now += 1
+    timers.run_pending()
+    assert calls == ["a", "b", "c", "b"]
+    assert [job["name"] for job in timers.stats()["jobs"]] == ["b"]
+
+
+def test_cancel_and_reschedule():
+    clock = FakeClock()
+    timers = TimerScheduler(clock=clock)
+    calls = []
+    job = timers.call_every(5, lambda: calls.append(1))
+    job.cancel()
+    clock.now += 10
+    assert timers.run_pending() is None and calls == []
+    job.reschedule(1)
+    clock.now += 1
+    timers.run_pending()
+    assert calls == [1] and job.deadline == clock.now + 5
+
+
+def test_finished_one_shot_job_can_be_cancelled_and_rescheduled():
+    clock = FakeClock()
+    timers = TimerScheduler(clock=clock)
+    calls = []
+    job = timers.call_later(1, lambda: calls.append(1))
+    clock.now += 1
+    timers.run_pending()
+    job.cancel()  # schon gelaufen: nichts zu tun
+    assert timers.jobs() == []
+
+    job.reschedule(2)
+    assert timers.jobs() == [job]
+    clock.now += 2
+    timers.run_pending()
+    assert calls == [1, 1] and timers.jobs() == []
+    job.cancel()
+
+
+def test_callback_chooses_next_delay_and_failures_are_counted():
+    clock = FakeClock()
+    timers = TimerScheduler(clock=clock)
+    delays = iter([7.0, None])
+
+    def flaky():
+        delay = next(delays)
+        if delay is None:
+            raise RuntimeError("boom")
+        return delay
+
+    job = timers.call_later(0, flaky)
+    assert timers.run_pending() == 7.0
+    clock.now += 7
+    assert timers.run_pending() is None  # einmaliger Job nach Fehler beendet
+    assert (job.runs, job.failures) == (2, 1)
+    assert timers.jobs() == []
+
+
+def test_periodic_job_keeps_its_grid_and_records_lateness():
+    clock = FakeClock()
+    timers = TimerScheduler(clock=clock)
+    job = timers.call_every(10, lambda: None, first=0)
+    clock.now += 0.5
+    timers.run_pending()
+    assert job.deadline == 110.0
+    assert job.as_dict(clock.now)["max_late_ms"] == 500.0
+
+
+def test_worker_thread_wakes_for_earlier_jobs():
+    timers = TimerScheduler()
+    timers.call_later(60, lambda: None)
+    timers.start()
+    done = threading.Event()
+    timers.call_later(0.01, done.set)
+    assert done.wait(2)
+    timers.stop()
+    assert timers.stats()["wakeups"] >= 1
@@ -0,0 +1,232 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from display_backend import VirtualMatrixBackend
+
+
+def test_virtual_backend_selected(webserver):
+    assert isinstance(webserver.display, VirtualMatrixBackend)
+    assert (webserver.panel_width, webserver.panel_height) == (192, 64)
+
+
+def test_dart_screen_renders_to_virtual_matrix(webserver):
+    client = webserver.app.test_client()
+    res = client.post("/dart/start", json={"players": [{"name": "A", "score": 501}], "current": 0})
+    assert res.status_code == 200
+
+    webserver.draw_dart_screen()
+    webserver.renderer.swap()
+    frame = webserver.display.last_frame
+    # aktueller Spieler in Grün, Name beginnt bei x=2
+    assert tuple(frame[5, 2]) == (0, 255, 0)
+    assert not frame[:, 0].any()
+
+
+def test_gif_status_when_idle(webserver):
+    res = webserver.app.test_client().get("/gif/status")
+    assert res.get_json()["state"] == "stopped"
+
+
+def test_ipc_updates_reach_dart_state(webserver, tmp_path):
+    import time
+
+    from dart_ipc import DartStateReceiver, DartStateSender
+
+    path = str(tmp_path / "dart.sock")
+    receiver = DartStateReceiver(path, webserver.apply_dart_update)
+    receiver.start()
+    DartStateSender(path).send({"players": [{"name": "IPC", "score": 99}], "current": 0})
+    deadline = time.monotonic() + 2
+    while receiver.received == 0 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    receiver.stop()
+    assert webserver.dart_state["players"][0]["name"] == "IPC"
+
+
+def test_dart_update_versions_and_stale_rejection(webserver):
+    client = webserver.app.test_client()
+    version = client.post("/dart/start", json={"players": [{"name": "A", "score": 501}]}).get_json()["version"]
+    res = client.post("/dart/update", json={"base_version": version, "patches": [{"index": 0, "score": 441}]})
+    body = res.get_json()
+    assert body["version"] == version + 1
+    res = client.post("/dart/update", json={"base_version": version, "players": [{"name": "A", "score": 501}]})
+    assert res.status_code == 409
+    assert webserver.dart_state["players"][0]["score"] == 441
+
+
+def test_dart_status_and_stream(webserver):
+    client = webserver.app.test_client()
+    client.post("/dart/start", json={"players": [{"name": "A", "score": 501}]})
+    status = client.get("/dart/status").get_json()
+    assert status["dart_mode"] is True
+    assert status["state"]["players"][0]["score"] == 501
+    assert status["inactivity_limit"] == webserver.INACTIVITY_SECS
+
+    res = client.get("/dart/stream", buffered=False)
+    assert res.mimetype == "text/event-stream"
+    chunks = iter(res.response)
+    next(chunks)
+    assert b'"dart_mode":true' in next(chunks)
+    res.close()
+
+
+def test_settings_edit_applies_cache_budget(webserver):
+    settings = webserver.load_settings()
+    webserver.save_settings({**settings, "gif_cache_mb": 8})
+    assert webserver.gif_cache.budget_bytes == 8 * 1024 * 1024
+    webserver.save_settings(settings)
+
+
+def test_gif_pages_use_index(webserver):
+    from PIL import Image
+    import io
+
+    client = webserver.app.test_client()
+    buf = io.BytesIO()
+    frames = [Image.new("RGB", (8, 8), (i * 80, 0, 0)) for i in range(2)]
+    frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:], duration=50)
+    buf.seek(0)
+    client.post("/gif/upload", data={"gif_file": (buf, "indexed.gif")}, content_type="multipart/form-data")
+    assert webserver.upload_jobs.wait_all(30)
+    assert webserver.gif_index.get("indexed.gif").frames == 2
+    assert b"2 Frames" in client.get("/gif").data
+    assert b"indexed.gif" in client.get("/playlist").data
+
+    client.post("/gif/delete", data={"gif": "indexed.gif"})
+    assert webserver.gif_index.get("indexed.gif") is None
+
+
+def test_thumbnails_have_strong_etag_and_conditional_get(webserver):
+    from PIL import Image
+    import io
+
+    client = webserver.app.test_client()
+    buf = io.BytesIO()
+    frames = [Image.new("RGB", (64, 64), (i * 80, 0, 0)) for i in range(2)]
+    frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:], duration=50)
+    buf.seek(0)
+    client.post("/gif/upload", data={"gif_file": (buf, "thumb.gif")}, content_type="multipart/form-data")
+    assert webserver.upload_jobs.wait_all(30)
+    entry = webserver.gif_index.get("thumb.gif")
+
+    res = client.get(f"/thumbs/thumb.gif?v={entry.hash}")
+    assert res.status_code == 200
+    assert res.headers["ETag"] == f'"{entry.hash}-v1"'
+    assert "immutable" in res.headers["Cache-Control"]
+    assert f"/thumbs/thumb.gif?v={entry.hash}".encode() in client.get("/gif").data
+
+    cache_control = res.headers["Cache-Control"]
+    res = client.get(f"/thumbs/thumb.gif?v={entry.hash}", headers={"If-None-Match": res.headers["ETag"]})
+    assert res.status_code == 304
+    assert res.headers["Cache-Control"] == cache_control
+    res = client.get("/thumbs/thumb.gif", headers={"If-None-Match": res.headers["ETag"]})
+    assert res.status_code == 304
+    assert res.headers["Cache-Control"] == "public, max-age=60"
+    assert client.get("/thumbs/missing.gif").status_code == 404
+    client.post("/gif/delete", data={"gif": "thumb.gif"})
+
+
+def test_multi_upload_jobs_validate_and_report(webserver):
+    from PIL import Image
+    import io
+    import os
+
+    client = webserver.app.test_client()
+    good = io.BytesIO()
+    Image.new("RGB", (8, 8), (255, 0, 0)).save(good, format="GIF")
+    good.seek(0)
+    res = client.post(
+        "/gif/upload",
+        data={"gif_file": [(good, "good.gif"), (io.BytesIO(b"GIF89a broken"), "bad.gif")]},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+    assert res.status_code == 202
+    ids = [job["id"] for job in res.get_json()["jobs"]]
+    assert webserver.upload_jobs.wait_all(30)
+    states = {client.get(f"/gif/jobs/{i}").get_json()["filename"]: client.get(f"/gif/jobs/{i}").get_json()["state"] for i in ids}
+    assert states == {"good.gif": "done", "bad.gif": "failed"}
+    assert webserver.gif_index.get("good.gif") is not None
+    assert not os.path.exists(os.path.join(webserver.GIF_FOLDER, "bad.gif"))
+    assert os.listdir(webserver.UPLOAD_TMP) == []
+    client.post("/gif/delete", data={"gif": "good.gif"})
+
+
+def test_upload_size_cap(webserver, monkeypatch):
+    import io
+    import os
+
+    monkeypatch.setattr(webserver, "upload_max_bytes", 1024)
+    res = webserver.app.test_client().post(
+        "/gif/upload",
+        data={"gif_file": (io.BytesIO(b"GIF89a" + b"\0" * 4096), "huge.gif")},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+    assert res.status_code == 413
+    assert os.listdir(webserver.UPLOAD_TMP) == []
+
+
+def test_inactivity_watchdog_starts_pg_autoplay(webserver, monkeypatch):
+    import time
+
+    client = webserver.app.test_client()
+    client.post("/dart/start", json={"players": [{"name": "A", "score": 501}]})
+    assert webserver.inactivity_watchdog() <= webserver.INACTIVITY_SECS
+
+    started = []
+    monkeypatch.setattr(webserver, "start_pg_autoplay", lambda: (started.append(1), (True, "ok"))[1])
+    monkeypatch.setattr(webserver, "last_dart_update", time.monotonic() - webserver.INACTIVITY_SECS - 1)
+    assert webserver.inactivity_watchdog() == webserver.INACTIVITY_SECS
+    assert started == [1] and webserver.dart_mode is False
+    # ohne Darts-Modus passiert nichts mehr
+    assert webserver.inactivity_watchdog() == webserver.INACTIVITY_SECS and started == [1]
+
+    # nächster Wurf vom Relay (nur /dart/update) holt die Darts-Ansicht zurück
+    res = client.post("/dart/update", json={"players": [{"name": "A", "score": 441}]})
+    assert res.status_code == 200
+    assert webserver.dart_mode is True
+    assert webserver.dart_status()["dart_mode"] is True
+    assert webserver.display_view()["players"][0]["score"] == 441
+
+
+def test_update_after_dart_stop_stays_out_of_dart_mode(webserver):
+    client = webserver.app.test_client()
+    client.post("/dart/start", json={"players": [{"name": "A", "score": 501}]})
+    client.post("/dart/stop")
+    assert webserver.dart_mode is False
+    for update in ({"current": 0}, {"checkout": ""}, {"players": [{"name": "A", "score": 441}]}):
+        assert client.post("/dart/update", json=update).status_code == 200
+        assert webserver.dart_mode is False
+
+
+def test_timer_stats_route(webserver):
+    job = webserver.timers.call_every(10.0, lambda: None, name="probe")
+    try:
+        res = webserver.app.test_client().get("/timers")
+        assert "probe" in [j["name"] for j in res.get_json()["jobs"]]
+    finally:
+        job.cancel()
+
+
+def test_network_status_from_fake_provider(webserver, monkeypatch):
+    from network_status import StaticNetworkProvider
+
+    provider = StaticNetworkProvider("Vereinsheim", "192.168.1.20")
+    monkeypatch.setattr(webserver.network, "provider", provider)
+    before = webserver.display_signal.version
+    assert webserver.network.refresh()
+    assert (webserver.current_ssid, webserver.ip_address) == ("Vereinsheim", "192.168.1.20")
+    assert webserver.display_signal.version > before
+
+    provider.set("", "192.168.50.1")
+    webserver.network.refresh()
+    assert (webserver.current_ssid, webserver.ip_address) == ("Hotspot", "192.168.50.1")
+    assert webserver.app.test_client().get("/network").get_json()["status"]["ssid"] == ""
+
+
+def test_gif_page_job_script_after_job_list(webserver):
+    html = webserver.app.test_client().get("/gif").get_data(as_text=True)
+    assert "<title>GIF Übersicht</title>" in html
+    assert html.index('id="uploadJobs"') < html.index("pollJobs();")
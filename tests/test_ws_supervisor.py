@@ -0,0 +1,93 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+from ws_supervisor import ConnectionSupervisor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeApp:
+    """Connects (or fails) and then drops after ``uptime`` seconds."""
+
+    def __init__(self, supervisor_ref, clock, connect_time, uptime, tokens, token):
+        self.supervisor_ref = supervisor_ref
+        self.clock = clock
+        self.connect_time = connect_time
+        self.uptime = uptime
+        tokens.append(token)
+
+    def run_forever(self, **options):
+        self.clock.now += self.connect_time
+        if self.uptime is None:
+            raise OSError("connection refused")
+        self.supervisor_ref[0].opened()
+        self.clock.now += self.uptime
+
+    def close(self):
+        pass
+
+
+def test_reconnects_with_current_token_and_reports_gap():
+    clock = FakeClock()
+    ref = []
+    tokens = []
+    token = {"value": "t1"}
+    # verbunden, Abbruch, ein Fehlversuch, wieder verbunden
+    plan = [(0.1, 5.0), (0.2, None), (0.3, 1.0)]
+
+    def factory():
+        connect_time, uptime = plan.pop(0)
+        app = FakeApp(ref, clock, connect_time, uptime, tokens, token["value"])
+        token["value"] = "t2"
+        if not plan:
+            supervisor.stop()
+        return app
+
+    supervisor = ConnectionSupervisor(factory, clock=clock, rng=lambda: 0.0)
+    ref.append(supervisor)
+    waits = []
+    supervisor._stop.wait = lambda delay: (waits.append(delay), setattr(clock, "now", clock.now + delay))
+    supervisor.run()
+
+    assert tokens == ["t1", "t2", "t2"]
+    assert waits == [0.25, 0.5]
+    stats = supervisor.stats()
+    assert (stats["connects"], stats["disconnects"], stats["attempts"]) == (2, 2, 3)
+    # Abbruch bei t=5.1, wieder verbunden bei t=5.1+0.25+0.2+0.5+0.3
+    assert abs(supervisor.last_gap - 1.25) < 1e-9
+    assert abs(supervisor.last_reconnect_time - 0.3) < 1e-9
+
+
+def test_backoff_is_capped_and_jittered():
+    supervisor = ConnectionSupervisor(lambda: None, base_delay=1, max_delay=8, rng=lambda: 1.0)
+    assert [supervisor.delay(n) for n in range(5)] == [1, 2, 4, 8, 8]
+    supervisor.rng = lambda: 0.0
+    assert supervisor.delay(3) == 4
+
+
+def test_backoff_resets_only_after_stable_connection():
+    clock = FakeClock()
+    ref = []
+    # Server nimmt an und trennt sofort, dann eine stabile Verbindung, dann wieder kurz
+    plan = [(0.1, 0.0), (0.1, 0.0), (0.1, 0.0), (0.1, 60.0), (0.1, 0.0), (0.1, 0.0)]
+
+    def factory():
+        connect_time, uptime = plan.pop(0)
+        if not plan:
+            supervisor.stop()
+        return FakeApp(ref, clock, connect_time, uptime, [], None)
+
+    supervisor = ConnectionSupervisor(factory, clock=clock, rng=lambda: 0.0, stable_after=10.0)
+    ref.append(supervisor)
+    waits = []
+    supervisor._stop.wait = lambda delay: (waits.append(delay), setattr(clock, "now", clock.now + delay))
+    supervisor.run()
+
+    assert waits == [0.25, 0.5, 1.0, 0.25, 0.5]
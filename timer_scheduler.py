@@ -0,0 +1,211 @@
+"""Deadline-ordered timers for periodic work.
+
+Periodic tasks used to own a thread each that slept in a loop: the WLAN
+monitor (10 s), the clock tick of the display loop (1 s), the Keycloak token
+refresh and the settings watcher.  :class:`TimerScheduler` runs them on one
+thread from a heap ordered by deadline, so a process only wakes when its
+earliest job is due.  Jobs can be cancelled or rescheduled and record how
+often they ran, how long they took and how late they started
+(:meth:`TimerScheduler.stats`).
+
+A callback may return a number of seconds to choose its next run itself
+(e.g. to align to the next second or to an expiry time); otherwise periodic
+jobs run again after their interval and one-shot jobs are done.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A scheduled callback; create with :meth:`TimerScheduler.call_later` or ``call_every``."""
+
+    def __init__(self, scheduler: "TimerScheduler", name: str, callback: Callable[[], Optional[float]], interval: Optional[float]) -> None:
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.deadline: Optional[float] = None
+        self.cancelled = False
+        self.done = False  # einmaliger Job ist gelaufen
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.max_lateness = 0.0
+        self._seq = None  # Heap-Eintrag, der gerade gültig ist
+
+    def cancel(self) -> None:
+        self.scheduler.cancel(self)
+
+    def reschedule(self, delay: float) -> None:
+        self.scheduler.reschedule(self, delay)
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "name": self.name,
+            "interval_s": self.interval,
+            "next_in_s": round(self.deadline - now, 3) if self.deadline is not None else None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_ms": round(self.last_duration * 1000, 3),
+            "max_ms": round(self.max_duration * 1000, 3),
+            "avg_ms": round(self.total_duration / self.runs * 1000, 3) if self.runs else 0.0,
+            "max_late_ms": round(self.max_lateness * 1000, 3),
+        }
+
+
+class TimerScheduler:
+    """Run jobs from a deadline heap on one worker thread.
+
+    ``clock`` must be monotonic.  Without :meth:`start`, due jobs can be run
+    synchronously with :meth:`run_pending` (used by the tests).
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = "timers") -> None:
+        self.clock = clock
+        self.name = name
+        self.wakeups = 0
+        self._heap: list = []
+        self._jobs: List[Job] = []
+        self._seqs = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def call_later(self, delay: float, callback: Callable[[], Optional[float]], name: str = None) -> Job:
+        """Run ``callback`` once after ``delay`` seconds."""
+
+        return self._add(Job(self, name or callback.__name__, callback, None), delay)
+
+    def call_every(self, interval: float, callback: Callable[[], Optional[float]], name: str = None, first: float = None) -> Job:
+        """Run ``callback`` every ``interval`` seconds, the first time after ``first`` (default ``interval``)."""
+
+        job = Job(self, name or callback.__name__, callback, interval)
+        return self._add(job, interval if first is None else first)
+
+    def _add(self, job: Job, delay: float) -> Job:
+        with self._cond:
+            self._jobs.append(job)
+            self._push(job, self.clock() + delay)
+        return job
+
+    def _push(self, job: Job, deadline: float) -> None:
+        job.deadline = deadline
+        job._seq = next(self._seqs)
+        heapq.heappush(self._heap, (deadline, job._seq, job))
+        # Nur wecken, wenn der neue Job der früheste ist
+        if self._heap[0][2] is job:
+            self._cond.notify()
+
+    def reschedule(self, job: Job, delay: float) -> None:
+        """Move ``job`` to ``delay`` seconds from now (also revives a cancelled or finished job)."""
+
+        with self._cond:
+            if job.cancelled or job.done:
+                job.cancelled = job.done = False
+                self._jobs.append(job)
+            self._push(job, self.clock() + delay)
+
+    def cancel(self, job: Job) -> None:
+        """Remove ``job``; a run in progress finishes but is not repeated."""
+
+        with self._cond:
+            if job.cancelled or job.done:
+                return
+            job.cancelled = True
+            job.deadline = job._seq = None
+            self._jobs.remove(job)
+
+    def _next_delay(self) -> Optional[float]:
+        # Veraltete Einträge (abgesagt oder neu eingeplant) liegen lassen und hier verwerfen
+        while self._heap and self._heap[0][1] != self._heap[0][2]._seq:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def run_pending(self) -> Optional[float]:
+        """Run all due jobs; return the seconds until the next one (``None`` if idle)."""
+
+        while True:
+            with self._cond:
+                delay = self._next_delay()
+                if delay is None or delay > 0:
+                    return delay
+                deadline, _, job = heapq.heappop(self._heap)
+                job._seq = None
+            self._run(job, deadline)
+
+    def _run(self, job: Job, deadline: float) -> None:
+        started = self.clock()
+        next_delay = None
+        try:
+            next_delay = job.callback()
+        except Exception:
+            job.failures += 1
+            logger.exception("Timer job %s failed", job.name)
+        finished = self.clock()
+        duration = finished - started
+        job.runs += 1
+        job.last_duration = duration
+        job.total_duration += duration
+        job.max_duration = max(job.max_duration, duration)
+        job.max_lateness = max(job.max_lateness, started - deadline)
+        with self._cond:
+            if job.cancelled or job._seq is not None:
+                return  # abgesagt oder während des Laufs neu eingeplant
+            if isinstance(next_delay, (int, float)) and not isinstance(next_delay, bool):
+                self._push(job, finished + max(0.0, next_delay))
+            elif job.interval is not None:
+                # Im Raster bleiben, außer wir liegen schon ein Intervall zurück
+                self._push(job, max(deadline + job.interval, finished))
+            else:
+                job.deadline = None
+                job.done = True
+                self._jobs.remove(job)
+
+    def _loop(self) -> None:
+        while True:
+            self.run_pending()
+            with self._cond:
+                if not self._running:
+                    return
+                delay = self._next_delay()
+                if delay is None or delay > 0:
+                    self._cond.wait(delay)
+                    self.wakeups += 1
+
+    def start(self) -> threading.Thread:
+        with self._cond:
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def jobs(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs)
+
+    def stats(self) -> dict:
+        """Wakeups and per-job timing, soonest job first."""
+
+        now = self.clock()
+        jobs = sorted(self.jobs(), key=lambda job: job.deadline if job.deadline is not None else float("inf"))
+        return {"wakeups": self.wakeups, "jobs": [job.as_dict(now) for job in jobs]}
@@ -2,28 +2,82 @@ import os
 import json
 import threading
 import time
-import subprocess
 import logging
-from flask import Flask, render_template_string, request, redirect, send_from_directory, jsonify, render_template, flash
+import multiprocessing
+from flask import Flask, Request, Response, abort, render_template_string, request, redirect, send_file, send_from_directory, jsonify, render_template, flash
 from datetime import datetime
-from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from PIL import Image
+import tempfile
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import gif_pack
+from dart_delta import DeltaTracker, StaleUpdate
+from dart_ipc import SOCKET_ENV, DartStateReceiver
+from display_backend import create_backend, panel_size
+from display_events import ChangeSignal
+from gif_cache import GifFrameCache
+from gif_index import GifIndex
+from gif_jobs import CappedSpool, QueueFull, UploadJobQueue
+from gif_thumbs import ThumbnailService
+from gif_player import FrameScheduler, GifPlayer, GifPrefetcher
+from network_status import KernelNetworkProvider, NetworkMonitor
+from render_process import RenderClient
+from screens import MatrixRenderer
+from settings_store import store_for
+from status_stream import StatusBroadcaster
+from timer_scheduler import TimerScheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+GIF_FOLDER = os.getenv("GIF_FOLDER", "/home/pi/rgbserver/gifs")
+PLAYLIST_FILE = os.getenv("PLAYLIST_FILE", "/home/pi/rgbserver/playlist.json")
+SETTINGS_FILE = os.getenv("SETTINGS_FILE", "/home/pi/rgbserver/settings.json")
+FONT_DIR = os.getenv("FONT_DIR", "/home/pi/rpi-rgb-led-matrix/fonts")
+
+UPLOAD_TMP = os.path.join(GIF_FOLDER, ".uploads")
+
+# Forkserver (Upload-Worker, Render-Prozess) mit deren Modulen vorladen. Die Kinder
+# importieren webserver.py trotzdem als __mp_main__, deshalb legt erst setup() Dienste an.
+multiprocessing.set_forkserver_preload(["gif_jobs", "render_process"])
+
+
+class UploadRequest(Request):
+    """Schreibt hochgeladene GIFs direkt in eine Datei (mit Größenlimit) statt über Werkzeugs Puffer."""
 
-GIF_FOLDER = "/home/pi/rgbserver/gifs"
-PLAYLIST_FILE = "/home/pi/rgbserver/playlist.json"
-SETTINGS_FILE = "/home/pi/rgbserver/settings.json"
+    spooled = None
 
-gif_player_running = False
-gif_player_thread = None
-gif_player_stop = threading.Event()
-display_enabled = True
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.path != "/gif/upload":
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        os.makedirs(UPLOAD_TMP, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=UPLOAD_TMP, suffix=".part")
+        os.close(fd)
+        if self.spooled is None:
+            self.spooled = []
+        self.spooled.append(path)
+        return CappedSpool(path, upload_max_bytes)
+
+    def spool_path(self, file):
+        """Pfad der Temp-Datei eines Uploads (Datei wird dafür geschlossen)."""
+        path = getattr(file.stream, "name", None)
+        if not isinstance(path, str) or path not in (self.spooled or []):
+            return None
+        file.stream.close()
+        return path
+
+
+app = Flask(__name__)
+app.request_class = UploadRequest
 app.secret_key = "random-secret-key"
 
+
+@app.teardown_request
+def remove_upload_spools(exc=None):
+    # Abgebrochene oder abgelehnte Uploads nicht liegen lassen
+    for path in getattr(request, "spooled", None) or []:
+        if os.path.exists(path):
+            os.remove(path)
+
 current_ssid = "?"
 ip_address = "Keine IP"
 hotspot_active = False
@@ -31,188 +85,193 @@ hotspot_active = False
 dart_state = {
     "players": [],    # [{"name":"Fabian","score":501,"sets":0,"legs":0}, ...]
     "current": 0,     # Index des aktuellen Spielers
-    "checkout": ""    # z.B. "T20 T19 D8" (kommt später via WebSocket)
+    "checkout": "",   # z.B. "T20 T19 D8" (kommt später via WebSocket)
+    "version": 0      # steigt mit jeder übernommenen Änderung
 }
+dart_delta = DeltaTracker()
 last_dart_update = 0.0          # monotonic timestamp
-pg_autoplay_active = False       # True, wenn Watchdog die PG-GIFs gestartet hat
 INACTIVITY_SECS = 5 * 60         # 5 Minuten
 dart_mode = False
+left_by_timeout = False          # Darts-Modus durch den Watchdog verlassen, nicht per /dart/stop
 state_lock = threading.Lock()
-
-# Farben
-color_white = graphics.Color(255, 255, 255)
-color_green = graphics.Color(0, 255, 0)
-color_cyan  = graphics.Color(0, 200, 255)
-color_yellow = graphics.Color(255, 255, 0)
-
+# Weckt display_loop bei jeder Änderung von dart_state, Netzwerk oder Modus
+display_signal = ChangeSignal()
+# Ein Thread für alle periodischen Aufgaben (WLAN, Uhr, Inaktivität); Timing unter /timers
+timers = TimerScheduler(name="webserver-timers")
 
 # Matrix Setup
+# Dienste legt setup() an (beim Start aus main()); bis dahin nur Platzhalter
+settings_store = None
+settings = {}
+upload_max_bytes = 20 * 1024 * 1024
+RENDER_PROCESS = False
+panel_width = panel_height = 0
+gif_index = thumbnails = upload_jobs = network = None
+render_client = display = renderer = None
+gif_cache = frame_scheduler = gif_prefetcher = gif_player = None
+
 def load_settings():
-    with open(SETTINGS_FILE, "r") as f:
-        return json.load(f)
+    return settings_store.get()
 
 def save_settings(settings):
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings, f, indent=4)
-
-settings = load_settings()
-options = RGBMatrixOptions()
-options.rows = settings.get("rows", 64)
-options.cols = settings.get("cols", 64)
-options.chain_length = settings.get("chain_length", 3)
-options.hardware_mapping = settings.get("hardware_mapping", 'regular')
-options.gpio_slowdown = settings.get("gpio_slowdown", 4)
-options.brightness = 100
-#options.pwm_lsb_nanoseconds = 130
-#options.pwm_dither_bits = 1
-options.limit_refresh_rate_hz = 60
-
-matrix = RGBMatrix(options=options)
-canvas = matrix.CreateFrameCanvas()
-font = graphics.Font()
-font.LoadFont("/home/pi/rpi-rgb-led-matrix/fonts/5x8.bdf")
-textColor = graphics.Color(255, 255, 0)
-font_dart = graphics.Font()
-font_dart.LoadFont("/home/pi/rpi-rgb-led-matrix/fonts/9x18B.bdf")
-
-# WLAN & IP Funktionen
-def get_connected_ssid():
-    result = subprocess.run(['iwgetid', '-r'], stdout=subprocess.PIPE)
-    return result.stdout.decode().strip()
-
-def get_ip():
-    result = subprocess.run(['hostname', '-I'], stdout=subprocess.PIPE)
-    ip = result.stdout.decode().strip().split(' ')[0]
-    return ip if ip else "Keine IP"
-
-def wlan_monitor():
-    global ip_address, current_ssid, hotspot_active
-    while True:
-        ssid = get_connected_ssid()
-        if ssid:
-            current_ssid = ssid
-            ip_address = get_ip()
+    settings_store.save(settings)
+
+def forget_gif(path):
+    """Dekodierte Frames einer geänderten/gelöschten Datei verwerfen (auch im Render-Prozess)."""
+    if render_client is not None:
+        render_client.discard(path)
+    else:
+        gif_cache.discard(path)
+
+def apply_upload(result):
+    """Ergebnis eines Upload-Jobs im Webserver-Prozess übernehmen."""
+    entry = result["entry"]
+    forget_gif(os.path.join(GIF_FOLDER, entry.name))
+    gif_index.put(entry)
+    thumbnails.ensure(entry.name, entry.hash)
+
+MATRIX_KEYS = {"rows", "cols", "chain_length", "hardware_mapping", "gpio_slowdown", "pwm_lsb_nanoseconds", "display_backend", "render_process"}
+GIF_KEYS = {"gif_cache_mb", "gif_prefetch_depth", "gif_prefetch_mb"}
+
+def on_settings_changed(new_settings, changed):
+    """Übernimmt geänderte Einstellungen, die ohne Neustart wirken."""
+    if "gif_upload_max_mb" in changed:
+        global upload_max_bytes
+        upload_max_bytes = int(new_settings.get("gif_upload_max_mb", 20)) * 1024 * 1024
+    if changed & GIF_KEYS:
+        if render_client is not None:
+            render_client.configure(new_settings)
         else:
-            current_ssid = "Hotspot"
-            ip_address = "192.168.50.1"
-        time.sleep(10)
+            gif_cache.budget_bytes = int(new_settings.get("gif_cache_mb", 64)) * 1024 * 1024
+            gif_prefetcher.depth = int(new_settings.get("gif_prefetch_depth", 1))
+            gif_prefetcher.budget_bytes = int(new_settings.get("gif_prefetch_mb", 16)) * 1024 * 1024
+    if changed & MATRIX_KEYS:
+        logger.info("Matrix settings changed (%s), restart required", ", ".join(sorted(changed & MATRIX_KEYS)))
+
+# WLAN & IP
+def apply_network_status(status):
+    """Neuen Netzwerkstatus übernehmen; ohne WLAN-Verbindung läuft der Hotspot."""
+    global ip_address, current_ssid
+    if status.ssid:
+        new_ssid, new_ip = status.ssid, status.ip or "Keine IP"
+    else:
+        new_ssid, new_ip = "Hotspot", "192.168.50.1"
+    if (new_ssid, new_ip) != (current_ssid, ip_address):
+        current_ssid, ip_address = new_ssid, new_ip
+        display_signal.notify()
+
+def setup():
+    """Einstellungen lesen und die Dienste anlegen (Matrix oder Render-Prozess, GIF-Index, Uploads, Netzwerk)."""
+    global settings_store, settings, upload_max_bytes, RENDER_PROCESS, panel_width, panel_height
+    global gif_index, thumbnails, upload_jobs, network
+    global render_client, display, renderer, gif_cache, frame_scheduler, gif_prefetcher, gif_player
+    # Im Speicher gehalten, neu gelesen nur bei geänderter mtime; Schreiben atomar
+    settings_store = store_for(SETTINGS_FILE)
+    settings = load_settings()
+    upload_max_bytes = int(settings.get("gif_upload_max_mb", 20)) * 1024 * 1024
+    # Matrix, Scoreboard und GIF-Player optional in einem eigenen Prozess (RENDER_PROCESS oder render_process)
+    RENDER_PROCESS = os.getenv("RENDER_PROCESS", str(settings.get("render_process", False))).lower() in ("1", "true", "yes")
+    panel_width, panel_height = panel_size(settings)
+
+    # Metadaten aller GIFs (JSON-Sidecar im GIF-Ordner) statt listdir/getmtime pro Request
+    gif_index = GifIndex(GIF_FOLDER)
+    gif_index.load()
+    # Kleine Vorschau-GIFs für die Weboberfläche, nach Content-Hash abgelegt
+    thumbnails = ThumbnailService(GIF_FOLDER, os.path.join(GIF_FOLDER, ".thumbs"))
+
+    # Uploads werden in einem begrenzten Prozess-Pool geprüft und transcodiert
+    upload_jobs = UploadJobQueue(on_done=apply_upload, max_pending=int(settings.get("gif_upload_queue", 16)))
+
+    if RENDER_PROCESS:
+        # Der Kindprozess besitzt Matrix, Frame-Cache und Player; hier wird nur Zustand veröffentlicht
+        render_client = RenderClient(settings, FONT_DIR, GIF_FOLDER, on_change=display_signal.notify)
+        display = renderer = None
+        gif_cache = frame_scheduler = gif_prefetcher = None
+        gif_player = render_client.player
+    else:
+        render_client = None
+        # rgbmatrix auf dem Pi, "virtual" für Tests/Benchmarks (MATRIX_BACKEND oder display_backend)
+        display = create_backend(settings)
+        renderer = MatrixRenderer(display, FONT_DIR)
+        # Dekodierte GIF-Frames (LRU, Budget in MB aus den Settings)
+        gif_cache = GifFrameCache(budget_bytes=int(settings.get("gif_cache_mb", 64)) * 1024 * 1024)
+        frame_scheduler = FrameScheduler()
+        gif_prefetcher = GifPrefetcher(
+            gif_cache,
+            depth=int(settings.get("gif_prefetch_depth", 1)),
+            budget_bytes=int(settings.get("gif_prefetch_mb", 16)) * 1024 * 1024,
+        )
+        # Ein einziger Player-Thread; Routen schicken nur Kommandos
+        gif_player = GifPlayer(
+            gif_prefetcher,
+            frame_scheduler,
+            show=lambda frame: display.set_image(frame, 0, 0),
+            clear=lambda: display.clear(),
+            name_for=lambda path: os.path.relpath(path, GIF_FOLDER),
+            on_change=display_signal.notify,
+        )
+
+    settings_store.subscribe(on_settings_changed)
+
+    # Liest /proc, /sys und ioctls statt iwgetid/hostname zu starten; rtnetlink meldet Änderungen sofort
+    network = NetworkMonitor(KernelNetworkProvider(), on_change=apply_network_status)
+
+def clock_tick():
+    """Uhr der Info-Ansicht: display_loop zu jedem Sekundenwechsel wecken (Timer-Job)."""
+    if not dart_mode and not gif_player.is_playing():
+        display_signal.notify()
+    return 1.0 - (time.time() % 1.0)
+
+def inactivity_watchdog():
+    """Nach INACTIVITY_SECS ohne Dart-Update Darts-Modus verlassen und PG-Autoplay starten.
+
+    Timer-Job, der sich selbst auf den frühestmöglichen Ablauf neu einplant.
+    """
+    global left_by_timeout
+    if dart_mode and last_dart_update:
+        remaining = INACTIVITY_SECS - (time.monotonic() - last_dart_update)
+        if remaining > 0:
+            return remaining
+        started, msg = leave_dart_mode()
+        left_by_timeout = True
+        logger.info("No dart update for %d s, leaving dart mode: %s", INACTIVITY_SECS, msg)
+    return INACTIVITY_SECS
 
 # Display
+def display_view():
+    """Alles, was die Matrix außerhalb von GIFs zeigt, als einfaches Dict."""
+    with state_lock:
+        return {
+            "dart_mode": dart_mode,
+            "players": list(dart_state.get("players", [])),
+            "current": int(dart_state.get("current", 0)),
+            "checkout": str(dart_state.get("checkout", "") or ""),
+            "ssid": current_ssid,
+            "ip": ip_address,
+        }
+
 def display_loop():
-    global display_enabled, canvas, dart_mode
+    """Neu zeichnen nur bei Änderungen; ohne Darts-Modus zusätzlich jede volle Sekunde für die Uhr."""
     while True:
-        if display_enabled:
-            if dart_mode:
-                draw_dart_screen()
-                canvas = matrix.SwapOnVSync(canvas)
-            else:
-                canvas.Clear()
-                now = datetime.now().strftime("%H:%M:%S")
-
-                if current_ssid != "Hotspot":
-                    graphics.DrawText(canvas, font, 2, 20, textColor, f"IP: {ip_address}")
-                    graphics.DrawText(canvas, font, 2, 35, textColor, f"SSID: {current_ssid}")
-                    graphics.DrawText(canvas, font, 2, 50, textColor, f"Uhrzeit: {now}")
-                else:
-                    graphics.DrawText(canvas, font, 2, 20, textColor, "Verbinde mit:")
-                    graphics.DrawText(canvas, font, 2, 35, textColor, "LEDMatrix-Controller")
-                    graphics.DrawText(canvas, font, 2, 45, textColor, f"IP: 192.168.50.1")
-                    graphics.DrawText(canvas, font, 2, 50, textColor, f"Uhrzeit: {now}")
-
-                canvas = matrix.SwapOnVSync(canvas)
-        time.sleep(1)
+        seen = display_signal.version
+        view = display_view()
+        if not gif_player.is_playing():
+            renderer.render(view)
+        # Sekundentakt der Uhr kommt von clock_tick
+        display_signal.wait(seen)
+
+def render_publisher():
+    """Mit Render-Prozess: jede Änderung in den Shared Memory schreiben, gezeichnet wird dort."""
+    while True:
+        seen = display_signal.version
+        render_client.publish(display_view())
+        display_signal.wait(seen)
 
 def draw_dart_screen():
-    """Alle Spieler untereinander: Name links, Score/Sets/Legs rechtsbündig; Checkout zentriert in Zeile 4 wenn <=3 Spieler."""
-    with state_lock:
-        players = list(dart_state.get("players", []))
-        current = int(dart_state.get("current", 0))
-        checkout_text = str(dart_state.get("checkout", "") or "")
+    """Scoreboard aus dart_state auf den Canvas zeichnen (ohne Swap)."""
+    view = display_view()
+    renderer.draw_dart_screen(view["players"], view["current"], view["checkout"])
 
-    canvas.Clear()
-
-    if not players:
-        graphics.DrawText(canvas, font_dart, 2, 12, color_white, "Keine Spieler")
-        return
-
-    # Layout (dein Spacing)
-    y_start = 12
-    line_spacing = 16
-    padding = 2
-
-    # Matrix-Breite in Pixeln
-    max_width = options.cols * options.chain_length
-
-    # Max-Breiten der Zahlenspalten ermitteln
-    def text_w(txt, col=color_white):
-        # off-screen draw zum Messen
-        return graphics.DrawText(canvas, font_dart, 0, -9999, col, str(txt))
-
-    max_score_w = max(text_w(p.get("score", 0)) for p in players)
-    max_sets_w  = max(text_w(p.get("sets", 0))  for p in players)
-    max_legs_w  = max(text_w(p.get("legs", 0))  for p in players)
-
-    # Spaltenpositionen (von rechts nach links)
-    x_legs  = max_width - max_legs_w - padding
-    x_sets  = x_legs - max_sets_w - 6
-    x_score = x_sets - max_score_w - 6
-    x_name  = 2
-
-    # Spielerzeilen zeichnen (Reihenfolge bleibt exakt)
-    for idx, p in enumerate(players):
-        col   = color_green if idx == current else color_white
-        name  = str(p.get("name", "Spieler"))
-        score = str(p.get("score", 0))
-        sets  = str(p.get("sets", 0))
-        legs  = str(p.get("legs", 0))
-
-        y = y_start + idx * line_spacing
-
-        # Name links
-        graphics.DrawText(canvas, font_dart, x_name, y, col, name)
-
-        # Zahlen rechtsbündig in ihren Spalten
-        sw = text_w(score, col)
-        tw = text_w(sets,  col)
-        lw = text_w(legs,  col)
-
-        graphics.DrawText(canvas, font_dart, x_score + (max_score_w - sw), y, col, score)
-        graphics.DrawText(canvas, font_dart, x_sets  + (max_sets_w  - tw), y, col, sets)
-        graphics.DrawText(canvas, font_dart, x_legs  + (max_legs_w  - lw), y, col, legs)
-
-    # Checkout-Anzeige:
-    # - nur wenn <= 3 Spieler
-    # - in "Zeile 4" (y für idx 3)
-    # - zentriert, und nur wenn checkout_text != ""
-    n = len(players)
-    if 1 <= n <= 3 and checkout_text:
-        y_checkout = y_start + 3 * line_spacing  # Position wie Spieler 4
-        w_checkout = text_w(checkout_text, color_yellow)
-        x_checkout = max(0, (max_width - w_checkout) // 2)
-        graphics.DrawText(canvas, font_dart, x_checkout, y_checkout, color_yellow, checkout_text)
-
-
-# GIF Player
-def play_gifs(gif_list):
-    global gif_player_running, display_enabled
-    gif_player_running = True
-    display_enabled = False
-    try:
-        while not gif_player_stop.is_set():
-            for gif_path in gif_list:
-                if gif_player_stop.is_set():
-                    break
-                gif = Image.open(gif_path)
-                for frame in range(gif.n_frames):
-                    if gif_player_stop.is_set():
-                        break
-                    gif.seek(frame)
-                    matrix.SetImage(gif.convert('RGB'), 0, 0)
-                    time.sleep(gif.info.get('duration', 100) / 1000.0)
-    finally:
-        matrix.Clear()
-        gif_player_running = False
-        display_enabled = True
 
 # Playlist Helper
 def load_playlist():
@@ -227,44 +286,55 @@ def save_playlist(data):
         
 def start_pg_autoplay():
     """Starte GIF-Loop aus GIF_FOLDER/pg."""
-    global gif_player_thread, gif_player_stop, pg_autoplay_active
-
     pg_path = os.path.join(GIF_FOLDER, "pg")
     if not os.path.isdir(pg_path):
         return False, "Ordner gifs/pg nicht gefunden"
 
-    gif_files = [f for f in os.listdir(pg_path) if f.lower().endswith(".gif")]
+    # Per SSH/Samba kopierte oder gelöschte GIFs übernehmen (nur ein stat, wenn unverändert)
+    gif_index.refresh("pg")
+    gif_files = gif_index.names("pg")  # neueste zuerst
     if not gif_files:
         return False, "Keine GIFs in gifs/pg"
 
-    full_paths = [os.path.join(pg_path, f) for f in gif_files]
-    full_paths.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    full_paths = [os.path.join(GIF_FOLDER, f) for f in gif_files]
 
-    # laufenden Player stoppen
-    if gif_player_thread and gif_player_thread.is_alive():
-        gif_player_stop.set()
-        gif_player_thread.join()
-
-    gif_player_stop.clear()
-    gif_player_thread = threading.Thread(target=play_gifs, args=(full_paths,), daemon=True)
-    gif_player_thread.start()
-    pg_autoplay_active = True
+    gif_player.play(full_paths, source="pg")
     return True, f"{len(full_paths)} GIFs gestartet"
     
 def stop_pg_autoplay_if_running():
     """Stoppt nur das vom Autoplay gestartete PG-GIF-Loop."""
-    global gif_player_thread, gif_player_stop, pg_autoplay_active
-    if pg_autoplay_active and gif_player_thread and gif_player_thread.is_alive():
-        gif_player_stop.set()
-        gif_player_thread.join()
-    pg_autoplay_active = False
+    if gif_player.source == "pg":
+        gif_player.stop()
 
 
 # === WEB ROUTES ===
 
 @app.route("/gifs/<path:filename>")
 def gifs_static(filename):
-    return send_from_directory(GIF_FOLDER, filename)
+    return send_from_directory(GIF_FOLDER, filename, max_age=3600)
+
+@app.route("/thumbs/<path:filename>")
+def gif_thumbnail(filename):
+    """Vorschau mit starkem ETag; mit ?v=<hash> unveränderlich cachebar."""
+    entry = gif_index.get(filename)
+    if entry is None:
+        abort(404)
+    etag = thumbnails.etag(entry.hash)
+    versioned = request.args.get("v") == entry.hash
+    max_age = 31536000 if versioned else 60
+    if request.if_none_match.contains(etag):
+        # 304 mit denselben Cache-Headern, sonst revalidiert der Browser jedes Mal
+        response = Response(status=304, headers={"ETag": f'"{etag}"'})
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        path = thumbnails.get(entry.name, entry.hash)
+        if path is None:
+            return redirect(f"/gifs/{entry.name}")
+        response = send_file(path, mimetype="image/gif", etag=etag, max_age=max_age)
+    if versioned:
+        response.cache_control.immutable = True
+    return response
 
 @app.route("/")
 def index():
@@ -308,40 +378,46 @@ def darts_settings():
 
 @app.route("/gif")
 def gif_list():
-    gif_files = [f for f in os.listdir(GIF_FOLDER) if f.lower().endswith(".gif")]
-    gif_files.sort(key=lambda x: os.path.getmtime(os.path.join(GIF_FOLDER, x)), reverse=True)
-
-    return render_template("gifs.html", gifs=gif_files, status=("Läuft" if gif_player_running else "Gestoppt"))
+    entries = gif_index.entries()
+    return render_template(
+        "gifs.html",
+        entries=entries,
+        status=("Läuft" if gif_player.is_playing() else "Gestoppt"),
+    )
 
 
 @app.route("/gif/start", methods=["POST"])
 def gif_start():
     gif = request.form.get("gif")
     gif_path = os.path.join(GIF_FOLDER, gif)
-
-    global gif_player_thread, gif_player_stop
-    if gif_player_thread and gif_player_thread.is_alive():
-        gif_player_stop.set()
-        gif_player_thread.join()
-
-    gif_player_stop.clear()
-    gif_player_thread = threading.Thread(target=play_gifs, args=([gif_path],), daemon=True)
-    gif_player_thread.start()
+    gif_player.play([gif_path], source="gif")
     return redirect("/gif")
 
 @app.route("/gif/stop", methods=["POST"])
 def gif_stop():
-    global gif_player_thread, gif_player_stop
-    if gif_player_thread and gif_player_thread.is_alive():
-        gif_player_stop.set()
-        gif_player_thread.join()
+    gif_player.stop()
     return redirect("/gif")
 
+def playback_stats():
+    """Frame-Timing (inkl. Jitter) und Cache-Zähler, lokal oder aus dem Render-Prozess."""
+    if render_client is not None:
+        return render_client.stats()
+    return {"playback": frame_scheduler.stats(), "cache": gif_cache.stats()}
+
+@app.route("/gif/stats")
+def gif_stats():
+    return jsonify(playback_stats())
+
+@app.route("/gif/status")
+def gif_status():
+    return jsonify(gif_player.status())
+
 @app.route("/playlist")
 def playlist_page():
     playlist = load_playlist()
-    gifs = sorted([f for f in os.listdir(GIF_FOLDER) if f.lower().endswith(".gif")])
-    return render_template("playlist.html", gifs=gifs, playlist=playlist)
+    gifs = sorted(gif_index.names())
+    hashes = {name: entry.hash for name in gifs if (entry := gif_index.get(name))}
+    return render_template("playlist.html", gifs=gifs, playlist=playlist, hashes=hashes)
 
 
 
@@ -354,54 +430,62 @@ def playlist_save():
 def playlist_start():
     playlist = load_playlist()
     full_paths = [os.path.join(GIF_FOLDER, gif) for gif in playlist['order']]
-
-    global gif_player_thread, gif_player_stop
-    if gif_player_thread and gif_player_thread.is_alive():
-        gif_player_stop.set()
-        gif_player_thread.join()
-
-    gif_player_stop.clear()
-    gif_player_thread = threading.Thread(target=play_gifs, args=(full_paths,), daemon=True)
-    gif_player_thread.start()
+    gif_player.play(full_paths, source="playlist")
     return redirect("/playlist")
 
 @app.route("/gif/upload", methods=["POST"])
 def gif_upload():
-    if 'gif_file' not in request.files:
+    """Nimmt eine oder mehrere GIFs an; Prüfen/Transcodieren läuft als Job im Hintergrund."""
+    files = [f for f in request.files.getlist("gif_file") if f.filename]
+    wants_json = request.accept_mimetypes.best == "application/json"
+    if not files:
+        if wants_json:
+            return jsonify({"error": "Keine Datei ausgewählt."}), 400
         flash("Keine Datei ausgewählt.", "danger")
         return redirect("/gif")
 
-    file = request.files['gif_file']
-
-    if file.filename == '':
-        flash("Keine Datei ausgewählt.", "danger")
-        return redirect("/gif")
-
-    if not file.filename.lower().endswith('.gif'):
-        flash("Nur GIF-Dateien erlaubt.", "danger")
-        return redirect("/gif")
-
-    save_path = os.path.join(GIF_FOLDER, file.filename)
-
-    # Prüfen ob Datei existiert
-    if os.path.exists(save_path):
-        # Wenn ja → umbenennen (anhängen _x)
-        base, ext = os.path.splitext(file.filename)
-        counter = 1
-        new_filename = f"{base}_{counter}{ext}"
-
-        while os.path.exists(os.path.join(GIF_FOLDER, new_filename)):
-            counter += 1
-            new_filename = f"{base}_{counter}{ext}"
-
-        save_path = os.path.join(GIF_FOLDER, new_filename)
-        flash(f"Datei existierte bereits. Gespeichert als {new_filename}.", "warning")
-    else:
-        flash("GIF hochgeladen!", "success")
-
-    file.save(save_path)
-    os.chmod(save_path, 0o777)
+    jobs, errors = [], []
+    for file in files:
+        filename = os.path.basename(file.filename)
+        if not filename.lower().endswith(".gif"):
+            errors.append(f"{filename}: nur GIF-Dateien erlaubt")
+            continue
+        spool = request.spool_path(file)
+        if spool is None:
+            errors.append(f"{filename}: Upload fehlgeschlagen")
+            continue
+        job_path = spool[: -len(".part")] + ".job"
+        os.replace(spool, job_path)  # gehört ab jetzt dem Job, nicht mehr dem Request
+        try:
+            jobs.append(upload_jobs.submit(job_path, GIF_FOLDER, filename, panel_width, panel_height))
+        except QueueFull as exc:
+            os.remove(job_path)
+            errors.append(f"{filename}: {exc}")
+
+    if wants_json:
+        return jsonify({"jobs": [job.as_dict() for job in jobs], "errors": errors}), (202 if jobs else 400)
+    for error in errors:
+        flash(error, "danger")
+    if jobs:
+        flash(f"{len(jobs)} GIF(s) werden verarbeitet.", "info")
+    return redirect("/gif")
 
+@app.route("/gif/jobs")
+def gif_jobs_status():
+    return jsonify({"jobs": upload_jobs.jobs()})
+
+@app.route("/gif/jobs/<int:job_id>")
+def gif_job_status(job_id):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.as_dict())
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(exc):
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"error": exc.description}), 413
+    flash(f"Upload abgebrochen: {exc.description}", "danger")
     return redirect("/gif")
 
 @app.route("/gif/delete", methods=["POST"])
@@ -411,6 +495,13 @@ def gif_delete():
 
     if os.path.exists(gif_path):
         os.remove(gif_path)
+        if os.path.exists(gif_pack.pack_path_for(gif_path)):
+            os.remove(gif_pack.pack_path_for(gif_path))
+        forget_gif(gif_path)
+        entry = gif_index.get(gif)
+        gif_index.remove(gif)
+        if entry is not None and not any(e.hash == entry.hash for e in gif_index.entries()):
+            thumbnails.discard(entry.hash)
         flash(f"{gif} wurde gelöscht.", "success")
     else:
         flash("Datei existiert nicht.", "danger")
@@ -424,7 +515,7 @@ def dart_webtab():
 
 @app.route("/dart/start", methods=["POST"])
 def dart_start():
-    global dart_mode, last_dart_update
+    global dart_mode, last_dart_update, left_by_timeout
     data = request.get_json(force=True, silent=True) or {}
     logger.info("Received dart start: %s", data)
     players = data.get("players", [])
@@ -438,60 +529,151 @@ def dart_start():
         dart_state["players"] = players
         dart_state["current"] = max(0, min(current, len(players)-1))
         dart_state["checkout"] = checkout
+        dart_delta.reset(dart_state)
+        version = dart_state["version"]
         dart_mode = True
+        left_by_timeout = False
+
+    last_dart_update = time.monotonic()
+    display_signal.notify()
+    stop_pg_autoplay_if_running()
+    return jsonify({"status":"dart mode on", "version": version})
+
+def apply_dart_update(data):
+    """Übernimmt ein Update (HTTP /dart/update oder lokaler IPC-Socket) in dart_state.
+
+    Volle Spielerliste oder "patches" pro Spieler; mit "base_version" werden
+    veraltete Updates verworfen (StaleUpdate) bzw. neuere Felder nicht überschrieben.
+    Nur nach dem Inaktivitäts-Timeout schaltet ein Update wieder in den
+    Darts-Modus (der Relay sendet nur Updates, kein /dart/start); nach
+    /dart/stop bleibt er aus.
+    Gibt (version, rejected) zurück.
+    """
+    global last_dart_update, dart_mode, left_by_timeout
+    with state_lock:
+        before = dart_state["version"]
+        rejected = dart_delta.apply(dart_state, data)
+        version = dart_state["version"]
+        resumed = left_by_timeout and not dart_mode and bool(dart_state.get("players"))
+        if resumed:
+            dart_mode = True
+            left_by_timeout = False
 
     last_dart_update = time.monotonic()
+    if version != before or resumed:
+        display_signal.notify()
     stop_pg_autoplay_if_running()
-    return jsonify({"status":"dart mode on"})
+    return version, rejected
 
 @app.route("/dart/update", methods=["POST"])
 def dart_update():
-    global last_dart_update
     data = request.get_json(force=True, silent=True) or {}
     logger.info("Received dart update: %s", data)
-    with state_lock:
-        if "players" in data and isinstance(data["players"], list) and data["players"]:
-            dart_state["players"] = data["players"]
-            dart_state["current"] = min(dart_state["current"], len(dart_state["players"]) - 1)
-        if "current" in data:
-            players = dart_state.get("players", [])
-            if players:
-                dart_state["current"] = max(0, min(int(data["current"]), len(players)-1))
-        if "checkout" in data:
-            dart_state["checkout"] = str(data.get("checkout") or "")
-
-    last_dart_update = time.monotonic()
-    stop_pg_autoplay_if_running()
-    return jsonify({"status":"updated"})
+    try:
+        version, rejected = apply_dart_update(data)
+    except StaleUpdate as exc:
+        return jsonify({"status": "stale", "version": exc.version}), 409
+    return jsonify({"status":"updated", "version": version, "rejected": rejected})
 
 @app.route("/dart/next", methods=["POST"])
 def dart_next():
     with state_lock:
         players = dart_state.get("players", [])
         if players:
-            dart_state["current"] = (dart_state["current"] + 1) % len(players)
-    return jsonify({"status":"next"})
+            dart_delta.apply(dart_state, {"current": (dart_state["current"] + 1) % len(players)})
+        version = dart_state["version"]
+    display_signal.notify()
+    return jsonify({"status":"next", "version": version})
 
-@app.route("/dart/stop", methods=["POST"])
-def dart_stop():
-    global dart_mode, pg_autoplay_active
-    dart_mode = False  # Darts-Ansicht aus
+def leave_dart_mode():
+    """Darts-Ansicht aus, Checkout leeren und GIFs aus gifs/pg starten."""
+    global dart_mode
+    dart_mode = False
 
-    # optional: Checkout leeren
     with state_lock:
-        dart_state["checkout"] = ""
+        dart_delta.apply(dart_state, {"checkout": ""})
+    display_signal.notify()
+    return start_pg_autoplay()
 
-    # GIFs aus gifs/pg sofort starten
-    started, msg = start_pg_autoplay()
+@app.route("/dart/stop", methods=["POST"])
+def dart_stop():
+    global left_by_timeout
+    left_by_timeout = False
+    started, msg = leave_dart_mode()
     return jsonify({
         "status": "dart mode off",
         "pg_started": started,
         "message": msg
     })
 
+def dart_status():
+    """Status für die Dart-Testseite (Polling und Live-Stream)."""
+    with state_lock:
+        state = {
+            "players": list(dart_state.get("players", [])),
+            "current": dart_state.get("current", 0),
+            "checkout": dart_state.get("checkout", ""),
+            "version": dart_state.get("version", 0),
+        }
+    elapsed = int(time.monotonic() - last_dart_update) if last_dart_update else 0
+    return {
+        "dart_mode": dart_mode,
+        "state": state,
+        "elapsed": elapsed,
+        "inactivity_limit": INACTIVITY_SECS,
+        "pg_autoplay_active": gif_player.source == "pg" and gif_player.is_playing(),
+    }
+
+@app.route("/network")
+def network_stats():
+    """Zuletzt gelesener Netzwerkstatus und Zähler (Lesevorgänge, Kernel-Events)."""
+    return jsonify(network.stats())
+
+@app.route("/timers")
+def timer_stats():
+    """Laufzeiten und nächste Termine aller Timer-Jobs."""
+    return jsonify(timers.stats())
+
+# Ein Producer für alle offenen Tabs; "elapsed" zählt der Browser lokal weiter
+status_broadcaster = StatusBroadcaster(dart_status, display_signal, heartbeat=15.0, volatile=("elapsed",))
+
+@app.route("/dart/status")
+def dart_status_route():
+    return jsonify(dart_status())
+
+@app.route("/dart/stream")
+def dart_stream():
+    return Response(
+        status_broadcaster.subscribe(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def main():
+    setup()
+    logger.info("Starting web server on 0.0.0.0:5000")
+    network.watch(timers)
+    timers.call_later(INACTIVITY_SECS, inactivity_watchdog)
+    if render_client is not None:
+        # Die Uhr tickt im Render-Prozess selbst
+        logger.info("Starting render process")
+        render_client.start()
+        threading.Thread(target=render_publisher, daemon=True).start()
+    else:
+        timers.call_later(0, clock_tick)
+        threading.Thread(target=display_loop, daemon=True).start()
+    timers.start()
+    # Index mit dem Ordner abgleichen (z.B. per scp kopierte GIFs); nur neue/geänderte Dateien werden gelesen
+    threading.Thread(target=gif_index.sync, daemon=True).start()
+    # Optionaler lokaler Kanal vom Round-Relay (schneller als HTTP über localhost)
+    ipc_socket = os.getenv(SOCKET_ENV) or settings.get("dart_ipc_socket")
+    if ipc_socket:
+        logger.info("Listening for dart updates on %s", ipc_socket)
+        DartStateReceiver(ipc_socket, apply_dart_update).start()
+    status_broadcaster.start()
+    app.run(host="0.0.0.0", port=5000, threaded=True)
+
 
 if __name__ == "__main__":
-    logger.info("Starting web server on 0.0.0.0:5000")
-    threading.Thread(target=wlan_monitor, daemon=True).start()
-    threading.Thread(target=display_loop, daemon=True).start()
-    app.run(host="0.0.0.0", port=5000)
+    main()
@@ -0,0 +1,137 @@
+"""Reconnecting supervisor for the AutoDarts websocket.
+
+``run_forever`` used to be called once with the token captured at startup, so
+a dropped socket left the relay dead until systemd restarted the service.
+:class:`ConnectionSupervisor` builds a fresh ``WebSocketApp`` for every
+attempt (the factory picks up the current access token), waits with jittered
+exponential backoff between attempts and records how long outages lasted:
+
+* ``reconnect_time`` - from the start of the successful attempt to ``on_open``,
+* ``gap`` - from the drop of the previous connection to ``on_open``.
+
+The backoff only starts over once a connection stayed up for
+``stable_after`` seconds; a server that accepts and immediately drops the
+socket is retried with growing delays instead of in a tight loop.
+
+The application calls :meth:`ConnectionSupervisor.opened` from its
+``on_open`` handler, where it also re-subscribes and resyncs its state.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionSupervisor:
+    """Run ``app_factory()`` connections until :meth:`stop` is called."""
+
+    def __init__(
+        self,
+        app_factory: Callable[[], object],
+        run_options: Optional[dict] = None,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        stable_after: float = 10.0,
+        clock=time.monotonic,
+        rng=random.random,
+    ) -> None:
+        self.app_factory = app_factory
+        self.run_options = run_options or {}
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.clock = clock
+        self.rng = rng
+        self.connected = False
+        self.connects = 0
+        self.disconnects = 0
+        self.attempts = 0
+        self.last_reconnect_time: Optional[float] = None
+        self.last_gap: Optional[float] = None
+        self.max_gap = 0.0
+        self._attempt = 0
+        self._attempt_started = 0.0
+        self._opened_at = 0.0
+        self._dropped_at: Optional[float] = None
+        self._ws = None
+        self._stop = threading.Event()
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry ``attempt``: half fixed, half random ("equal jitter")."""
+
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return cap / 2 + self.rng() * cap / 2
+
+    def opened(self) -> None:
+        """Record a successful connection; call from ``on_open``."""
+
+        now = self.clock()
+        self.connected = True
+        self.connects += 1
+        self.last_reconnect_time = now - self._attempt_started
+        if self._dropped_at is not None:
+            self.last_gap = now - self._dropped_at
+            self.max_gap = max(self.max_gap, self.last_gap)
+            logger.info(
+                "Reconnected after %.1f s gap (connect took %.2f s)", self.last_gap, self.last_reconnect_time
+            )
+        self._dropped_at = None
+        self._opened_at = now
+
+    def run(self) -> None:
+        """Connect, and reconnect after every drop, until stopped."""
+
+        while not self._stop.is_set():
+            self.attempts += 1
+            self._attempt_started = self.clock()
+            self._ws = self.app_factory()
+            try:
+                self._ws.run_forever(**self.run_options)
+            except Exception:
+                logger.exception("WebSocket connection failed")
+            if self.connected:
+                self.connected = False
+                self.disconnects += 1
+                self._dropped_at = self.clock()
+                if self._dropped_at - self._opened_at >= self.stable_after:
+                    self._attempt = 0  # Verbindung lief stabil: Backoff von vorn
+            elif self._dropped_at is None:
+                # Erster Verbindungsaufbau gescheitert: Lücke ab jetzt messen
+                self._dropped_at = self._attempt_started
+            if self._stop.is_set():
+                break
+            delay = self.delay(self._attempt)
+            self._attempt += 1
+            logger.info("WebSocket closed, reconnecting in %.1f s", delay)
+            self._stop.wait(delay)
+
+    def stop(self) -> None:
+        """Stop reconnecting and close the current connection."""
+
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+
+    def stats(self) -> dict:
+        """Return connection counters suitable for JSON output."""
+
+        gap = self.last_gap
+        if not self.connected and self._dropped_at is not None:
+            gap = self.clock() - self._dropped_at  # laufender Ausfall
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "attempts": self.attempts,
+            "reconnect_time_s": _rounded(self.last_reconnect_time),
+            "gap_s": _rounded(gap),
+            "max_gap_s": round(self.max_gap, 3),
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)